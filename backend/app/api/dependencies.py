@@ -1,4 +1,6 @@
-from fastapi import Depends, HTTPException, status
+import secrets
+
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
@@ -9,19 +11,19 @@ from app.core.db import models
 from app.core.db.database import get_db
 from app.core.db.schemas import TokenData, UsuarioPerfilEnum
 from app.crud import crud_user
+from app.core.service.metrics import request_stats
 
 # Esta é a URL que o frontend usará para fazer login
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/login/token")
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> models.Usuario:
+# Sem METRICS_TOKEN, os endpoints de operação só respondem ao próprio host
+LOCAL_HOSTS = {"127.0.0.1", "::1", "localhost"}
+
+def authenticate_token(db: Session, token: str, scope: Optional[str] = None) -> models.Usuario:
     """
-    Dependência de segurança:
-    1. Valida o token JWT.
-    2. Extrai o id_usuario.
-    3. Retorna o objeto Usuario do banco de dados.
-    Esta função será injetada em todos os endpoints protegidos.
+    Valida o token JWT e retorna o Usuario correspondente (401 se inválido).
+    Usada pelo get_current_user (token de login, sem 'scope') e pelo stream SSE
+    (ticket com scope 'events'): um tipo de token não vale no lugar do outro.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -39,6 +41,8 @@ def get_current_user(
         
         if id_usuario is None or id_empresa is None or perfil is None: 
             raise credentials_exception
+        if payload.get("scope") != scope:
+            raise credentials_exception
         
         token_data = TokenData(id_usuario=id_usuario, id_empresa=id_empresa, perfil=perfil) 
         
@@ -56,6 +60,24 @@ def get_current_user(
         raise credentials_exception
         
     user.perfil = perfil
+    return user
+
+def get_current_user(
+    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+) -> models.Usuario:
+    """
+    Dependência de segurança:
+    1. Valida o token JWT.
+    2. Extrai o id_usuario.
+    3. Retorna o objeto Usuario do banco de dados.
+    Esta função será injetada em todos os endpoints protegidos.
+    """
+    user = authenticate_token(db, token)
+
+    # Identifica o tenant da requisição para as métricas e o log de queries lentas
+    stats = request_stats.get()
+    if stats is not None:
+        stats.id_empresa = user.id_empresa
         
     return user
 
@@ -81,4 +103,22 @@ def get_admin_user(
             status_code=status.HTTP_403_FORBIDDEN, 
             detail="The user does not have administrative privileges"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+def require_ops_access(request: Request) -> None:
+    """
+    Dependência dos endpoints de operação, que expõem dados do worker inteiro
+    (todos os tenants): /metrics e /admin/caches. Com METRICS_TOKEN exige
+    "Authorization: Bearer <token>"; sem ele, só conexões do próprio host.
+    Não usa o login: o admin de uma empresa não é operador do servidor.
+    """
+    if settings.METRICS_TOKEN:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not secrets.compare_digest(token, settings.METRICS_TOKEN):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid operations token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+    elif request.client is None or request.client.host not in LOCAL_HOSTS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operations endpoint")
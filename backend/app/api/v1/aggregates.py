@@ -0,0 +1,82 @@
+import re
+from typing import Any, List, Tuple
+
+from sqlalchemy import Date, DateTime, Integer, JSON, Numeric, func
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.api.v1.filters import FilterError, HIDDEN_FIELDS
+
+# Agregação no servidor (GET /generic/{model}/aggregate):
+#   ?group_by=plano_contas&metrics=sum(valor),count(*)&filter[situacao][eq]=Em Aberto
+# Um único SELECT ... GROUP BY no tenant; o navegador recebe só os grupos.
+
+METRIC = re.compile(r"^(count|sum|avg|min|max)\((\*|\w+)\)$")
+
+MAX_GROUP_BY = 3
+MAX_METRICS = 10
+
+
+def _is_summable(column) -> bool:
+    """Só colunas numéricas de valor (não ids nem chaves estrangeiras)."""
+    if column.primary_key or column.foreign_keys:
+        return False
+    return isinstance(column.type, (Integer, Numeric))
+
+
+def _is_ordered(column) -> bool:
+    return isinstance(column.type, (Integer, Numeric, Date, DateTime))
+
+
+def _column(model: Any, field: str):
+    columns = model.__table__.columns
+    if field not in columns or field in HIDDEN_FIELDS or field == "id_empresa":
+        raise FilterError(f"Campo inválido: {field}")
+    return columns[field]
+
+
+def parse_group_by(model: Any, group_by: str) -> List[Tuple[str, ColumnElement]]:
+    """'deposito,cor' -> [(nome, coluna)]. JSON não é agrupável."""
+    fields = [f.strip() for f in (group_by or "").split(",") if f.strip()]
+    if len(fields) > MAX_GROUP_BY:
+        raise FilterError(f"group_by aceita no máximo {MAX_GROUP_BY} campos")
+
+    groups = []
+    for field in dict.fromkeys(fields):
+        column = _column(model, field)
+        if isinstance(column.type, JSON):
+            raise FilterError(f"Campo não agrupável: {field}")
+        groups.append((field, getattr(model, field)))
+    return groups
+
+
+def parse_metrics(model: Any, metrics: str) -> List[Tuple[str, ColumnElement]]:
+    """
+    'sum(valor),count(*)' -> [("sum_valor", SUM(valor)), ("count", COUNT(*))].
+    sum/avg só em colunas numéricas; min/max em numéricas e datas.
+    """
+    items = [m.strip() for m in (metrics or "count(*)").split(",") if m.strip()]
+    if not items or len(items) > MAX_METRICS:
+        raise FilterError(f"Informe de 1 a {MAX_METRICS} métricas")
+
+    result = []
+    for item in dict.fromkeys(items):
+        match = METRIC.match(item.replace(" ", ""))
+        if not match:
+            raise FilterError(f"Métrica inválida: {item}")
+        fn, field = match.groups()
+
+        if field == "*":
+            if fn != "count":
+                raise FilterError(f"Métrica inválida: {item}")
+            result.append(("count", func.count().label("count")))
+            continue
+
+        column = _column(model, field)
+        if fn in ("sum", "avg") and not _is_summable(column):
+            raise FilterError(f"{fn} exige uma coluna numérica: {field}")
+        if fn in ("min", "max") and not _is_ordered(column):
+            raise FilterError(f"{fn} exige uma coluna numérica ou de data: {field}")
+
+        name = f"{fn}_{field}"
+        result.append((name, getattr(func, fn)(getattr(model, field)).label(name)))
+    return result
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, generic, metadata, dashboard
+from app.api.v1.endpoints import auth, generic, metadata, dashboard, pedidos, estoque, admin, events, jobs, lookup, catalogo, empresa
 
 api_router = APIRouter()
 
@@ -8,4 +8,12 @@ api_router = APIRouter()
 api_router.include_router(auth.router, tags=["Authentication"])
 api_router.include_router(dashboard.router, tags=["Dashboard"])
 api_router.include_router(metadata.router, tags=["Metadata"])
+api_router.include_router(pedidos.router, tags=["Pedidos"])
+api_router.include_router(estoque.router, tags=["Estoque"])
+api_router.include_router(admin.router, tags=["Admin"])
+api_router.include_router(events.router, tags=["Events"])
+api_router.include_router(jobs.router, tags=["Jobs"])
+api_router.include_router(lookup.router, tags=["Lookup"])
+api_router.include_router(catalogo.router, tags=["Catalogo"])
+api_router.include_router(empresa.router, tags=["Empresa"])
 api_router.include_router(generic.router, tags=["Generic CRUD"])
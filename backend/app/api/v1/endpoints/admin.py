@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, Response, status
+from typing import List
+
+from app.api.dependencies import get_admin_user, require_ops_access
+from app.core.db import models, schemas
+from app.core.service.profiler import slow_query_log
+from app.core.service import cache
+
+router = APIRouter()
+
+@router.get("/admin/slow-queries", response_model=List[schemas.SlowQuery])
+def list_slow_queries(
+    current_user: models.Usuario = Depends(get_admin_user)
+):
+    """
+    Retorna as últimas queries lentas da empresa do usuário capturadas por
+    ESTE worker (mais recentes primeiro). Requer SLOW_QUERY_LOG_ENABLED=true.
+    """
+    return slow_query_log.list(current_user.id_empresa)
+
+@router.delete("/admin/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+def clear_slow_queries(
+    current_user: models.Usuario = Depends(get_admin_user)
+):
+    """Remove do buffer deste worker as queries lentas da empresa do usuário."""
+    slow_query_log.clear(current_user.id_empresa)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+@router.get("/admin/caches", response_model=List[schemas.CacheStats], dependencies=[Depends(require_ops_access)])
+def list_cache_stats():
+    """
+    Hit rate por namespace de cache neste worker (e uso de memória do backend local).
+    Dados do processo inteiro: exige a credencial de operação (METRICS_TOKEN), não o login.
+    """
+    return cache.all_stats()
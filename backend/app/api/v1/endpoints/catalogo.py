@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.orm import Session
+
+from app.api.dependencies import get_current_active_user
+from app.api.v1.http_cache import cached_json_response
+from app.core.db import models, database, schemas
+from app.core.service.catalog import catalogs
+
+router = APIRouter()
+
+@router.get("/catalogo", response_model=schemas.Catalogo)
+def read_catalogo(
+    request: Request,
+    db: Session = Depends(database.get_db),
+    current_user: models.Usuario = Depends(get_current_active_user)
+):
+    """
+    Catálogo de produtos da empresa para a digitação/visualização de pedidos
+    (id, sku, gtin, descricao, unidade, preco, peso, dimensões, id_embalagem, situacao).
+    Formato colunar: 'campos' + uma lista por produto. Envie If-None-Match com o ETag
+    recebido: sem mudanças, a resposta é 304 sem corpo.
+    """
+    body, etag = catalogs.encoded(db, current_user.id_empresa)
+    return cached_json_response(request, body, etag)
+
+@router.get("/catalogo/codigo/{codigo}")
+def read_catalogo_codigo(
+    codigo: str,
+    db: Session = Depends(database.get_db),
+    current_user: models.Usuario = Depends(get_current_active_user)
+):
+    """Produto pelo SKU ou GTIN (ex: leitor de código de barras), direto do catálogo em memória."""
+    item = catalogs.find_code(db, current_user.id_empresa, codigo)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Produto não encontrado")
+    return item
@@ -82,15 +82,19 @@ def get_dashboard_stats(
     } for o in recent_orders]
 
     # --- 5. Estoque Baixo (Alerta) ---
-    # Agrupa estoque por produto e soma quantidades
+    # Lê o saldo materializado (saldo_estoque): varredura de índice em
+    # (id_empresa, situacao, quantidade) em vez de SUM/GROUP BY sobre os lotes
     low_stock_query = db.query(
         models.Produto.sku,
         models.Produto.descricao,
-        func.sum(models.Estoque.quantidade).label("total_qty")
-    ).join(models.Estoque, models.Estoque.id_produto == models.Produto.id)\
-    .filter(models.Produto.id_empresa == current_user.id_empresa)\
-    .group_by(models.Produto.id)\
-    .having(func.sum(models.Estoque.quantidade) < 10)\
+        models.SaldoEstoque.quantidade.label("total_qty")
+    ).join(models.Produto, models.Produto.id == models.SaldoEstoque.id_produto)\
+    .filter(
+        models.SaldoEstoque.id_empresa == current_user.id_empresa,
+        models.SaldoEstoque.situacao == models.EstoqueSituacaoEnum.disponivel,
+        models.SaldoEstoque.quantidade < 10
+    )\
+    .order_by(models.SaldoEstoque.quantidade)\
     .limit(5)
     
     low_stock_data = [{"sku": r.sku, "produto": r.descricao, "quantidade": r.total_qty} for r in low_stock_query.all()]
@@ -113,8 +117,6 @@ def get_dashboard_stats(
         models.Pedido.id_empresa == current_user.id_empresa
     ).scalar() or 0
 
-    print(total_orders_global)
-
     if total_orders_global < 100:
         import random
         
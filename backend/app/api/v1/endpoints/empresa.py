@@ -0,0 +1,45 @@
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+
+from app.api.dependencies import get_current_active_user
+from app.api.v1.http_cache import make_etag, cached_json_response
+from app.core.db import models, database, schemas
+from app.core.service import invalidation
+from app.core.service.cache import get_cache
+from app.crud import crud_business
+
+router = APIRouter()
+
+# Perfil da empresa (tenant) por (id_empresa, geração de 'empresas'), com o corpo e o ETag.
+# Qualquer escrita em 'empresas' (notify_write local ou de outro worker) muda a chave.
+empresa_cache = get_cache("empresa", ttl=300)
+
+TABLE_NAME = models.Empresa.__tablename__
+
+@router.get("/empresa/me", response_model=schemas.Empresa)
+def read_empresa_me(
+    request: Request,
+    db: Session = Depends(database.get_db),
+    current_user: models.Usuario = Depends(get_current_active_user)
+):
+    """
+    Dados da empresa do usuário logado (cabeçalho de pedidos, crt/emissao para a
+    parte fiscal). Envie If-None-Match com o ETag recebido: sem mudanças, 304.
+    """
+    id_empresa = current_user.id_empresa
+    # Chave montada ANTES da consulta (ver response_cache_key)
+    cache_key = (id_empresa, invalidation.generations(id_empresa, (TABLE_NAME,)), "me")
+
+    def build_empresa():
+        empresa = crud_business.get_business(db, id_empresa=id_empresa)
+        if empresa is None:
+            raise HTTPException(status_code=404, detail="Empresa não encontrada")
+        content = jsonable_encoder(schemas.Empresa.model_validate(empresa))
+        body = json.dumps(content, ensure_ascii=False).encode("utf-8")
+        return (body, make_etag(body))
+
+    body, etag = empresa_cache.get_or_compute(cache_key, build_empresa)
+    return cached_json_response(request, body, etag)
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from app.api.dependencies import get_current_active_user
+from app.core.db import models, database, schemas
+from app.crud import crud_estoque
+
+router = APIRouter()
+
+# Limite de produtos por chamada (mantém o IN (...) e a resposta pequenos)
+MAX_PRODUTOS_POR_CONSULTA = 500
+
+@router.get("/estoque/saldos", response_model=List[schemas.SaldoEstoque])
+def read_saldos(
+    ids_produto: List[int] = Query(...),
+    situacao: Optional[models.EstoqueSituacaoEnum] = None,
+    db: Session = Depends(database.get_db),
+    current_user: models.Usuario = Depends(get_current_active_user)
+):
+    """
+    Retorna o saldo materializado de vários produtos em uma única chamada.
+    Ex: /estoque/saldos?ids_produto=1&ids_produto=2&situacao=Disponivel
+    Produtos sem nenhum lote não aparecem na resposta (saldo zero).
+    """
+    if len(ids_produto) > MAX_PRODUTOS_POR_CONSULTA:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Informe no máximo {MAX_PRODUTOS_POR_CONSULTA} produtos por consulta."
+        )
+
+    return crud_estoque.get_saldos(
+        db,
+        id_empresa=current_user.id_empresa,
+        ids_produto=ids_produto,
+        situacao=situacao,
+    )
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from jose import jwt
+
+from app.api.dependencies import authenticate_token, get_current_active_user, oauth2_scheme
+from app.api.v1.model_dispatch import get_registry_entry
+from app.core.config import settings
+from app.core.db import models as db_models, schemas
+from app.core.db.database import SessionLocal
+from app.core.service import security
+from app.core.service.events import broker
+
+router = APIRouter()
+
+HEARTBEAT_SECONDS = 15
+MAX_MODELS = 20
+
+
+TICKET_CLAIMS = ("id_usuario", "id_empresa", "perfil")
+
+
+def _authenticate(ticket: str) -> Tuple[db_models.Usuario, float]:
+    """Usuário do ticket e o instante (epoch) em que ele vence."""
+    # Sessão curta: a conexão volta ao pool antes do stream começar
+    # (o stream pode ficar aberto sem segurar conexão do banco).
+    db = SessionLocal()
+    try:
+        user = authenticate_token(db, ticket, scope=security.EVENTS_TICKET_SCOPE)
+        if not user.situacao:
+            raise HTTPException(status_code=400, detail="Inactive user")
+        return user, float(jwt.get_unverified_claims(ticket)["exp"])
+    finally:
+        db.close()
+
+
+def _format(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/events/ticket", response_model=schemas.EventsTicket)
+def create_events_ticket(
+    token: str = Depends(oauth2_scheme),
+    current_user: db_models.Usuario = Depends(get_current_active_user),
+):
+    """
+    Ticket para abrir o stream (GET /events?ticket=...): vale só para ele, por
+    EVENTS_TICKET_SECONDS e nunca além do vencimento do próprio login.
+    """
+    # O token já foi validado pelo get_current_active_user
+    claims = jwt.get_unverified_claims(token)
+    agora = datetime.now(timezone.utc)
+    expires_at = min(
+        agora + timedelta(seconds=settings.EVENTS_TICKET_SECONDS),
+        datetime.fromtimestamp(claims["exp"], timezone.utc),
+    )
+    ticket = security.create_events_ticket({k: claims[k] for k in TICKET_CLAIMS}, expires_at)
+    return {"ticket": ticket, "expires_in": max(0, int((expires_at - agora).total_seconds()))}
+
+
+@router.get("/events")
+async def stream_events(
+    models: str = Query(..., description="Modelos separados por vírgula (ex: pedidos,estoque)"),
+    ticket: str = Query(..., description="Ticket de POST /events/ticket (o EventSource não envia cabeçalhos)"),
+):
+    """
+    Server-Sent Events com as escritas do tenant nos modelos pedidos.
+    - event: change   data: {"model": "pedidos", "ids": [12]}  (ids null = vários/indeterminado)
+    - event: resync   o cliente perdeu eventos e deve recarregar os dados.
+    - event: expired  o ticket venceu e o stream foi encerrado: abrir outro com um ticket novo.
+    Uma conexão por aba substitui o polling; conexões ociosas não usam threads nem conexões do banco.
+    """
+    user, expires_at = await run_in_threadpool(_authenticate, ticket)
+
+    tables: Dict[str, str] = {}
+    for model_name in [m.strip() for m in models.split(",") if m.strip()][:MAX_MODELS]:
+        registry = get_registry_entry(model_name)
+        if not registry:
+            raise HTTPException(status_code=404, detail=f"Model not found: {model_name}")
+        tables[registry["model"].__tablename__] = model_name
+
+    subscription = broker.subscribe(user.id_empresa, tables)
+
+    async def stream():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                restante = expires_at - time.time()
+                if restante <= 0:
+                    yield _format("expired", {})
+                    return
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), min(HEARTBEAT_SECONDS, restante))
+                except asyncio.TimeoutError:
+                    if time.time() < expires_at:
+                        yield ": ping\n\n"
+                    continue
+
+                if subscription.overflow:
+                    # Fila cheia ou eventos perdidos: descarta o que sobrou e pede recarga
+                    subscription.overflow = False
+                    while not subscription.queue.empty():
+                        subscription.queue.get_nowait()
+                    yield _format("resync", {})
+                    continue
+                yield _format("change", event)
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,113 +1,209 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import StreamingResponse # Importar StreamingResponse
 import io # Importar io
 import csv # Importar csv
+import json
+import base64
+from datetime import datetime
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, String, cast, func, distinct, text
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.types import Text, Enum 
-from typing import List, Any, Dict
+from typing import List, Any, Dict, Optional, Callable, Type
+from pydantic import BaseModel, ValidationError
 
 from app.api.dependencies import get_current_active_user
 from app.core.db import models, database, schemas
 from app.api.v1.model_dispatch import get_registry_entry
+from app.crud import crud_generic
+from app.api.v1.http_cache import make_etag, cached_json_response, etag_matches, not_modified
+from app.api.v1 import aggregates, filters
+from app.core.service import invalidation
+from app.core.service.cache import get_cache
+from app.core.config import settings
 
-from app.crud import crud_user
-from app.api.dependencies import get_current_active_user
 
 router = APIRouter()
 
+# --- Cache de respostas dos GETs ---
+# Guarda o JSON já codificado. A chave começa por (tenant, tabela) e inclui as gerações
+# de escrita do modelo e das tabelas aninhadas: qualquer notify_write torna as entradas
+# antigas inalcançáveis (invalidação exata, O(1)); o LRU descarta-as depois.
+response_cache = get_cache("response", ttl=settings.RESPONSE_CACHE_TTL)
+
+def response_cache_key(registry: Dict[str, Any], id_empresa: int, *parts: Any) -> tuple:
+    """Monte a chave ANTES de consultar o banco, para nunca associar dados antigos a uma geração nova."""
+    table_name = registry["model"].__tablename__
+    return (id_empresa, table_name, invalidation.generations(id_empresa, registry["dependent_tables"]), *parts)
+
+def encode_json(content: Any) -> bytes:
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False).encode("utf-8")
+
+def cached_response(cache_key: tuple, build: Callable[[], Any]) -> Response:
+    """
+    Devolve o JSON do cache ou executa 'build' (consulta + serialização) e guarda os bytes.
+    Requisições simultâneas com a mesma chave executam 'build' uma única vez (single-flight).
+    """
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return Response(content=encode_json(build()), media_type="application/json")
+
+    body = response_cache.get_or_compute(
+        cache_key,
+        lambda: encode_json(build()),
+        should_cache=lambda body: len(body) <= settings.RESPONSE_CACHE_MAX_BODY_BYTES,
+    )
+    return Response(content=body, media_type="application/json")
+
+def version_etag(id: int, version: tuple) -> str:
+    """ETag fraco de um registro a partir de (id, atualizado_em dele e dos aninhados)."""
+    return make_etag(repr((id, version)).encode("utf-8"), weak=True)
+
+# O corpo é lido cru (raw_body), então o FastAPI não o descreve no OpenAPI: declara
+# aqui o mesmo objeto JSON que aparecia com 'Dict[str, Any] = Body(...)'. O schema
+# de cada modelo depende do {model_name} da URL.
+JSON_BODY_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {
+                "schema": {"title": "Item Data", "type": "object", "additionalProperties": True},
+            },
+        },
+    },
+}
+
+async def raw_body(request: Request) -> bytes:
+    """Corpo cru da requisição: a validação é feita direto dos bytes pelo schema do modelo."""
+    return await request.body()
+
+def validate_body(validator: Callable[[bytes], BaseModel], body: bytes) -> BaseModel:
+    """Aplica o validador do registro (model_validate_json) e traduz erros em 422."""
+    try:
+        return validator(body)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=f"Validation error: {e}")
+
+def validate_python(schema: Type[BaseModel], data: Dict[str, Any]) -> BaseModel:
+    try:
+        return schema.model_validate(data)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=f"Validation error: {e}")
+
+def compile_filters_or_400(registry: Dict[str, Any], spec: filters.FilterSpec) -> list:
+    try:
+        return filters.compile_filters(registry["model"], spec)
+    except filters.FilterError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+ORDER_BY_MAX_FIELDS = 3
+
+def parse_order_by(registry: Dict[str, Any], order_by: Optional[str]) -> list:
+    """
+    'col,-col2' -> [col ASC, col2 DESC, id ASC]. O 'id' fecha a ordenação, então
+    páginas com offset/limit são determinísticas. Só colunas indexadas ('sortable'
+    nos metadados); as demais retornam 400.
+    """
+    model = registry["model"]
+    clauses = []
+    fields = [f.strip() for f in (order_by or "").split(",") if f.strip()]
+    if len(fields) > ORDER_BY_MAX_FIELDS:
+        raise HTTPException(status_code=400, detail=f"order_by aceita no máximo {ORDER_BY_MAX_FIELDS} campos")
+
+    seen = set()
+    for field in fields:
+        descending = field.startswith("-")
+        name = field.lstrip("-+")
+        if name not in registry["sortable_fields"]:
+            raise HTTPException(status_code=400, detail=f"Campo não ordenável: {name}")
+        if name in seen:
+            continue
+        seen.add(name)
+        column = getattr(model, name)
+        clauses.append(column.desc() if descending else column.asc())
+
+    if "id" not in seen:
+        clauses.append(model.id.asc())
+    return clauses
+
 # --- Endpoint de Listagem (GET) ---
 @router.get("/generic/{model_name}", response_model=schemas.Page)
 def list_items(
     model_name: str,
+    request: Request,
     db: Session = Depends(database.get_db),
     skip: int = 0,
     limit: int = 10,
     search_term: str = None,
     situacao: str = None,
     id_produto: int = None,
+    order_by: Optional[str] = Query(None, description="Ex: nome_razao,-criado_em (sempre desempata por id)"),
     current_user: models.Usuario = Depends(get_current_active_user)
 ):
     """
     Lista itens paginados de um modelo para o business do usuário,
-    com filtro de busca opcional.
+    com filtro de busca opcional e ordenação por colunas indexadas.
+    Filtros tipados: filter[campo][op]=valor, com op em eq, ne, gt, gte, lt, lte,
+    in (separados por vírgula) e isnull. Ex: filter[total][gt]=1000.
     """
     registry = get_registry_entry(model_name)
     if not registry:
         raise HTTPException(status_code=404, detail="Model not found")
-    
-    # 1. Monta a query base
-    base_query = db.query(registry["model"]).filter(
-        registry["model"].id_empresa == current_user.id_empresa
+
+    order_clauses = parse_order_by(registry, order_by)
+    filter_spec = filters.parse_filter_params(request.query_params.multi_items())
+    compiled_filters = compile_filters_or_400(registry, filter_spec)
+
+    def build_page():
+        # 1. Query base: tenant, atalhos, filtros estruturados (filter[campo][op]) e busca livre.
+        # A mesma query alimenta a contagem e a página (e a exportação). Montada só sem
+        # cache: a busca por dígitos já consulta o banco (ver crud_generic.filtered_query).
+        base_query = crud_generic.filtered_query(
+            db, model=registry["model"], id_empresa=current_user.id_empresa,
+            search_term=search_term, situacao=situacao, id_produto=id_produto,
+            filters=compiled_filters
+        )
+
+        # 3. Obter a contagem total (AGORA VEM DA QUERY FILTRADA)
+        total_count = base_query.count()
+
+        # 4. Obter os itens paginados (APLICA OFFSET E LIMIT DEPOIS DO FILTRO)
+        items = base_query.order_by(*order_clauses).offset(skip).limit(limit).all()
+
+        # 5. Serializar os itens
+        serialized_items = [registry["schema"].from_orm(item) for item in items]
+
+        # 6. Retornar no formato de página
+        return {"items": serialized_items, "total_count": total_count}
+
+    cache_key = response_cache_key(
+        registry, current_user.id_empresa, "list", skip, limit, search_term, situacao, id_produto, order_by,
+        filters.cache_key(filter_spec)
     )
-    
-    if situacao:
-        # Verifica se o modelo realmente tem a coluna "situacao"
-        if hasattr(registry["model"], "situacao"):
-            base_query = base_query.filter(registry["model"].situacao == situacao)
-    
-    # Filtro por ID do Produto (Útil para verificar estoque)
-    if id_produto is not None:
-        if hasattr(registry["model"], "id_produto"):
-            base_query = base_query.filter(registry["model"].id_produto == id_produto)
-    
-    # 2. Aplica o filtro de busca (NOVO)
-    if search_term:
-        
-        NON_SEARCHABLE_FIELDS = [
-            "id", 
-            "id_empresa", 
-            "criado_em", 
-            "atualizado_em", 
-            "senha", 
-            "hashed_password"
-        ]
-
-        filter_conditions = []
-        
-        # 🎯 Prepara o termo de busca para o ILIKE
-        search_pattern = f"%{search_term}%"
-        
-        for col in registry["model"].__table__.columns:
-            
-            if col.name in NON_SEARCHABLE_FIELDS:
-                continue
-
-            column_attr = getattr(registry["model"], col.name)
-            
-            # 🎯 CORREÇÃO:
-            # 1. Converte a coluna para String (cast)
-            # 2. Aplica unaccent() NA COLUNA
-            # 3. Aplica unaccent() NO TERMO DE BUSCA
-            filter_conditions.append(
-                func.unaccent(cast(column_attr, String)).ilike(func.unaccent(search_pattern))
-            )
-        
-        if filter_conditions:
-            base_query = base_query.filter(or_(*filter_conditions))
+    return cached_response(cache_key, build_page)
 
-    # 3. Obter a contagem total (AGORA VEM DA QUERY FILTRADA)
-    total_count = base_query.count()
-    
-    # 4. Obter os itens paginados (APLICA OFFSET E LIMIT DEPOIS DO FILTRO)
-    items = base_query.offset(skip).limit(limit).all()
-    
-    # 5. Serializar os itens
-    serialized_items = [registry["schema"].from_orm(item) for item in items]
-    
-    # 6. Retornar no formato de página
-    return {"items": serialized_items, "total_count": total_count}
+# Cache dos valores distintos por (tenant, tabela, gerações, campo, prefixo, limite),
+# com o corpo e o ETag. Invalidado pelas gerações de escrita, como o response_cache.
+distinct_cache = get_cache("distinct", ttl=300)
+
+DISTINCT_DEFAULT_LIMIT = 200
+DISTINCT_MAX_LIMIT = 1000
 
 @router.get("/generic/{model_name}/distinct/{field_name}", response_model=List[str])
 def get_distinct_values(
+    request: Request,
     model_name: str,
     field_name: str,
+    prefix: Optional[str] = None,
+    limit: int = Query(DISTINCT_DEFAULT_LIMIT, ge=1, le=DISTINCT_MAX_LIMIT),
     db: Session = Depends(database.get_db),
     current_user: models.Usuario = Depends(get_current_active_user)
 ):
     """
     Retorna valores distintos de um campo para preencher dropdowns dinâmicos (CreatableSelect).
+    - prefix: filtra pelos valores que começam com o texto (sem diferenciar maiúsculas).
+    - limit: quantidade máxima de valores.
+    A resposta é cacheada por tenant/modelo e traz ETag (If-None-Match -> 304).
     """
     registry = get_registry_entry(model_name)
     if not registry:
@@ -115,88 +211,122 @@ def get_distinct_values(
     
     model = registry["model"]
     
-    if not hasattr(model, field_name):
+    if field_name not in model.__table__.columns:
          raise HTTPException(status_code=400, detail=f"Field {field_name} not found in model {model_name}")
-         
-    column = getattr(model, field_name)
-    
-    query = db.query(distinct(column)).filter(
-        model.id_empresa == current_user.id_empresa,
-        column.isnot(None),
-        cast(column, String) != ""
-    ).order_by(column)
-    
-    results = query.all()
-    return [r[0] for r in results]
 
-@router.get("/generic/{model_name}/export")
-def export_items_to_csv(
+    prefix = prefix.strip() if prefix else None
+    cache_key = response_cache_key(registry, current_user.id_empresa, "distinct", field_name, prefix, limit)
+
+    def build_distinct():
+        column = getattr(model, field_name)
+        is_text = isinstance(model.__table__.columns[field_name].type, String)
+
+        # Filtros diretos na coluna (sem cast) para usar o índice (id_empresa, campo)
+        conditions = [model.id_empresa == current_user.id_empresa, column.isnot(None)]
+        if is_text:
+            conditions.append(column != "")
+        if prefix:
+            escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            target = column if is_text else cast(column, String)
+            conditions.append(target.ilike(f"{escaped}%", escape="\\"))
+
+        query = db.query(column).filter(*conditions).distinct().order_by(column).limit(limit)
+        values = jsonable_encoder([r[0] for r in query.all()])
+
+        body = json.dumps(values, ensure_ascii=False).encode("utf-8")
+        return (body, make_etag(body))
+
+    body, etag = distinct_cache.get_or_compute(cache_key, build_distinct)
+    return cached_json_response(request, body, etag)
+
+AGGREGATE_DEFAULT_LIMIT = 100
+AGGREGATE_MAX_LIMIT = 1000
+
+@router.get("/generic/{model_name}/aggregate", response_model=schemas.AggregateResult)
+def aggregate_items(
     model_name: str,
+    request: Request,
     db: Session = Depends(database.get_db),
+    group_by: Optional[str] = Query(None, description="Ex: plano_contas (até 3 campos)"),
+    metrics: str = Query("count(*)", description="Ex: sum(valor),count(*); funções: count, sum, avg, min, max"),
     search_term: str = None,
     situacao: str = None,
+    limit: int = Query(AGGREGATE_DEFAULT_LIMIT, ge=1, le=AGGREGATE_MAX_LIMIT),
     current_user: models.Usuario = Depends(get_current_active_user)
 ):
     """
-    Exporta TODOS os itens (filtrados pelo search_term, se houver)
-    para um arquivo CSV.
+    Resumo agrupado do modelo em um único GROUP BY no tenant
+    (ex: total das contas em aberto por plano de contas).
+    Aceita os mesmos filtros da listagem (filter[campo][op], situacao, search_term).
+    Retorna no máximo 'limit' grupos; 'truncated' indica que havia mais.
     """
     registry = get_registry_entry(model_name)
     if not registry:
         raise HTTPException(status_code=404, detail="Model not found")
 
-    # 1. Monta a query base (igual à listagem)
-    base_query = db.query(registry["model"]).filter(
-        registry["model"].id_empresa == current_user.id_empresa
+    model = registry["model"]
+    try:
+        groups = aggregates.parse_group_by(model, group_by)
+        metric_columns = aggregates.parse_metrics(model, metrics)
+    except filters.FilterError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    filter_spec = filters.parse_filter_params(request.query_params.multi_items())
+    compiled_filters = compile_filters_or_400(registry, filter_spec)
+
+    def build_aggregate():
+        base_query = crud_generic.filtered_query(
+            db, model=model, id_empresa=current_user.id_empresa,
+            search_term=search_term, situacao=situacao, filters=compiled_filters
+        )
+        group_columns = [column for _, column in groups]
+        query = base_query.with_entities(
+            *group_columns, *(column for _, column in metric_columns)
+        )
+        if group_columns:
+            query = query.group_by(*group_columns).order_by(*group_columns)
+        # Busca um grupo a mais só para saber se o resultado foi cortado
+        rows = query.limit(limit + 1).all()
+
+        names = [name for name, _ in groups] + [name for name, _ in metric_columns]
+        return {
+            "groups": [dict(zip(names, row)) for row in rows[:limit]],
+            "truncated": len(rows) > limit,
+        }
+
+    cache_key = response_cache_key(
+        registry, current_user.id_empresa, "aggregate", tuple(name for name, _ in groups),
+        tuple(name for name, _ in metric_columns), search_term, situacao, limit,
+        filters.cache_key(filter_spec)
     )
+    return cached_response(cache_key, build_aggregate)
 
-    if situacao:
-        if hasattr(registry["model"], "situacao"):
-            base_query = base_query.filter(registry["model"].situacao == situacao)
-
-    # 2. Aplica o filtro de busca (igual à listagem)
-    if search_term:
-        
-        NON_SEARCHABLE_FIELDS = [
-            "id", 
-            "id_empresa", 
-            "criado_em", 
-            "atualizado_em", 
-            "senha", 
-            "hashed_password"
-        ]
-
-        filter_conditions = []
-        
-        # 🎯 Prepara o termo de busca para o ILIKE
-        search_pattern = f"%{search_term}%"
-
-        for col in registry["model"].__table__.columns:
-            
-            if col.name in NON_SEARCHABLE_FIELDS:
-                continue
-
-            column_attr = getattr(registry["model"], col.name)
-            
-            # 🎯 CORREÇÃO (igual ao list_items)
-            filter_conditions.append(
-                func.unaccent(cast(column_attr, String)).ilike(func.unaccent(search_pattern))
-            )
-        
-        if filter_conditions:
-            base_query = base_query.filter(or_(*filter_conditions))
-
-    # 3. Busca TODOS os itens (sem paginação)
-    items = base_query.all()
+@router.get("/generic/{model_name}/export")
+def export_items_to_csv(
+    model_name: str,
+    request: Request,
+    db: Session = Depends(database.get_db),
+    search_term: str = None,
+    situacao: str = None,
+    current_user: models.Usuario = Depends(get_current_active_user)
+):
+    """
+    Exporta TODOS os itens (filtrados pelo search_term e pelos filter[campo][op],
+    se houver) para um arquivo CSV.
+    """
+    registry = get_registry_entry(model_name)
+    if not registry:
+        raise HTTPException(status_code=404, detail="Model not found")
 
-    # Define os campos que não queremos no CSV (campos internos)
-    SKIPPED_FIELDS = ["id_empresa", "hashed_password"]
-    
-    # Pega os cabeçalhos do modelo, pulando os campos internos
-    headers = [
-        col.name for col in registry["model"].__table__.columns 
-        if col.name not in SKIPPED_FIELDS
-    ]
+    # Query e colunas compartilhadas com o job 'exportar_csv' (POST /jobs),
+    # preferível para exportações grandes.
+    filter_spec = filters.parse_filter_params(request.query_params.multi_items())
+    items = crud_generic.filtered_query(
+        db, model=registry["model"], id_empresa=current_user.id_empresa,
+        search_term=search_term, situacao=situacao,
+        filters=compile_filters_or_400(registry, filter_spec)
+    ).all()
+    headers = crud_generic.export_headers(registry["model"])
 
     # Cria um buffer de string na memória
     output = io.StringIO()
@@ -220,11 +350,76 @@ def export_items_to_csv(
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
+# --- Endpoint de Delta-Sync (GET changes) ---
+def encode_sync_token(updated: Optional[list], deleted: Optional[list]) -> str:
+    raw = json.dumps({"u": updated, "d": deleted}).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_sync_token(token: str) -> tuple:
+    """Token opaco -> watermarks (carimbo, id) de alterações e de exclusões (None = desde o início)."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+        return tuple(
+            (datetime.fromisoformat(mark[0]), int(mark[1])) if mark else None
+            for mark in (data["u"], data["d"])
+        )
+    except Exception:
+        raise HTTPException(status_code=400, detail="Token 'since' inválido")
+
+@router.get("/generic/{model_name}/changes", response_model=schemas.ChangesPage)
+def list_changes(
+    model_name: str,
+    since: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=settings.CHANGES_MAX_LIMIT),
+    db: Session = Depends(database.get_db),
+    current_user: models.Usuario = Depends(get_current_active_user)
+):
+    """
+    Delta-sync: itens criados/alterados e ids excluídos desde o token 'since'
+    (sem token = desde o início), em lotes ordenados por (atualizado_em, id).
+    Repita com 'next_token' enquanto 'has_more' for true; guarde o último token.
+    """
+    registry = get_registry_entry(model_name)
+    if not registry:
+        raise HTTPException(status_code=404, detail="Model not found")
+    model = registry["model"]
+    if "id_empresa" not in model.__table__.columns or "atualizado_em" not in model.__table__.columns:
+        raise HTTPException(status_code=400, detail=f"Model {model_name} não suporta delta-sync")
+
+    since_updated, since_deleted = decode_sync_token(since) if since else (None, None)
+    until = crud_generic.changes_horizon(db)
+
+    items = registry["crud"].get_changes(
+        db, model=model, id_empresa=current_user.id_empresa,
+        since=since_updated, until=until, limit=limit + 1,
+    )
+    tombstones = crud_generic.get_tombstones(
+        db, model=model, id_empresa=current_user.id_empresa,
+        since=since_deleted, until=until, limit=limit + 1,
+    )
+    has_more = len(items) > limit or len(tombstones) > limit
+    items, tombstones = items[:limit], tombstones[:limit]
+
+    if items:
+        since_updated = (items[-1].atualizado_em, items[-1].id)
+    if tombstones:
+        since_deleted = (tombstones[-1][1], tombstones[-1][0])
+
+    return {
+        "items": [registry["schema"].from_orm(item) for item in items],
+        "deleted": [id_registro for _, _, id_registro in tombstones],
+        "next_token": encode_sync_token(
+            [since_updated[0].isoformat(), since_updated[1]] if since_updated else None,
+            [since_deleted[0].isoformat(), since_deleted[1]] if since_deleted else None,
+        ),
+        "has_more": has_more,
+    }
+
 # --- Endpoint de Criação (POST) ---
-@router.post("/generic/{model_name}", response_model=Any)
+@router.post("/generic/{model_name}", response_model=Any, openapi_extra=JSON_BODY_OPENAPI)
 def create_item(
     model_name: str,
-    item_data: Dict[str, Any] = Body(...),
+    body: bytes = Depends(raw_body),
     db: Session = Depends(database.get_db),
     current_user: models.Usuario = Depends(get_current_active_user)
 ):
@@ -233,29 +428,17 @@ def create_item(
     if not registry:
         raise HTTPException(status_code=404, detail="Model not found")
 
-    try:
-        CreateSchema = registry["create_schema"]
-        validated_data = CreateSchema(**item_data)
-    except Exception as e:
-        raise HTTPException(status_code=422, detail=f"Validation error: {e}")
+    validated_data = validate_body(registry["validate_create_json"], body)
 
     try:
-        # 🎯 CORREÇÃO PARA HASH DE SENHA NA CRIAÇÃO
-        if model_name == "usuarios":
-            # 1. Chama a função específica que SABE fazer o hash da senha
-            item = crud_user.create_user(
-                db=db,
-                obj_in=validated_data,
-                id_empresa=current_user.id_empresa
-            )
-        else:
-            # 3. Para todos os outros modelos, usa o CRUD genérico
-            item = registry["crud"].create(
-                db,
-                model=registry["model"], # Passa o modelo
-                obj_in=validated_data,
-                id_empresa=current_user.id_empresa
-            )
+        # O registro aponta para o CRUD certo (ex: crud_user faz o hash da senha)
+        # e a criação é um único INSERT ... RETURNING
+        item = registry["crud"].create(
+            db,
+            model=registry["model"], # Passa o modelo
+            obj_in=validated_data,
+            id_empresa=current_user.id_empresa
+        )
     except IntegrityError as e:
         db.rollback()
         error_info = str(e.orig) if e.orig else str(e)
@@ -274,39 +457,85 @@ def create_item(
         
         raise HTTPException(status_code=400, detail=f"Erro de integridade de dados: {error_info}")
 
+    invalidation.notify_write(current_user.id_empresa, registry["model"].__tablename__, [item.id])
     return registry["schema"].from_orm(item)
 
 # --- Endpoint de Detalhe (GET by ID) ---
 @router.get("/generic/{model_name}/{id}", response_model=Any)
 def read_item(
+    request: Request,
     model_name: str,
     id: int,
     db: Session = Depends(database.get_db),
     current_user: models.Usuario = Depends(get_current_active_user)
 ):
-    """Busca um item específico pelo ID."""
+    """
+    Busca um item específico pelo ID.
+    Traz um ETag fraco da versão do registro ((id, atualizado_em) dele e dos aninhados):
+    com If-None-Match igual, responde 304 após só um SELECT de 'atualizado_em'.
+    """
     registry = get_registry_entry(model_name)
     if not registry:
         raise HTTPException(status_code=404, detail="Model not found")
-        
-    # CORREÇÃO: Chama a função crud_generic.get
-    item = registry["crud"].get(
-        db, 
-        model=registry["model"], # Passa o modelo
-        id=id, 
-        id_empresa=current_user.id_empresa
-    )
-    if not item:
-        raise HTTPException(status_code=404, detail="Item not found")
-        
-    return registry["schema"].from_orm(item)
+
+    model = registry["model"]
+    paths = registry["version_paths"]
+    cache_key = response_cache_key(registry, current_user.id_empresa, "item", id)
+
+    def load_item():
+        # CORREÇÃO: Chama a função crud_generic.get
+        item = registry["crud"].get(
+            db,
+            model=model, # Passa o modelo
+            id=id,
+            id_empresa=current_user.id_empresa
+        )
+        if not item:
+            raise HTTPException(status_code=404, detail="Item not found")
+        return item
+
+    if paths is None:  # modelo sem atualizado_em: sem ETag
+        return cached_response(cache_key, lambda: registry["schema"].from_orm(load_item()))
+
+    # Pré-checagem barata: sem carregar relacionamentos nem serializar
+    precheck_etag = None
+    if request.headers.get("if-none-match"):
+        version = crud_generic.get_version(
+            db, model=model, id=id, id_empresa=current_user.id_empresa, paths=paths
+        )
+        if version is None:
+            raise HTTPException(status_code=404, detail="Item not found")
+        precheck_etag = version_etag(id, version)
+        if etag_matches(request, precheck_etag):
+            return not_modified(precheck_etag)
+
+    def build_item():
+        item = load_item()
+        body = encode_json(registry["schema"].from_orm(item))
+        # ETag da versão efetivamente serializada (não da pré-checagem), par consistente no cache
+        return (body, version_etag(id, crud_generic.instance_version(item, paths)))
+
+    def should_cache(value) -> bool:
+        return len(value[0]) <= settings.RESPONSE_CACHE_MAX_BODY_BYTES
+
+    if not settings.RESPONSE_CACHE_ENABLED:
+        body, etag = build_item()
+    else:
+        body, etag = response_cache.get_or_compute(cache_key, build_item, should_cache=should_cache)
+        if precheck_etag is not None and etag != precheck_etag:
+            # O cache ficou atrás do banco (escrita em outro worker ainda não propagada):
+            # sem isso, o ETag antigo do cache casaria com o do cliente e daria 304 obsoleto
+            body, etag = build_item()
+            if should_cache((body, etag)):
+                response_cache.set(cache_key, (body, etag))
+    return cached_json_response(request, body, etag)
 
 # --- Endpoint de Atualização (PUT) ---
-@router.put("/generic/{model_name}/{id}", response_model=Any)
+@router.put("/generic/{model_name}/{id}", response_model=Any, openapi_extra=JSON_BODY_OPENAPI)
 def update_item(
     model_name: str,
     id: int,
-    item_data: Dict[str, Any] = Body(...),
+    body: bytes = Depends(raw_body),
     db: Session = Depends(database.get_db),
     current_user: models.Usuario = Depends(get_current_active_user)
 ):
@@ -315,39 +544,97 @@ def update_item(
     if not registry:
         raise HTTPException(status_code=404, detail="Model not found")
 
-    # Busca o objeto existente
-    db_obj = registry["crud"].get(
+    validated_data = validate_body(registry["validate_update_json"], body)
+
+    # UPDATE ... WHERE id AND id_empresa RETURNING * (sem GET prévio nem refresh).
+    # O crud_user, via registro, faz o hash da senha quando ela é alterada.
+    item = registry["crud"].update(
         db,
         model=registry["model"],
         id=id,
-        id_empresa=current_user.id_empresa
+        id_empresa=current_user.id_empresa,
+        obj_in=validated_data
     )
-    if not db_obj:
+    if not item:
         raise HTTPException(status_code=404, detail="Item not found")
 
-    try:
-        UpdateSchema = registry["update_schema"]
-        validated_data = UpdateSchema(**item_data)
-    except Exception as e:
-        raise HTTPException(status_code=422, detail=f"Validation error: {e}")
+    invalidation.notify_write(current_user.id_empresa, registry["model"].__tablename__, [id])
+    return registry["schema"].from_orm(item)
+
+# --- Endpoints de Atualização Parcial (PATCH) ---
+def _patch_values(registry: Dict[str, Any], validated_data: BaseModel) -> Dict[str, Any]:
+    """Mantém só as colunas enviadas pelo cliente (já validadas com o UpdateSchema)."""
+    values = crud_generic.column_values(
+        registry["model"], validated_data.model_dump(exclude_unset=True)
+    )
+    if not values:
+        raise HTTPException(status_code=400, detail="Nenhum campo válido para atualizar")
+    return values
+
+def _prefer_minimal(request: Request) -> bool:
+    return "return=minimal" in request.headers.get("prefer", "")
+
+@router.patch("/generic/{model_name}/{id}", response_model=Any, openapi_extra=JSON_BODY_OPENAPI)
+def patch_item(
+    model_name: str,
+    id: int,
+    request: Request,
+    body: bytes = Depends(raw_body),
+    db: Session = Depends(database.get_db),
+    current_user: models.Usuario = Depends(get_current_active_user)
+):
+    """
+    Atualiza apenas as colunas enviadas, em um único UPDATE ... RETURNING,
+    e devolve só o id e essas colunas (ou 204 com 'Prefer: return=minimal').
+    """
+    registry = get_registry_entry(model_name)
+    if not registry:
+        raise HTTPException(status_code=404, detail="Model not found")
 
-    # 🎯 CORREÇÃO PARA HASH DE SENHA NA ATUALIZAÇÃO
-    if model_name == "usuarios":
-        # 1. Chama a função específica que SABE fazer o hash da senha
-        item = crud_user.update_user(
-            db=db,
-            db_obj=db_obj,      # O objeto de usuário que já buscamos
-            obj_in=validated_data # Os dados validados (Pydantic schema)
+    values = _patch_values(registry, validate_body(registry["validate_update_json"], body))
+    try:
+        rows = registry["crud"].patch_values(
+            db, model=registry["model"], ids=[id], id_empresa=current_user.id_empresa, values=values
         )
-    else:
-        # 2. Para todos os outros modelos, usa o CRUD genérico
-        item = registry["crud"].update(
-            db,
-            db_obj=db_obj,
-            obj_in=validated_data
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not rows:
+        raise HTTPException(status_code=404, detail="Item not found")
+
+    invalidation.notify_write(current_user.id_empresa, registry["model"].__tablename__, [id])
+    if _prefer_minimal(request):
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    return rows[0]
+
+@router.patch("/generic/{model_name}", response_model=schemas.PatchLoteResultado)
+def patch_items(
+    model_name: str,
+    obj_in: schemas.PatchLote,
+    request: Request,
+    db: Session = Depends(database.get_db),
+    current_user: models.Usuario = Depends(get_current_active_user)
+):
+    """
+    PATCH em lote: aplica os mesmos valores a vários ids do tenant em um único comando
+    (ex: mover vários pedidos para uma nova 'situacao'). Ids inexistentes são ignorados.
+    """
+    registry = get_registry_entry(model_name)
+    if not registry:
+        raise HTTPException(status_code=404, detail="Model not found")
+
+    values = _patch_values(registry, validate_python(registry["update_schema"], obj_in.valores))
+    try:
+        rows = registry["crud"].patch_values(
+            db, model=registry["model"], ids=obj_in.ids, id_empresa=current_user.id_empresa, values=values
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    return registry["schema"].from_orm(item)
+    if rows:
+        invalidation.notify_write(current_user.id_empresa, registry["model"].__tablename__, [row["id"] for row in rows])
+    if _prefer_minimal(request):
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    return {"items": rows, "total_count": len(rows)}
 
 # --- Endpoint de Deleção (DELETE) ---
 @router.delete("/generic/{model_name}/{id}", response_model=Any)
@@ -371,5 +658,6 @@ def delete_item(
     )
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
-        
+
+    invalidation.notify_write(current_user.id_empresa, registry["model"].__tablename__, [id])
     return registry["schema"].from_orm(item)
@@ -0,0 +1,110 @@
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from typing import List
+
+from app.api.dependencies import get_current_active_user
+from app.api.v1 import filters
+from app.api.v1.model_dispatch import get_registry_entry
+from app.core.db import models, database, schemas
+from app.core.service.jobs import HANDLERS
+from app.crud import crud_job
+
+router = APIRouter()
+
+
+def _get_job_or_404(db: Session, id: int, id_empresa: int) -> models.Job:
+    job = crud_job.get_job(db, id=id, id_empresa=id_empresa)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/jobs", response_model=schemas.JobStatus, status_code=status.HTTP_202_ACCEPTED)
+def create_job(
+    job_in: schemas.JobRequest,
+    db: Session = Depends(database.get_db),
+    current_user: models.Usuario = Depends(get_current_active_user)
+):
+    """
+    Enfileira um job para o worker (python -m app.worker) e retorna na hora.
+    Acompanhe com GET /jobs/{id}; o arquivo gerado sai em GET /jobs/{id}/resultado.
+    Tipos: exportar_csv {model_name, search_term?, situacao?, filtros?}, reconstruir_saldos {}.
+    """
+    if job_in.tipo not in HANDLERS:
+        raise HTTPException(status_code=400, detail=f"Tipo de job inválido: {job_in.tipo}")
+    if job_in.tipo == "exportar_csv":
+        model_name = job_in.parametros.get("model_name")
+        registry = get_registry_entry(model_name) if model_name else None
+        if not registry:
+            raise HTTPException(status_code=404, detail="Model not found")
+        # Valida os filtros agora (400) em vez de o job falhar no worker
+        try:
+            filters.compile_filters(registry["model"], job_in.parametros.get("filtros") or {})
+        except filters.FilterError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    if job_in.tipo == "reconstruir_saldos" and current_user.perfil != models.UsuarioPerfilEnum.admin:
+        raise HTTPException(status_code=403, detail="Apenas administradores podem reconstruir saldos.")
+
+    return crud_job.enqueue(
+        db, tipo=job_in.tipo, parametros=job_in.parametros,
+        id_empresa=current_user.id_empresa, id_usuario=current_user.id
+    )
+
+
+@router.get("/jobs", response_model=List[schemas.JobStatus])
+def list_jobs(
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(database.get_db),
+    current_user: models.Usuario = Depends(get_current_active_user)
+):
+    """Jobs mais recentes da empresa."""
+    return crud_job.list_jobs(db, id_empresa=current_user.id_empresa, limit=limit)
+
+
+@router.get("/jobs/{id}", response_model=schemas.JobStatus)
+def read_job(
+    id: int,
+    db: Session = Depends(database.get_db),
+    current_user: models.Usuario = Depends(get_current_active_user)
+):
+    """Situação e progresso (0-100) do job."""
+    return _get_job_or_404(db, id, current_user.id_empresa)
+
+
+@router.post("/jobs/{id}/cancelar", response_model=schemas.JobStatus)
+def cancel_job(
+    id: int,
+    db: Session = Depends(database.get_db),
+    current_user: models.Usuario = Depends(get_current_active_user)
+):
+    """Pendentes são cancelados na hora; em execução, no próximo progresso reportado."""
+    job = crud_job.request_cancel(db, id=id, id_empresa=current_user.id_empresa)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{id}/resultado")
+def download_job_result(
+    id: int,
+    db: Session = Depends(database.get_db),
+    current_user: models.Usuario = Depends(get_current_active_user)
+):
+    """
+    Baixa o arquivo gerado pelo job. Suporta Range (206 Partial Content),
+    então downloads interrompidos podem ser retomados.
+    """
+    job = _get_job_or_404(db, id, current_user.id_empresa)
+    if job.situacao != models.JobSituacaoEnum.concluido or not job.resultado_arquivo:
+        raise HTTPException(status_code=409, detail="Job sem resultado disponível")
+    if not os.path.isfile(job.resultado_arquivo):
+        raise HTTPException(status_code=410, detail="Arquivo de resultado não está mais disponível")
+
+    return FileResponse(
+        job.resultado_arquivo,
+        media_type=job.resultado_tipo or "application/octet-stream",
+        filename=job.resultado_nome,
+    )
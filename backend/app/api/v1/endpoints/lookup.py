@@ -0,0 +1,101 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import case, func, literal, or_
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+
+from app.api.dependencies import get_current_active_user
+from app.api.v1.endpoints.generic import cached_response, response_cache_key
+from app.api.v1.model_dispatch import get_registry_entry
+from app.core.db import models, database, schemas
+from app.crud import crud_generic
+
+router = APIRouter()
+
+# Campos de código buscados por igualdade (ex: digitar o SKU ou o GTIN inteiro).
+# CPF/CNPJ, CEP e telefones são buscados só pelos dígitos (crud_generic.digit_search_conditions).
+EXACT_MATCH_FIELDS = ["sku", "gtin"]
+
+# Label composto por modelo (padrão: só o display_field do registro)
+LOOKUP_LABEL_FIELDS: Dict[str, List[str]] = {
+    "produtos": ["sku", "descricao"],
+}
+
+LOOKUP_DEFAULT_LIMIT = 20
+LOOKUP_MAX_LIMIT = 100
+LOOKUP_MAX_IDS = 200
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+@router.get("/lookup/{model_name}", response_model=List[schemas.LookupItem])
+def lookup(
+    model_name: str,
+    q: Optional[str] = Query(None, description="Texto digitado no select"),
+    ids: Optional[str] = Query(None, description="Resolve labels por id (ex: 3,7,12); ignora 'q'"),
+    situacao: Optional[str] = None,
+    limit: int = Query(LOOKUP_DEFAULT_LIMIT, ge=1, le=LOOKUP_MAX_LIMIT),
+    db: Session = Depends(database.get_db),
+    current_user: models.Usuario = Depends(get_current_active_user)
+):
+    """
+    Autocomplete dos selects de chave estrangeira: retorna apenas (id, label).
+    - q: códigos (SKU/GTIN exatos; CPF/CNPJ e telefones por prefixo dos dígitos), depois prefixo e, por fim,
+      trecho do campo de exibição (sem acento/maiúsculas, índice de trigramas).
+    - ids: labels de vários ids em uma chamada (valor inicial dos formulários).
+    Não conta o total nem serializa a linha inteira.
+    """
+    registry = get_registry_entry(model_name)
+    if not registry:
+        raise HTTPException(status_code=404, detail="Model not found")
+
+    model = registry["model"]
+    columns = model.__table__.columns
+    display_field = registry["display_field"]
+    label_fields = [f for f in LOOKUP_LABEL_FIELDS.get(model_name, [display_field]) if f in columns]
+    display = getattr(model, display_field)
+
+    id_list: List[int] = []
+    if ids:
+        try:
+            id_list = sorted({int(i) for i in ids.split(",") if i.strip()})
+        except ValueError:
+            raise HTTPException(status_code=400, detail="ids deve ser uma lista de inteiros")
+        if len(id_list) > LOOKUP_MAX_IDS:
+            raise HTTPException(status_code=400, detail=f"Informe no máximo {LOOKUP_MAX_IDS} ids")
+    term = (q or "").strip()
+
+    def build_lookup():
+        query = db.query(model.id, *(getattr(model, f) for f in label_fields)).filter(
+            model.id_empresa == current_user.id_empresa
+        )
+        if situacao and hasattr(model, "situacao"):
+            query = query.filter(model.situacao == situacao)
+
+        if id_list:
+            query = query.filter(model.id.in_(id_list)).order_by(model.id)
+        elif term:
+            normalized = func.f_unaccent(func.lower(display))
+            pattern = func.f_unaccent(func.lower(literal(_escape_like(term))))
+            exact = [getattr(model, f) == term for f in EXACT_MATCH_FIELDS if f in columns]
+            exact += crud_generic.digit_search_conditions(model, term) or []
+            prefix = normalized.like(pattern.concat("%"), escape="\\")
+            # Códigos exatos primeiro, depois quem começa com o termo
+            ranking = [(or_(*exact), 0)] if exact else []
+            ranking.append((prefix, 1))
+            query = query.filter(
+                or_(*exact, normalized.like(literal("%").concat(pattern).concat("%"), escape="\\"))
+            ).order_by(case(*ranking, else_=2), display, model.id).limit(limit)
+        else:
+            query = query.order_by(display, model.id).limit(limit)
+
+        return [
+            {"id": row[0], "label": " - ".join(str(v) for v in row[1:] if v not in (None, "")) or f"ID {row[0]}"}
+            for row in query.all()
+        ]
+
+    cache_key = response_cache_key(
+        registry, current_user.id_empresa, "lookup", term, tuple(id_list), situacao, limit
+    )
+    return cached_response(cache_key, build_lookup)
@@ -164,7 +164,8 @@ def get_model_metadata(model_name: str):
                 format_mask=format_mask,
                 tab=tab_name,
                 foreign_key_model=foreign_key_model,
-                foreign_key_label_field=foreign_key_label_field
+                foreign_key_label_field=foreign_key_label_field,
+                sortable=col.name in registry_entry["sortable_fields"]
             )
             fields.append(field)
             
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.api.dependencies import get_current_active_user
+from app.core.db import models, database, schemas
+from app.crud import crud_pedido
+from app.core.service import invalidation, invalidation_bus
+
+router = APIRouter()
+
+@router.post("/pedidos/{id}/programacao", response_model=schemas.ProgramacaoResponse)
+def programar_pedido(
+    id: int,
+    obj_in: schemas.ProgramacaoRequest,
+    db: Session = Depends(database.get_db),
+    current_user: models.Usuario = Depends(get_current_active_user)
+):
+    """
+    Programa um pedido em uma única transação.
+    - aplicar=false: apenas sugere a alocação dos lotes (FIFO por lote ou por local).
+    - aplicar=true: trava o pedido e os lotes (SKIP LOCKED), baixa o estoque,
+      grava as retiradas nos itens e envia o pedido para Produção.
+    """
+    pedido = crud_pedido.get_pedido(
+        db, id=id, id_empresa=current_user.id_empresa, bloquear=obj_in.aplicar
+    )
+    if not pedido:
+        raise HTTPException(status_code=404, detail="Item not found")
+
+    try:
+        resultado = crud_pedido.programar(
+            db, pedido=pedido, obj_in=obj_in, id_empresa=current_user.id_empresa
+        )
+        if obj_in.aplicar:
+            invalidation_bus.publish(
+                db, id_empresa=current_user.id_empresa, table_name=models.Pedido.__tablename__, ids=[id]
+            )
+            invalidation_bus.publish(db, id_empresa=current_user.id_empresa, table_name=models.Estoque.__tablename__)
+            db.commit()
+            invalidation.notify_write(current_user.id_empresa, models.Pedido.__tablename__, [id])
+            invalidation.notify_write(current_user.id_empresa, models.Estoque.__tablename__)
+        else:
+            db.rollback()
+    except (crud_pedido.LoteIndisponivelError, crud_pedido.PedidoNaoProgramavelError) as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return resultado
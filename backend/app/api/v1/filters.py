@@ -0,0 +1,142 @@
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import Boolean, Date, DateTime, Integer, JSON, Numeric, String, Enum as SQLAlchemyEnum
+from sqlalchemy.sql.elements import ColumnElement
+
+# Filtros estruturados da listagem/exportação:
+#   ?filter[data_emissao][gte]=2025-01-01&filter[id_cliente][eq]=7&filter[total][gt]=1000
+#   ?filter[situacao][in]=Orçamento,Aprovado   ?filter[observacao][isnull]=true
+#   ?filter[id_cliente]=7   (sem operador = eq)
+# Cada valor é convertido para o tipo da coluna (int, Decimal, data, enum...) e vira
+# um predicado simples (col >= :v, col IN (...)), que o Postgres resolve pelos índices,
+# ao contrário do search_term (unaccent + ILIKE em todas as colunas).
+
+FILTER_PARAM = re.compile(r"^filter\[(\w+)\](?:\[(\w+)\])?$")
+
+# Operadores aceitos por família de tipo
+ORDERED_OPERATORS = {"eq", "ne", "gt", "gte", "lt", "lte", "in", "isnull"}
+EQUALITY_OPERATORS = {"eq", "ne", "in", "isnull"}
+
+MAX_IN_VALUES = 100
+MAX_FILTERS = 20
+
+# Nunca filtráveis (vazariam informação por busca binária)
+HIDDEN_FIELDS = {"senha", "hashed_password"}
+
+# Especificação interna: {campo: {operador: valor bruto}}; também é o formato
+# de 'parametros.filtros' dos jobs de exportação.
+FilterSpec = Dict[str, Dict[str, Any]]
+
+
+class FilterError(ValueError):
+    """Filtro inválido (campo, operador ou valor); os endpoints respondem 400."""
+
+
+def parse_filter_params(items: List[Tuple[str, str]]) -> FilterSpec:
+    """Extrai os parâmetros filter[campo][op] da query string (request.query_params.multi_items())."""
+    spec: FilterSpec = {}
+    for key, value in items:
+        match = FILTER_PARAM.match(key)
+        if not match:
+            continue
+        field, op = match.group(1), match.group(2) or "eq"
+        spec.setdefault(field, {})[op] = value
+    return spec
+
+
+def cache_key(spec: FilterSpec) -> tuple:
+    """Representação ordenada e hashable do filtro (parte da chave do cache de respostas)."""
+    return tuple(sorted((field, op, str(value)) for field, ops in spec.items() for op, value in ops.items()))
+
+
+def _coerce_bool(raw: Any) -> bool:
+    if isinstance(raw, bool):
+        return raw
+    value = str(raw).strip().lower()
+    if value in ("true", "1", "sim"):
+        return True
+    if value in ("false", "0", "nao", "não"):
+        return False
+    raise ValueError(raw)
+
+
+def _coercer(column) -> Tuple[Any, set]:
+    """Conversor de valor e operadores permitidos para o tipo da coluna."""
+    col_type = column.type
+    # Enum herda de String: precisa vir antes
+    if isinstance(col_type, SQLAlchemyEnum):
+        enum_class = col_type.enum_class
+        if enum_class is not None:
+            return (lambda raw: enum_class(raw)), EQUALITY_OPERATORS
+        return (lambda raw: col_type.enums[col_type.enums.index(raw)]), EQUALITY_OPERATORS
+    if isinstance(col_type, JSON):
+        return None, set()
+    if isinstance(col_type, Boolean):
+        return _coerce_bool, EQUALITY_OPERATORS
+    if isinstance(col_type, Integer):
+        return int, ORDERED_OPERATORS
+    if isinstance(col_type, Numeric):
+        return (lambda raw: Decimal(str(raw))), ORDERED_OPERATORS
+    if isinstance(col_type, DateTime):
+        return (lambda raw: raw if isinstance(raw, datetime) else datetime.fromisoformat(str(raw))), ORDERED_OPERATORS
+    if isinstance(col_type, Date):
+        return (lambda raw: raw if isinstance(raw, date) else date.fromisoformat(str(raw))), ORDERED_OPERATORS
+    if isinstance(col_type, String):
+        return str, ORDERED_OPERATORS
+    return None, set()
+
+
+def compile_filters(model: Any, spec: FilterSpec) -> List[ColumnElement]:
+    """
+    Valida o filtro contra as colunas/tipos do modelo e devolve os predicados SQL.
+    Levanta FilterError com uma mensagem legível no primeiro problema encontrado.
+    """
+    predicates: List[ColumnElement] = []
+    if sum(len(ops) for ops in spec.values()) > MAX_FILTERS:
+        raise FilterError(f"Use no máximo {MAX_FILTERS} filtros")
+
+    columns = model.__table__.columns
+    for field, ops in spec.items():
+        if field not in columns or field in HIDDEN_FIELDS or field == "id_empresa":
+            raise FilterError(f"Campo não filtrável: {field}")
+        column = getattr(model, field)
+        coerce, allowed = _coercer(columns[field])
+        if coerce is None:
+            raise FilterError(f"Campo não filtrável: {field}")
+
+        for op, raw in ops.items():
+            if op not in allowed:
+                raise FilterError(f"Operador '{op}' inválido para {field}")
+            try:
+                if op == "isnull":
+                    predicates.append(column.is_(None) if _coerce_bool(raw) else column.is_not(None))
+                    continue
+                if op == "in":
+                    raw_values = raw if isinstance(raw, list) else str(raw).split(",")
+                    if not raw_values or len(raw_values) > MAX_IN_VALUES:
+                        raise FilterError(f"'in' aceita de 1 a {MAX_IN_VALUES} valores ({field})")
+                    predicates.append(column.in_([coerce(v.strip() if isinstance(v, str) else v) for v in raw_values]))
+                    continue
+                value = coerce(raw)
+            except FilterError:
+                raise
+            except (ValueError, TypeError, InvalidOperation):
+                raise FilterError(f"Valor inválido para {field}: {raw!r}")
+
+            if op == "eq":
+                predicates.append(column == value)
+            elif op == "ne":
+                predicates.append(column != value)
+            elif op == "gt":
+                predicates.append(column > value)
+            elif op == "gte":
+                predicates.append(column >= value)
+            elif op == "lt":
+                predicates.append(column < value)
+            elif op == "lte":
+                predicates.append(column <= value)
+
+    return predicates
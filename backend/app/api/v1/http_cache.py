@@ -0,0 +1,43 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+# 'no-cache' obriga o navegador a revalidar (If-None-Match) antes de reutilizar;
+# 'private' porque as respostas dependem do usuário/tenant autenticado.
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(body: bytes, weak: bool = False) -> str:
+    """ETag a partir do corpo já serializado."""
+    digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Compara o If-None-Match do cliente com o ETag atual (comparação fraca)."""
+    header: Optional[str] = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    atual = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == atual for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
+
+
+def cached_json_response(request: Request, body: bytes, etag: str) -> Response:
+    """Responde 304 se o cliente já tem a versão atual; senão envia o JSON com o ETag."""
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
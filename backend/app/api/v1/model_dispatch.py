@@ -1,8 +1,62 @@
 import app.core.db.models as models
 import app.core.db.schemas as schemas
 from app.crud import crud_generic, crud_user
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from sqlalchemy import UniqueConstraint, inspect
+from sqlalchemy.orm import MANYTOONE
+from typing import Dict, Any, Iterator, Optional, Tuple
 
+# Profundidade máxima dos schemas aninhados (ex: Estoque -> Produto -> Embalagem)
+MAX_NESTING_DEPTH = 3
+
+def _nested_relationships(model_class, schema_class, prefix: Tuple[str, ...] = ()) -> Iterator[Tuple[Tuple[str, ...], Any]]:
+    """
+    (caminho, relacionamento) de cada relacionamento que aparece no schema de leitura,
+    em qualquer profundidade, pais antes dos filhos. Ex: Estoque -> ("produto",),
+    ("produto", "embalagem"), ("produto", "fornecedor").
+    """
+    if len(prefix) >= MAX_NESTING_DEPTH or schema_class is None:
+        return
+    for rel in inspect(model_class).relationships:
+        if rel.key not in schema_class.model_fields:
+            continue
+        path = prefix + (rel.key,)
+        yield path, rel
+        # Schema aninhado segue a convenção de nome do modelo (ex: Produto -> schemas.Produto)
+        target = rel.mapper.class_
+        yield from _nested_relationships(target, getattr(schemas, target.__name__, None), path)
+
+def _version_paths(model_class, schema_class) -> Tuple[Tuple[str, ...], ...]:
+    """
+    Caminhos many-to-one (todos os saltos) com 'atualizado_em': o de cada um entra
+    na versão do registro (ETag do GET por id).
+    """
+    paths = []
+    for path, rel in _nested_relationships(model_class, schema_class):
+        if len(path) > 1 and path[:-1] not in paths:
+            continue
+        if rel.direction is MANYTOONE and hasattr(rel.mapper.class_, "atualizado_em"):
+            paths.append(path)
+    return tuple(paths)
+
+def _dependent_tables(model_class, schema_class) -> Tuple[str, ...]:
+    """
+    Tabelas cujo conteúdo aparece na resposta do modelo: a própria, as referenciadas
+    por FK e as de todos os schemas aninhados (ex: Estoque -> produtos, embalagens e
+    cadastros do fornecedor). Usadas na chave dos caches de resposta (gerações de escrita).
+    """
+    tables = [model_class.__tablename__]
+    for column in model_class.__table__.columns:
+        for fk in column.foreign_keys:
+            tables.append(fk.column.table.name)
+    for _, rel in _nested_relationships(model_class, schema_class):
+        tables.append(rel.mapper.class_.__tablename__)
+    return tuple(dict.fromkeys(tables))
+
+
+# O registro é derivado só do nome (convenção), então é montado uma vez por modelo
+# e reaproveitado. Tamanho limitado porque 'model_name' vem da URL.
+@lru_cache(maxsize=256)
 def get_registry_entry(model_name: str) -> Optional[Dict[str, Any]]:
     """
     Busca (ou constrói dinamicamente) a entrada de registro para
@@ -121,6 +175,21 @@ def get_registry_entry(model_name: str) -> Optional[Dict[str, Any]]:
         if display_field is None:
             display_field = "id" 
         
+        # Colunas aceitas no order_by da listagem: só as que lideram um índice, sozinhas
+        # ou logo após id_empresa (ex: (id_empresa, grupo)), então a ordenação caminha
+        # pelo índice em vez de ordenar o tenant inteiro.
+        sortable_fields = {"id"}
+        indexed = list(model_class.__table__.indexes) + [
+            c for c in model_class.__table__.constraints if isinstance(c, UniqueConstraint)
+        ]
+        for index in indexed:
+            index_columns = [c.name for c in index.columns]
+            if index_columns[:1] == ["id_empresa"]:
+                index_columns = index_columns[1:]
+            if index_columns:
+                sortable_fields.add(index_columns[0])
+        sortable_fields.discard("id_empresa")
+
         # 🎯 3. LÓGICA PARA DETERMINAR O CRUD (CORRIGINDO O BUG)
         crud_service = crud_generic
         if model_name == "usuarios":
@@ -132,7 +201,14 @@ def get_registry_entry(model_name: str) -> Optional[Dict[str, Any]]:
             "schema": schema_class,
             "create_schema": create_schema_class,
             "update_schema": update_schema_class,
+            # Validadores do pydantic-core (compilados na criação da classe), aplicados
+            # direto sobre os bytes do corpo: sem json.loads + dict + Schema(**dados).
+            "validate_create_json": create_schema_class.model_validate_json,
+            "validate_update_json": update_schema_class.model_validate_json,
             "crud": crud_service,
+            "dependent_tables": _dependent_tables(model_class, schema_class),
+            "sortable_fields": frozenset(sortable_fields),
+            "version_paths": _version_paths(model_class, schema_class) if hasattr(model_class, "atualizado_em") else None,
             "display_name": display_name,
             "display_name_singular": display_name_singular,
             "display_name_plural": display_name_plural,
@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import PostgresDsn, validator
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 class Settings(BaseSettings):
     # Carrega as variáveis do .env
@@ -30,6 +30,90 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 # 24 horas
 
+    # Validade do ticket do stream SSE (POST /events/ticket). O stream é encerrado quando
+    # o ticket vence e o cliente abre outro com um ticket novo: usuário desativado ou
+    # login vencido perde o stream em até este tempo.
+    EVENTS_TICKET_SECONDS: int = 300
+
+    # Endpoints de operação (GET /metrics, GET /api/v1/admin/caches): com token, exigem
+    # "Authorization: Bearer <token>" (configure o mesmo no Prometheus); sem token,
+    # só atendem conexões do próprio host.
+    METRICS_TOKEN: Optional[str] = None
+
+    # Log de queries lentas (opt-in). EXPLAIN (ANALYZE, BUFFERS) roda só em
+    # uma amostra das queries lentas, pois executa a query novamente.
+    SLOW_QUERY_LOG_ENABLED: bool = False
+    SLOW_QUERY_THRESHOLD_MS: int = 500
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.1
+    SLOW_QUERY_BUFFER_SIZE: int = 200
+
+    # Backend dos caches (app/core/service/cache.py): "local" (LRU por worker,
+    # limitado em entradas e bytes) ou "redis" (compartilhado; requer o pacote redis).
+    CACHE_BACKEND: str = "local"
+    CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    CACHE_LOCAL_MAXSIZE: int = 8192
+    CACHE_LOCAL_MAX_BYTES: int = 64 * 1024 * 1024
+
+    # Cache de respostas dos GETs genéricos. A chave inclui a geração de escrita
+    # do (tenant, modelo), então a invalidação é exata; o TTL só limita o atraso
+    # quando a escrita acontece em outro worker.
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL: int = 30
+    RESPONSE_CACHE_MAX_BODY_BYTES: int = 1024 * 1024
+
+    # Delta-sync (GET /generic/{model}/changes) e catálogo: só entregam mudanças
+    # anteriores ao início da transação aberta mais antiga que já escreveu e com pelo
+    # menos este atraso (ver crud_generic.changes_horizon).
+    CHANGES_SAFETY_LAG_SECONDS: int = 5
+    CHANGES_MAX_LIMIT: int = 1000
+
+    # Barramento de invalidação entre workers (Postgres LISTEN/NOTIFY).
+    INVALIDATION_BUS_ENABLED: bool = True
+    INVALIDATION_CHANNEL: str = "integrai_invalidation"
+
+    # Catálogo de produtos em memória (GET /catalogo), por worker
+    CATALOG_MAX_TENANTS: int = 100
+    CATALOG_REFRESH_SECONDS: int = 60
+
+    # Jobs em segundo plano (python -m app.worker). Os arquivos de resultado ficam
+    # em JOBS_RESULT_DIR, que precisa ser compartilhado entre a API e o worker.
+    JOBS_RESULT_DIR: str = "job_results"
+    JOBS_POLL_SECONDS: float = 2.0
+    JOBS_HEARTBEAT_SECONDS: int = 30
+    JOBS_STALE_SECONDS: int = 300
+    JOBS_MAX_TENTATIVAS: int = 3
+
+    # Compressão das respostas (app/core/middleware/compression.py): gzip sempre;
+    # br e zstd quando os pacotes opcionais 'brotli' / 'zstandard' estão instalados.
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_CONTENT_TYPES: List[str] = [
+        "application/json", "text/csv", "text/plain", "text/html", "application/javascript", "text/css",
+    ]
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    # Corpos já comprimidos (por hash do conteúdo), por worker
+    COMPRESSION_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+
+    # Controle de admissão (app/core/middleware/admission.py): requisições simultâneas
+    # por classe de endpoint (lookup, read, write, export, dashboard), por tenant e no worker.
+    # Classe ausente = sem limite. Acima do limite a requisição espera na fila até
+    # ADMISSION_QUEUE_TIMEOUT_SECONDS; depois disso (ou com a fila cheia) recebe 429.
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_TENANT_LIMITS: Dict[str, int] = {"lookup": 16, "read": 16, "write": 8, "export": 1, "dashboard": 2}
+    ADMISSION_GLOBAL_LIMITS: Dict[str, int] = {"export": 3, "dashboard": 6}
+    ADMISSION_MAX_WAITING: int = 32
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 5.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = 5
+
+    # statement_timeout (ms) das queries das requisições HTTP, por classe de endpoint
+    # (ver app/core/middleware/query_guard.py). Classe ausente ou 0 = sem limite.
+    # Os jobs do worker não têm limite.
+    STATEMENT_TIMEOUTS_MS: Dict[str, int] = {
+        "lookup": 2000, "read": 15000, "write": 30000, "dashboard": 60000, "export": 300000,
+    }
+
     # Configuração para o Pydantic ler o arquivo .env (sintaxe Pydantic V2)
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
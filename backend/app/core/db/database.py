@@ -2,10 +2,21 @@ from sqlalchemy import create_engine
 # Importa o 'DeclarativeBase' (classe) e sessionmaker
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from app.core.config import settings
+from app.core.service.metrics import InstrumentedQueuePool, instrument_engine
+from app.core.service import profiler, query_guard
 
 # SQLAlchemy's create_engine expects a string, so we must convert the Pydantic DSN object.
-engine = create_engine(str(settings.DATABASE_URL))
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = create_engine(str(settings.DATABASE_URL), poolclass=InstrumentedQueuePool)
+# Contagem/tempo de SQL por requisição (ver app/core/middleware/metrics.py)
+instrument_engine(engine)
+# Log de queries lentas + EXPLAIN amostrado (opt-in, ver SLOW_QUERY_* no config)
+if settings.SLOW_QUERY_LOG_ENABLED:
+    profiler.instrument_engine(engine)
+# expire_on_commit=False: as escritas usam RETURNING, então o objeto já está completo
+# após o COMMIT e não precisa ser recarregado (db.refresh) para serializar a resposta.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+# statement_timeout e cancelamento na desconexão do cliente (só sessões do get_db)
+query_guard.install(SessionLocal, engine)
 
 # Nós importamos 'DeclarativeBase' e herdamos dela.
 class Base(DeclarativeBase):
@@ -13,6 +24,10 @@ class Base(DeclarativeBase):
 
 def get_db():
     db = SessionLocal()
+    # QueryGuard da requisição (QueryGuardMiddleware): o contexto é copiado para a threadpool
+    guard = query_guard.current_guard.get()
+    if guard is not None:
+        db.info["query_guard"] = guard
     try:
         yield db
     finally:
@@ -1,13 +1,36 @@
 import enum
 from sqlalchemy import (
     Boolean, Column, ForeignKey, Integer, String, Enum as SQLAlchemyEnum,
-    DateTime, Numeric, JSON, Text, Date
+    DateTime, Numeric, JSON, Text, Date, Index, event, text
 )
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.sql import func
+from sqlalchemy.sql.expression import FunctionElement
 from .database import Base
 
+
+class clock_timestamp(FunctionElement):
+    """
+    Carimbo de 'atualizado_em'/'excluido_em': o relógio no momento do comando no
+    Postgres (clock_timestamp()), e não o início da transação (now()). Assim uma
+    transação que passou muito tempo só lendo não grava carimbos antigos
+    (ver crud_generic.changes_horizon). Nos demais bancos, CURRENT_TIMESTAMP.
+    """
+    type = DateTime(timezone=True)
+    inherit_cache = True
+
+
+@compiles(clock_timestamp)
+def _clock_timestamp_default(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(clock_timestamp, "postgresql")
+def _clock_timestamp_postgresql(element, compiler, **kw):
+    return "clock_timestamp()"
+
 # --- Definição de Enums ---
 # (Centralizando todos os Enums definidos nas planilhas)
 
@@ -126,6 +149,14 @@ class RegraLocalizacaoDestinoEnum(str, enum.Enum):
     interestadual = "Interestadual"
     exterior = "Exterior"
 
+# Para Job (tarefas em segundo plano)
+class JobSituacaoEnum(str, enum.Enum):
+    pendente = "pendente"
+    executando = "executando"
+    concluido = "concluido"
+    erro = "erro"
+    cancelado = "cancelado"
+
 
 # --- Tipos Customizados ---
 class Currency(Numeric):
@@ -185,7 +216,7 @@ class Empresa(Base):
 
     # Campos Internos
     criado_em = Column(DateTime(timezone=True), server_default=func.now())
-    atualizado_em = Column(DateTime(timezone=True), onupdate=func.now())
+    atualizado_em = Column(DateTime(timezone=True), server_default=clock_timestamp(), onupdate=clock_timestamp())
 
     @hybrid_property
     def id_empresa(self):
@@ -228,7 +259,7 @@ class Usuario(Base):
 
     # Campos Internos
     criado_em = Column(DateTime(timezone=True), server_default=func.now())
-    atualizado_em = Column(DateTime(timezone=True), onupdate=func.now())
+    atualizado_em = Column(DateTime(timezone=True), server_default=clock_timestamp(), onupdate=clock_timestamp())
 
     # Chave estrangeira para o multi-tenancy
     id_empresa = Column(Integer, ForeignKey("empresas.id"), nullable=False)
@@ -293,7 +324,7 @@ class Cadastro(Base):
     
     # --- Campos Internos (sem aba) ---
     criado_em = Column(DateTime(timezone=True), server_default=func.now())
-    atualizado_em = Column(DateTime(timezone=True), onupdate=func.now())
+    atualizado_em = Column(DateTime(timezone=True), server_default=clock_timestamp(), onupdate=clock_timestamp())
 
     # Chave estrangeira para o multi-tenancy
     id_empresa = Column(Integer, ForeignKey("empresas.id"), nullable=False)
@@ -329,7 +360,7 @@ class Embalagem(Base):
 
     # Campos Internos
     criado_em = Column(DateTime(timezone=True), server_default=func.now())
-    atualizado_em = Column(DateTime(timezone=True), onupdate=func.now())
+    atualizado_em = Column(DateTime(timezone=True), server_default=clock_timestamp(), onupdate=clock_timestamp())
 
     # Chave estrangeira para o multi-tenancy
     id_empresa = Column(Integer, ForeignKey("empresas.id"), nullable=False)
@@ -410,7 +441,7 @@ class Produto(Base):
     
     # Campos Internos
     criado_em = Column(DateTime(timezone=True), server_default=func.now())
-    atualizado_em = Column(DateTime(timezone=True), onupdate=func.now())
+    atualizado_em = Column(DateTime(timezone=True), server_default=clock_timestamp(), onupdate=clock_timestamp())
 
     # Chaves Estrangeiras (id_empresa é interno)
     id_empresa = Column(Integer, ForeignKey("empresas.id"), nullable=False)
@@ -423,6 +454,16 @@ class Produto(Base):
     # Relacionamento (One-to-Many)
     estoques = relationship("Estoque", back_populates="produto")
 
+    # Índices (id_empresa, campo) para os valores distintos dos selects de categorização
+    __table_args__ = (
+        Index("ix_produtos_empresa_grupo", "id_empresa", "grupo"),
+        Index("ix_produtos_empresa_subgrupo1", "id_empresa", "subgrupo1"),
+        Index("ix_produtos_empresa_subgrupo2", "id_empresa", "subgrupo2"),
+        Index("ix_produtos_empresa_subgrupo3", "id_empresa", "subgrupo3"),
+        Index("ix_produtos_empresa_subgrupo4", "id_empresa", "subgrupo4"),
+        Index("ix_produtos_empresa_subgrupo5", "id_empresa", "subgrupo5"),
+    )
+
 
 class Conta(Base):
     """
@@ -468,7 +509,7 @@ class Conta(Base):
 
     # Campos Internos
     criado_em = Column(DateTime(timezone=True), server_default=func.now())
-    atualizado_em = Column(DateTime(timezone=True), onupdate=func.now())
+    atualizado_em = Column(DateTime(timezone=True), server_default=clock_timestamp(), onupdate=clock_timestamp())
 
     # Chaves Estrangeiras
     id_empresa = Column(Integer, ForeignKey("empresas.id"), nullable=False)
@@ -477,6 +518,13 @@ class Conta(Base):
     empresa = relationship("Empresa", back_populates="contas")
     fornecedor = relationship("Cadastro", back_populates="contas_como_fornecedor", foreign_keys=[id_fornecedor])
 
+    # Índices (id_empresa, campo) para os valores distintos dos creatable_select
+    __table_args__ = (
+        Index("ix_contas_empresa_plano_contas", "id_empresa", "plano_contas"),
+        Index("ix_contas_empresa_caixa_destino_origem", "id_empresa", "caixa_destino_origem"),
+        Index("ix_contas_empresa_pagamento", "id_empresa", "pagamento"),
+    )
+
 
 class Estoque(Base):
     """
@@ -508,7 +556,7 @@ class Estoque(Base):
     
     # Campos Internos
     criado_em = Column(DateTime(timezone=True), server_default=func.now())
-    atualizado_em = Column(DateTime(timezone=True), onupdate=func.now())
+    atualizado_em = Column(DateTime(timezone=True), server_default=clock_timestamp(), onupdate=clock_timestamp())
 
     # Chaves Estrangeiras
     id_empresa = Column(Integer, ForeignKey("empresas.id"), nullable=False)
@@ -517,6 +565,14 @@ class Estoque(Base):
     empresa = relationship("Empresa", back_populates="estoques")
     produto = relationship("Produto", back_populates="estoques")
 
+    # Índices (id_empresa, campo) para os valores distintos dos creatable_select
+    __table_args__ = (
+        Index("ix_estoque_empresa_deposito", "id_empresa", "deposito"),
+        Index("ix_estoque_empresa_rua", "id_empresa", "rua"),
+        Index("ix_estoque_empresa_nivel", "id_empresa", "nivel"),
+        Index("ix_estoque_empresa_cor", "id_empresa", "cor"),
+    )
+
 
 class Pedido(Base):
     """
@@ -609,7 +665,7 @@ class Pedido(Base):
     
     # Campos Internos
     criado_em = Column(DateTime(timezone=True), server_default=func.now())
-    atualizado_em = Column(DateTime(timezone=True), onupdate=func.now())
+    atualizado_em = Column(DateTime(timezone=True), server_default=clock_timestamp(), onupdate=clock_timestamp())
 
     # Chave Estrangeira
     id_empresa = Column(Integer, ForeignKey("empresas.id"), nullable=False)
@@ -620,6 +676,12 @@ class Pedido(Base):
     vendedor = relationship("Cadastro", back_populates="pedidos_como_vendedor", foreign_keys=[id_vendedor])
     transportadora = relationship("Cadastro", back_populates="pedidos_como_transportadora", foreign_keys=[id_transportadora])
 
+    # Índices (id_empresa, campo) para os valores distintos dos creatable_select
+    __table_args__ = (
+        Index("ix_pedidos_empresa_origem_venda", "id_empresa", "origem_venda"),
+        Index("ix_pedidos_empresa_pagamento", "id_empresa", "pagamento"),
+    )
+
 
 class Tributacao(Base):
     """
@@ -653,10 +715,220 @@ class Tributacao(Base):
     
     # Campos Internos
     criado_em = Column(DateTime(timezone=True), server_default=func.now())
-    atualizado_em = Column(DateTime(timezone=True), onupdate=func.now())
+    atualizado_em = Column(DateTime(timezone=True), server_default=clock_timestamp(), onupdate=clock_timestamp())
 
     # Chave Estrangeira
     id_empresa = Column(Integer, ForeignKey("empresas.id"), nullable=False)
 
     # Relacionamento (Many-to-One)
-    empresa = relationship("Empresa", back_populates="regras_tributarias")
\ No newline at end of file
+    empresa = relationship("Empresa", back_populates="regras_tributarias")
+
+
+class SaldoEstoque(Base):
+    """
+    Saldo materializado de estoque por (empresa, produto, situação).
+    Mantido pelo trigger 'trg_saldo_estoque' a cada escrita em 'estoque',
+    na mesma transação. Não é exposto pelo CRUD genérico (somente leitura).
+    """
+    __tablename__ = "saldo_estoque"
+
+    id_empresa = Column(Integer, ForeignKey("empresas.id"), primary_key=True)
+    # Linhas zeradas permanecem (o alerta de estoque baixo mostra o produto esgotado);
+    # saem junto com o produto
+    id_produto = Column(Integer, ForeignKey("produtos.id", ondelete="CASCADE"), primary_key=True)
+    situacao = Column(SQLAlchemyEnum(EstoqueSituacaoEnum, native_enum=False), primary_key=True)
+    quantidade = Column(Integer, nullable=False, default=0)
+
+    atualizado_em = Column(DateTime(timezone=True), server_default=clock_timestamp(), onupdate=clock_timestamp())
+
+    # Atende o alerta de estoque baixo (id_empresa = ? AND situacao = ? AND quantidade < ?)
+    __table_args__ = (
+        Index("ix_saldo_estoque_empresa_situacao_quantidade", "id_empresa", "situacao", "quantidade"),
+    )
+
+    produto = relationship("Produto")
+
+
+class Job(Base):
+    """
+    Fila de tarefas em segundo plano (exportações, reconstruções...).
+    Consumida pelo worker (python -m app.worker) com SELECT ... FOR UPDATE SKIP LOCKED.
+    Não é exposta pelo CRUD genérico (ver /jobs).
+    """
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    tipo = Column(String(50), nullable=False)
+    parametros = Column(JSON, nullable=False, default=dict)
+    situacao = Column(SQLAlchemyEnum(JobSituacaoEnum, native_enum=False), nullable=False, default=JobSituacaoEnum.pendente)
+    progresso = Column(Integer, nullable=False, default=0)
+    mensagem = Column(String, nullable=True)
+    cancelar = Column(Boolean, nullable=False, default=False)
+    tentativas = Column(Integer, nullable=False, default=0)
+    worker = Column(String(100), nullable=True)
+
+    # Arquivo de resultado (ex: CSV exportado), gravado em JOBS_RESULT_DIR
+    resultado_arquivo = Column(String, nullable=True)
+    resultado_nome = Column(String, nullable=True)
+    resultado_tipo = Column(String(100), nullable=True)
+
+    criado_em = Column(DateTime(timezone=True), server_default=func.now())
+    iniciado_em = Column(DateTime(timezone=True), nullable=True)
+    finalizado_em = Column(DateTime(timezone=True), nullable=True)
+    # Também serve de heartbeat: o worker atualiza a cada progresso
+    atualizado_em = Column(DateTime(timezone=True), server_default=clock_timestamp(), onupdate=clock_timestamp())
+
+    id_empresa = Column(Integer, ForeignKey("empresas.id"), nullable=False)
+    id_usuario = Column(Integer, ForeignKey("usuarios.id"), nullable=True)
+
+    # Atende a fila (situacao = 'pendente' ORDER BY id) e a busca de jobs travados
+    __table_args__ = (
+        Index("ix_jobs_situacao_id", "situacao", "id"),
+        Index("ix_jobs_empresa_id", "id_empresa", "id"),
+    )
+
+
+class Exclusao(Base):
+    """
+    Tombstones: registra cada exclusão feita pelo CRUD genérico para que o
+    delta-sync (GET /generic/{model}/changes) informe os ids removidos.
+    Não é exposto pelo CRUD genérico.
+    """
+    __tablename__ = "exclusoes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    id_empresa = Column(Integer, ForeignKey("empresas.id"), nullable=False)
+    tabela = Column(String(64), nullable=False)
+    id_registro = Column(Integer, nullable=False)
+    excluido_em = Column(DateTime(timezone=True), server_default=clock_timestamp(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_exclusoes_empresa_tabela_excluido_em", "id_empresa", "tabela", "excluido_em", "id"),
+    )
+
+
+# --- Índices do delta-sync ---
+# (id_empresa, atualizado_em, id) atende 'WHERE id_empresa = ? AND (atualizado_em, id) > (?, ?)
+# ORDER BY atualizado_em, id LIMIT n': o custo é proporcional às mudanças, não à tabela.
+# 'atualizado_em' tem server_default clock_timestamp(), então inserções também entram no índice.
+DELTA_SYNC_MODELS = (Usuario, Cadastro, Embalagem, Produto, Conta, Estoque, Pedido, Tributacao)
+
+for _model in DELTA_SYNC_MODELS:
+    _table = _model.__table__
+    Index(
+        f"ix_{_table.name}_empresa_atualizado_em",
+        _table.c.id_empresa, _table.c.atualizado_em, _table.c.id,
+    )
+
+
+# --- Triggers (PostgreSQL) ---
+
+# Aplica em 'saldo_estoque' o delta de cada INSERT/UPDATE/DELETE em 'estoque'.
+SALDO_ESTOQUE_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION fn_saldo_estoque() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND NEW.id_empresa = OLD.id_empresa
+       AND NEW.id_produto = OLD.id_produto
+       AND NEW.situacao = OLD.situacao
+       AND NEW.quantidade = OLD.quantidade THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO saldo_estoque (id_empresa, id_produto, situacao, quantidade, atualizado_em)
+        VALUES (OLD.id_empresa, OLD.id_produto, OLD.situacao, -OLD.quantidade, clock_timestamp())
+        ON CONFLICT (id_empresa, id_produto, situacao)
+        DO UPDATE SET quantidade = saldo_estoque.quantidade + EXCLUDED.quantidade, atualizado_em = clock_timestamp();
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO saldo_estoque (id_empresa, id_produto, situacao, quantidade, atualizado_em)
+        VALUES (NEW.id_empresa, NEW.id_produto, NEW.situacao, NEW.quantidade, clock_timestamp())
+        ON CONFLICT (id_empresa, id_produto, situacao)
+        DO UPDATE SET quantidade = saldo_estoque.quantidade + EXCLUDED.quantidade, atualizado_em = clock_timestamp();
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_saldo_estoque ON estoque;
+CREATE TRIGGER trg_saldo_estoque
+    AFTER INSERT OR DELETE OR UPDATE OF id_empresa, id_produto, situacao, quantidade ON estoque
+    FOR EACH ROW EXECUTE FUNCTION fn_saldo_estoque();
+"""
+
+# Recalcula 'saldo_estoque' a partir dos lotes (todas as empresas quando :id_empresa é NULL).
+SALDO_ESTOQUE_REBUILD_SQL = """
+DELETE FROM saldo_estoque
+WHERE CAST(:id_empresa AS INTEGER) IS NULL OR id_empresa = :id_empresa;
+
+INSERT INTO saldo_estoque (id_empresa, id_produto, situacao, quantidade, atualizado_em)
+SELECT id_empresa, id_produto, situacao, SUM(quantidade), clock_timestamp()
+FROM estoque
+WHERE CAST(:id_empresa AS INTEGER) IS NULL OR id_empresa = :id_empresa
+GROUP BY id_empresa, id_produto, situacao;
+"""
+
+
+# --- Busca do autocomplete (GET /lookup/{model}) ---
+# unaccent() não é IMMUTABLE e não pode ser usado em índice: f_unaccent o envolve
+# (dicionário fixo). Os índices GIN de trigramas sobre f_unaccent(lower(campo))
+# atendem 'LIKE %termo%' e 'LIKE termo%' sem varrer a tabela.
+LOOKUP_TRGM_FIELDS = (
+    ("cadastros", "nome_razao"),
+    ("usuarios", "nome"),
+    ("embalagens", "descricao"),
+    ("produtos", "descricao"),
+)
+
+LOOKUP_TRGM_SQL = """
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text AS $$
+    SELECT public.unaccent('public.unaccent', $1)
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;
+""" + "".join(
+    f"CREATE INDEX IF NOT EXISTS ix_{table}_{field}_trgm ON {table} "
+    f"USING gin (f_unaccent(lower({field})) gin_trgm_ops);\n"
+    for table, field in LOOKUP_TRGM_FIELDS
+)
+
+
+# --- Documentos e telefones só com dígitos ---
+# Os campos são gravados com máscara ('12.345.678/0001-90'). Índices de expressão sobre
+# regexp_replace(campo, '\D', '', 'g') permitem buscar '12345678000190' ou '123456'
+# (prefixo, text_pattern_ops) sem varrer a tabela. A busca usa digits_only(), que gera
+# a mesma expressão do índice.
+DIGIT_SEARCH_FIELDS = {
+    "cadastros": ("cpf_cnpj", "cep", "telefone", "celular"),
+    "empresas": ("cnpj", "cep", "telefone"),
+}
+
+def digits_only(column):
+    return func.regexp_replace(column, r"\D", "", "g")
+
+DIGIT_INDEX_SQL = "".join(
+    f"CREATE INDEX IF NOT EXISTS ix_{table}_{field}_digitos ON {table} "
+    f"({'id_empresa, ' if table != 'empresas' else ''}"
+    f"(regexp_replace({field}, '\\D', '', 'g')) text_pattern_ops);\n"
+    for table, fields in DIGIT_SEARCH_FIELDS.items()
+    for field in fields
+)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def instalar_triggers(target, connection, tables=(), **kw):
+    """
+    Instala os triggers e os índices de expressão no 'create_all' da inicialização (idempotente).
+    Se 'saldo_estoque' acabou de ser criada, popula a tabela com os lotes existentes.
+    """
+    if connection.dialect.name != "postgresql":
+        return
+    connection.execute(text(SALDO_ESTOQUE_TRIGGER_SQL))
+    connection.execute(text(LOOKUP_TRGM_SQL))
+    connection.execute(text(DIGIT_INDEX_SQL))
+    if SaldoEstoque.__table__ in tables:
+        connection.execute(text(SALDO_ESTOQUE_REBUILD_SQL), {"id_empresa": None})
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List, Any, Dict, Type
+from typing import Optional, List, Any, Dict, Type, Literal
 from datetime import datetime, date
 from decimal import Decimal
 
@@ -11,7 +11,8 @@ from .models import (
     ProdutoTipoEnum, ProdutoOrigemEnum, ContaTipoEnum, ContaSituacaoEnum,
     EstoqueSituacaoEnum, PedidoSituacaoEnum,
     RegraRegimeEmitenteEnum, RegraTipoOperacaoEnum, RegraTipoClienteEnum,
-    RegraLocalizacaoDestinoEnum, CadastroIndicadorIEEnum, PedidoModalidadeFreteEnum
+    RegraLocalizacaoDestinoEnum, CadastroIndicadorIEEnum, PedidoModalidadeFreteEnum,
+    JobSituacaoEnum
 )
 
 # --- Schemas de Autenticação e Suporte ---
@@ -19,6 +20,11 @@ class Token(BaseModel):
     access_token: str
     token_type: str
 
+class EventsTicket(BaseModel):
+    """Ticket curto do stream SSE (GET /events?ticket=...)."""
+    ticket: str
+    expires_in: int
+
 class TokenData(BaseModel):
     """Schema do payload do JWT, atualizado para o modelo Usuario."""
     id_usuario: Optional[int] = None
@@ -35,6 +41,33 @@ class Page(BaseModel):
     class Config:
         from_attributes = True
 
+class ChangesPage(BaseModel):
+    """Lote do delta-sync: itens criados/alterados, ids excluídos e o próximo watermark."""
+    items: List[Any]
+    deleted: List[int]
+    next_token: str
+    has_more: bool
+
+class Catalogo(BaseModel):
+    """GET /catalogo: produtos do tenant em formato colunar (cada item segue a ordem de 'campos')."""
+    campos: List[str]
+    itens: List[List[Any]]
+
+class AggregateResult(BaseModel):
+    """GET /generic/{model}/aggregate: uma linha por grupo (campos do group_by + métricas)."""
+    groups: List[Dict[str, Any]]
+    truncated: bool # Havia mais grupos do que o limite
+
+class PatchLote(BaseModel):
+    """PATCH em lote: aplica os mesmos 'valores' a todos os 'ids' (ex: mudar a situação de vários pedidos)."""
+    ids: List[int] = Field(..., min_length=1, max_length=1000)
+    valores: Dict[str, Any] = Field(..., min_length=1)
+
+class PatchLoteResultado(BaseModel):
+    """Linhas efetivamente alteradas (id + colunas gravadas)."""
+    items: List[Dict[str, Any]]
+    total_count: int
+
 # --- Schemas de Metadados ---
 class FieldMetadata(BaseModel):
     name: str
@@ -46,6 +79,7 @@ class FieldMetadata(BaseModel):
     tab: Optional[str] = None
     foreign_key_model: Optional[str] = None # Modelo que a FK aponta (ex: "cadastros")
     foreign_key_label_field: Optional[str] = None # Campo de label (ex: "nome_razao")
+    sortable: bool = False # Aceito no order_by da listagem (coluna indexada)
 
 class ModelMetadata(BaseModel):
     model_name: str
@@ -53,6 +87,31 @@ class ModelMetadata(BaseModel):
     display_field: Optional[str] = None # O campo principal de display do modelo (ex: "nome_razao")
     fields: List[FieldMetadata]
 
+class LookupItem(BaseModel):
+    """Opção de select de FK (GET /lookup/{model}): só o id e o texto exibido."""
+    id: int
+    label: str
+
+
+# --- Schemas de Diagnóstico ---
+class SlowQuery(BaseModel):
+    registrado_em: datetime
+    duracao_ms: float
+    sql: str
+    parametros: Optional[str] = None
+    plano: Optional[str] = None # Saída do EXPLAIN (ANALYZE, BUFFERS), quando amostrado
+    model_name: Optional[str] = None
+    id_empresa: Optional[int] = None
+    endpoint: Optional[str] = None
+
+class CacheStats(BaseModel):
+    namespace: str
+    backend: str
+    hits: int
+    misses: int
+    hit_rate: float
+    backend_entries: Optional[int] = None
+    backend_bytes: Optional[int] = None
 
 # --- 1. Schemas da Empresa ---
 
@@ -374,6 +433,16 @@ class Estoque(EstoqueBase):  # RENOMEADO de EstoqueRead para Estoque
     class Config:
         from_attributes = True
 
+class SaldoEstoque(BaseModel):
+    """Saldo materializado por produto e situação (somente leitura)."""
+    id_produto: int
+    situacao: EstoqueSituacaoEnum
+    quantidade: int
+    atualizado_em: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
 # --- 8. Schemas de Pedido ---
 
 class PedidoBase(BaseModel):
@@ -500,6 +569,84 @@ class Tributacao(TributacaoBase):  # RENOMEADO de TributacaoRead para Tributacao
         from_attributes = True
 
 
+# --- 10. Schemas de Programação de Pedido ---
+
+class ProgramacaoRetirada(BaseModel):
+    """Retirada de um lote de estoque para uma linha do pedido."""
+    # Linha do pedido (posição em 'itens'); sem ela, só vale se o produto aparece em uma única linha
+    indice: Optional[int] = Field(None, ge=0)
+    id_estoque_origem: int
+    id_produto: Optional[int] = None
+    quantidade: int = Field(..., gt=0)
+    lote: Optional[str] = None
+    deposito: Optional[str] = None
+
+class ProgramacaoItem(BaseModel):
+    """Quanto da linha 'indice' o usuário quer produzir (o restante sai do estoque)."""
+    indice: int = Field(..., ge=0)
+    numero_a_produzir: int = Field(..., ge=0)
+
+class ProgramacaoRequest(BaseModel):
+    """
+    Payload de POST /pedidos/{id}/programacao.
+    Sem 'retiradas_detalhadas' (ou com a lista vazia), os lotes são sugeridos
+    automaticamente (FIFO), retirando de cada linha no máximo
+    quantidade - numero_a_produzir informado em 'itens'.
+    """
+    aplicar: bool = False
+    estrategia: Literal["lote", "local"] = "lote"
+    data_finalizacao: Optional[date] = None
+    ordem_finalizacao: Optional[Decimal] = Field(None, max_digits=5, decimal_places=1)
+    retiradas_detalhadas: Optional[List[ProgramacaoRetirada]] = None
+    itens: Optional[List[ProgramacaoItem]] = None
+
+class ProgramacaoLote(BaseModel):
+    id: int
+    lote: Optional[str] = None
+    deposito: Optional[str] = None
+    rua: Optional[str] = None
+    nivel: Optional[str] = None
+    quantidade: int
+
+class ProgramacaoItem(BaseModel):
+    indice: int
+    id_produto: Optional[int] = None
+    descricao: Optional[str] = None
+    quantidade: int
+    numero_a_retirar: int
+    numero_a_produzir: int
+    retiradas: List[ProgramacaoRetirada] = []
+    lotes_disponiveis: List[ProgramacaoLote] = []
+
+class ProgramacaoResponse(BaseModel):
+    id_pedido: int
+    aplicado: bool
+    situacao: PedidoSituacaoEnum
+    itens: List[ProgramacaoItem]
+
+
+# --- 11. Schemas de Jobs (tarefas em segundo plano) ---
+class JobRequest(BaseModel):
+    """POST /jobs: 'tipo' é um dos handlers registrados (ex: exportar_csv)."""
+    tipo: str
+    parametros: Dict[str, Any] = Field(default_factory=dict)
+
+class JobStatus(BaseModel):
+    id: int
+    tipo: str
+    parametros: Dict[str, Any]
+    situacao: JobSituacaoEnum
+    progresso: int
+    mensagem: Optional[str] = None
+    cancelar: bool
+    resultado_nome: Optional[str] = None
+    criado_em: Optional[datetime] = None
+    iniciado_em: Optional[datetime] = None
+    finalizado_em: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
 # --- Atualização de Referências (AGORA USA OS NOMES CURTOS) ---
 def update_all_forward_refs():
     """Chame esta função no final do seu arquivo schemas.py."""
@@ -0,0 +1,179 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+from jose import JWTError, jwt
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.service import metrics
+
+# Controle de admissão: limita as requisições simultâneas por (tenant, classe de
+# endpoint) e por classe no worker, para que uma empresa rodando exportações ou
+# buscas pesadas não ocupe toda a threadpool e o pool de conexões das outras.
+# Acima do limite a requisição espera na fila (até ADMISSION_QUEUE_TIMEOUT_SECONDS);
+# com a fila cheia ou após a espera, responde 429 com Retry-After.
+# Tudo roda no event loop do worker, então os contadores dispensam locks.
+
+# Conexões longas (SSE) e rotas de infraestrutura não passam pelo controle
+EXEMPT_PATHS = {"/", "/metrics", "/favicon.ico", "/api/v1/events"}
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+# Consultas curtas de autocomplete/leitor de código (também /generic/{model}/distinct/...)
+LOOKUP_PREFIXES = ("/api/v1/lookup/", "/api/v1/catalogo/codigo/")
+
+Key = Tuple
+
+
+def endpoint_class(method: str, path: str) -> str:
+    """Classe do endpoint pelo método e caminho (as rotas ainda não foram resolvidas aqui)."""
+    if path.startswith(LOOKUP_PREFIXES) or "/distinct/" in path:
+        return "lookup"
+    if path.endswith("/export"):
+        return "export"
+    if path.startswith("/api/v1/dashboard") or path.endswith("/aggregate"):
+        return "dashboard"
+    if method in WRITE_METHODS:
+        return "write"
+    return "read"
+
+
+def tenant_from_scope(scope: Scope) -> Optional[int]:
+    """id_empresa do token Bearer, sem consultar o banco (a autenticação de verdade vem depois)."""
+    authorization = Headers(scope=scope).get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    id_empresa = payload.get("id_empresa")
+    return id_empresa if isinstance(id_empresa, int) else None
+
+
+class _Limiter:
+    __slots__ = ("semaphore", "in_flight", "waiting")
+
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.in_flight = 0
+        self.waiting = 0
+
+
+class AdmissionController:
+    """Semáforos por chave (a classe é sempre o último elemento), criados sob demanda e descartados quando ociosos."""
+
+    def __init__(self):
+        self._limiters: Dict[Key, _Limiter] = {}
+
+    async def acquire(self, key: Key, limit: int, deadline: float) -> Optional[_Limiter]:
+        """
+        Ocupa uma vaga da chave, esperando até 'deadline' (loop.time()).
+        Retorna o limitador ocupado (passar para 'release'), ou None se recusada.
+        """
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limiter = self._limiters[key] = _Limiter(limit)
+
+        if not limiter.semaphore.locked():
+            await limiter.semaphore.acquire()  # não suspende: há vaga
+            limiter.in_flight += 1
+            return limiter
+
+        if limiter.waiting >= settings.ADMISSION_MAX_WAITING:
+            return None
+        limiter.waiting += 1
+        metrics.ADMISSION_WAITING.inc((key[-1],))
+        try:
+            timeout = max(0.0, deadline - asyncio.get_running_loop().time())
+            await asyncio.wait_for(limiter.semaphore.acquire(), timeout)
+            # Conta a vaga antes de sair da fila: o limitador nunca fica "ocioso" ocupado
+            limiter.in_flight += 1
+            return limiter
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            limiter.waiting -= 1
+            metrics.ADMISSION_WAITING.dec((key[-1],))
+
+    def release(self, key: Key, limiter: _Limiter) -> None:
+        """Libera a vaga no MESMO limitador ocupado; o descarte do ocioso só acontece aqui."""
+        limiter.in_flight -= 1
+        limiter.semaphore.release()
+        if limiter.in_flight == 0 and limiter.waiting == 0 and self._limiters.get(key) is limiter:
+            del self._limiters[key]
+
+
+admission = AdmissionController()
+
+
+def _too_many_requests(scope_name: str, classe: str) -> JSONResponse:
+    detail = (
+        f"Muitas requisições simultâneas ({classe}) para esta empresa. Tente novamente em instantes."
+        if scope_name == "tenant" else
+        f"Servidor ocupado ({classe}). Tente novamente em instantes."
+    )
+    return JSONResponse(
+        {"detail": detail},
+        status_code=429,
+        headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+    )
+
+
+class AdmissionMiddleware:
+    """
+    Middleware ASGI de admissão. Classes: lookup, read, write, export e dashboard
+    (inclui /aggregate). Limites em ADMISSION_TENANT_LIMITS e ADMISSION_GLOBAL_LIMITS.
+    A vaga fica ocupada até o fim da resposta (inclusive o streaming das exportações).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not settings.ADMISSION_ENABLED
+            or scope["path"] in EXEMPT_PATHS
+            or scope["method"] == "OPTIONS"
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        classe = endpoint_class(scope["method"], scope["path"])
+        # Primeiro a vaga do tenant: quem está na fila do próprio tenant não segura vaga global
+        keys: List[Tuple[Key, int, str]] = []
+        tenant_limit = settings.ADMISSION_TENANT_LIMITS.get(classe)
+        if tenant_limit:
+            id_empresa = tenant_from_scope(scope)
+            if id_empresa is not None:
+                keys.append((("tenant", id_empresa, classe), tenant_limit, "tenant"))
+        global_limit = settings.ADMISSION_GLOBAL_LIMITS.get(classe)
+        if global_limit:
+            keys.append((("global", classe), global_limit, "global"))
+
+        labels = (classe,)
+        acquired: List[Tuple[Key, _Limiter]] = []
+        inicio = time.perf_counter()
+        deadline = asyncio.get_running_loop().time() + settings.ADMISSION_QUEUE_TIMEOUT_SECONDS
+        try:
+            for key, limit, scope_name in keys:
+                limiter = await admission.acquire(key, limit, deadline)
+                if limiter is None:
+                    metrics.ADMISSION_REJECTED.inc((classe, scope_name))
+                    await _too_many_requests(scope_name, classe)(scope, receive, send)
+                    return
+                acquired.append((key, limiter))
+
+            metrics.ADMISSION_WAIT.observe(labels, time.perf_counter() - inicio)
+            metrics.ADMISSION_IN_FLIGHT.inc(labels)
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                metrics.ADMISSION_IN_FLIGHT.dec(labels)
+        finally:
+            for key, limiter in reversed(acquired):
+                admission.release(key, limiter)
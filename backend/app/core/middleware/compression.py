@@ -0,0 +1,201 @@
+import hashlib
+import zlib
+from typing import Callable, Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.service.cache import Cache, LocalCache
+
+try:
+    import brotli  # dependência opcional
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard  # dependência opcional
+except ImportError:
+    zstandard = None
+
+# Compressão das respostas (gzip; br/zstd se os pacotes estiverem instalados).
+# Corpos inteiros acima de COMPRESSION_MIN_SIZE são comprimidos de uma vez, fora do
+# event loop, e guardados por hash do conteúdo: respostas vindas dos caches (mesmos
+# bytes) reaproveitam o corpo já comprimido. StreamingResponse é comprimida pedaço
+# a pedaço, sem juntar o corpo inteiro na memória.
+
+# Abaixo disso comprimir na thread do event loop custa menos que o salto para o pool
+THREAD_MIN_BYTES = 16 * 1024
+
+
+class _GzipCompressor:
+    def __init__(self):
+        self._obj = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+
+class _BrotliCompressor:
+    def __init__(self):
+        self._obj = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data)
+
+    def flush(self) -> bytes:
+        return self._obj.finish()
+
+
+class _ZstdCompressor:
+    def __init__(self):
+        self._obj = zstandard.ZstdCompressor(level=settings.COMPRESSION_ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+
+# Em ordem de preferência do servidor
+COMPRESSORS: Dict[str, Callable[[], object]] = {}
+if brotli is not None:
+    COMPRESSORS["br"] = _BrotliCompressor
+if zstandard is not None:
+    COMPRESSORS["zstd"] = _ZstdCompressor
+COMPRESSORS["gzip"] = _GzipCompressor
+
+compressed_cache = Cache(
+    "compressed",
+    LocalCache(maxsize=1024, max_bytes=settings.COMPRESSION_CACHE_MAX_BYTES),
+    ttl=300,
+)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Primeira codificação do servidor aceita pelo cliente (respeita q=0 e '*')."""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip()] = q
+    for encoding in COMPRESSORS:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress_body(encoding: str, body: bytes) -> bytes:
+    """Comprime um corpo inteiro, reaproveitando o resultado para o mesmo conteúdo."""
+    key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+    compressed = compressed_cache.get(key)
+    if compressed is None:
+        compressor = COMPRESSORS[encoding]()
+        compressed = compressor.compress(body) + compressor.flush()
+        compressed_cache.set(key, compressed)
+    return compressed
+
+
+async def _run(size: int, func: Callable, *args) -> bytes:
+    if size >= THREAD_MIN_BYTES:
+        return await run_in_threadpool(func, *args)
+    return func(*args)
+
+
+def _is_compressible(status: int, headers: Headers) -> bool:
+    # 206/304/erros e FileResponse (Accept-Ranges: os offsets do Range são do arquivo original)
+    if status != 200 or "content-encoding" in headers or "accept-ranges" in headers:
+        return False
+    media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    return media_type in settings.COMPRESSION_CONTENT_TYPES
+
+
+def _set_encoding_headers(message: Message, encoding: str, length: Optional[int]) -> None:
+    headers = MutableHeaders(scope=message)
+    headers["Content-Encoding"] = encoding
+    headers.add_vary_header("Accept-Encoding")
+    if length is None:
+        del headers["Content-Length"]
+    else:
+        headers["Content-Length"] = str(length)
+    # A representação comprimida não é idêntica byte a byte: o ETag passa a ser fraco
+    # (etag_matches compara de forma fraca, então o 304 continua funcionando)
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = f"W/{etag}"
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI de compressão: negocia a codificação pelo Accept-Encoding e só
+    comprime respostas 200 dos tipos em COMPRESSION_CONTENT_TYPES.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        passthrough = False
+        compressor = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, passthrough, compressor
+            if message["type"] == "http.response.start":
+                if _is_compressible(message["status"], Headers(raw=message["headers"])):
+                    start = message  # segura até ver o primeiro pedaço do corpo
+                else:
+                    passthrough = True
+                    await send(message)
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                if not more_body:
+                    # Corpo inteiro em uma mensagem (Response/JSONResponse)
+                    if len(body) < settings.COMPRESSION_MIN_SIZE:
+                        passthrough = True
+                        await send(start)
+                        await send(message)
+                        return
+                    compressed = await _run(len(body), compress_body, encoding, body)
+                    _set_encoding_headers(start, encoding, len(compressed))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+                # StreamingResponse: tamanho desconhecido, comprime em fluxo
+                compressor = COMPRESSORS[encoding]()
+                _set_encoding_headers(start, encoding, None)
+                await send(start)
+
+            data = await _run(len(body), compressor.compress, body)
+            if not more_body:
+                data += compressor.flush()
+            if data or not more_body:
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
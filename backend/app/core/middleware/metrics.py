@@ -0,0 +1,60 @@
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.service import metrics
+
+# Não instrumentados: o próprio /metrics e o stream SSE (conexões de longa duração
+# distorceriam a latência por rota).
+UNTRACKED_PATHS = {"/metrics", "/api/v1/events"}
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mede, por requisição: latência, quantidade e tempo de SQL,
+    espera pelo pool de conexões e tamanho da resposta.
+    Publica os valores em /metrics (Prometheus) e no cabeçalho Server-Timing.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in UNTRACKED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        stats = metrics.RequestStats(scope)
+        token = metrics.request_stats.set(stats)
+        inicio = time.perf_counter()
+        status_code = 500
+        response_size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                app_ms = (time.perf_counter() - inicio) * 1000
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.sql_time * 1000:.1f};desc="SQL x{stats.sql_count}", '
+                    f"pool;dur={stats.pool_wait * 1000:.1f}, "
+                    f"app;dur={app_ms:.1f}",
+                )
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.request_stats.reset(token)
+            labels = metrics.route_labels(scope)
+            metrics.REQUESTS_TOTAL.inc(labels + (str(status_code),))
+            metrics.REQUEST_LATENCY.observe(labels, time.perf_counter() - inicio)
+            metrics.RESPONSE_SIZE.observe(labels, response_size)
+            metrics.SQL_STATEMENTS.observe(labels, stats.sql_count)
+            metrics.SQL_DURATION.observe(labels, stats.sql_time)
+            metrics.POOL_WAIT.observe(labels, stats.pool_wait)
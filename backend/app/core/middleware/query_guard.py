@@ -0,0 +1,78 @@
+import asyncio
+
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.middleware.admission import endpoint_class
+from app.core.service import query_guard
+
+# O stream SSE tem o próprio tratamento de desconexão e não segura queries
+UNGUARDED_PATHS = {"/api/v1/events"}
+
+DISCONNECT: Message = {"type": "http.disconnect"}
+
+
+class QueryGuardMiddleware:
+    """
+    Middleware ASGI que cria o QueryGuard da requisição (statement_timeout conforme a
+    classe do endpoint, em STATEMENT_TIMEOUTS_MS) e acompanha a conexão do cliente:
+    se ele desconectar antes do fim da resposta, a query em execução é cancelada e a
+    conexão liberada na hora, sem esperar a consulta terminar.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in UNGUARDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        classe = endpoint_class(scope["method"], scope["path"])
+        guard = query_guard.QueryGuard(settings.STATEMENT_TIMEOUTS_MS.get(classe))
+        token = query_guard.current_guard.set(guard)
+
+        # Só este middleware lê o 'receive' original: o corpo vai para a fila do app e
+        # a leitura continua até o http.disconnect (endpoints síncronos não o leem).
+        messages: asyncio.Queue = asyncio.Queue()
+        disconnected = asyncio.Event()
+        response_complete = False
+
+        async def read_messages() -> None:
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    disconnected.set()
+                    if not response_complete:
+                        await run_in_threadpool(guard.cancel)
+                    return
+                messages.put_nowait(message)
+
+        async def guarded_receive() -> Message:
+            if not messages.empty():
+                return messages.get_nowait()
+            if disconnected.is_set():
+                return DISCONNECT
+            get = asyncio.ensure_future(messages.get())
+            wait = asyncio.ensure_future(disconnected.wait())
+            await asyncio.wait({get, wait}, return_when=asyncio.FIRST_COMPLETED)
+            wait.cancel()
+            if get.done():
+                return get.result()
+            get.cancel()
+            return DISCONNECT
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal response_complete
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_complete = True
+            await send(message)
+
+        reader = asyncio.ensure_future(read_messages())
+        try:
+            await self.app(scope, guarded_receive, guarded_send)
+        finally:
+            response_complete = True
+            reader.cancel()
+            query_guard.current_guard.reset(token)
@@ -0,0 +1,410 @@
+import base64
+import fnmatch
+import json
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.service import invalidation
+from app.core.service.metrics import CACHE_REQUESTS
+
+# Camada de cache compartilhada: um 'Cache' por namespace (ex: "response", "distinct")
+# sobre um backend plugável. Operações: get/set/delete/delete_prefix com TTL.
+# As chaves são tuplas; 'delete_prefix' remove as chaves que começam com a tupla
+# informada (ex: (id_empresa, "produtos")).
+
+Key = Tuple[Hashable, ...]
+
+
+def sizeof(value: Any) -> int:
+    """Tamanho aproximado (bytes) de um valor cacheado, para o limite de memória."""
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+# --- Backends ---
+
+class CacheBackend(ABC):
+    """Interface dos backends. 'key' já vem prefixada com o namespace."""
+
+    @abstractmethod
+    def get(self, key: Key) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def set(self, key: Key, value: Any, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: Key) -> None:
+        ...
+
+    @abstractmethod
+    def delete_prefix(self, prefix: Key) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    def usage(self) -> Dict[str, int]:
+        return {}
+
+
+class LocalCache(CacheBackend):
+    """
+    LRU em memória (por worker) com expiração por tempo e contabilidade de memória:
+    descarta as entradas menos usadas ao passar de 'maxsize' entradas ou 'max_bytes'.
+    """
+
+    def __init__(self, maxsize: int = 1024, max_bytes: Optional[int] = None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._data: "OrderedDict[Key, Tuple[float, int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _pop(self, key: Key) -> None:
+        _, tamanho, _ = self._data.pop(key)
+        self.bytes -= tamanho
+
+    def get(self, key: Key) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expira_em, _, value = item
+            if expira_em < time.monotonic():
+                self._pop(key)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Key, value: Any, ttl: float) -> None:
+        tamanho = sizeof(value)
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+            if self.max_bytes is not None and tamanho > self.max_bytes:
+                return
+            self._data[key] = (time.monotonic() + ttl, tamanho, value)
+            self.bytes += tamanho
+            while len(self._data) > self.maxsize or (
+                self.max_bytes is not None and self.bytes > self.max_bytes
+            ):
+                _, (_, tamanho_antigo, _) = self._data.popitem(last=False)
+                self.bytes -= tamanho_antigo
+
+    def delete(self, key: Key) -> None:
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+
+    def delete_prefix(self, prefix: Key) -> None:
+        tamanho = len(prefix)
+        with self._lock:
+            for key in [k for k in self._data if k[:tamanho] == prefix]:
+                self._pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def usage(self) -> Dict[str, int]:
+        return {"entries": len(self._data), "bytes": self.bytes}
+
+
+# Serialização dos valores no Redis. Sem pickle: um valor lido da rede nunca
+# executa código. Os caches guardam corpos prontos (bytes) ou tuplas (corpo, ETag):
+# bytes puros vão crus; o resto em JSON, com bytes em base64 e tuplas marcadas.
+
+def _encode_tree(value: Any) -> Any:
+    if isinstance(value, (bytes, bytearray)):
+        return {"b": base64.b64encode(value).decode("ascii")}
+    if isinstance(value, tuple):
+        return {"t": [_encode_tree(v) for v in value]}
+    if isinstance(value, list):
+        return [_encode_tree(v) for v in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    raise TypeError(f"Valor não suportado no cache compartilhado: {type(value).__name__}")
+
+
+def _decode_tree(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "b" in value:
+            return base64.b64decode(value["b"])
+        return tuple(_decode_tree(v) for v in value["t"])
+    if isinstance(value, list):
+        return [_decode_tree(v) for v in value]
+    return value
+
+
+def dumps(value: Any) -> bytes:
+    if isinstance(value, (bytes, bytearray)):
+        return b"b" + bytes(value)
+    return b"j" + json.dumps(_encode_tree(value), separators=(",", ":")).encode("utf-8")
+
+
+def loads(raw: bytes) -> Any:
+    if raw[:1] == b"b":
+        return raw[1:]
+    if raw[:1] == b"j":
+        return _decode_tree(json.loads(raw[1:]))
+    raise ValueError("Valor de cache em formato desconhecido")
+
+
+class RedisCache(CacheBackend):
+    """
+    Backend compartilhado entre workers sobre um cliente do protocolo Redis
+    (redis-py ou o InMemoryRedis abaixo). Valores serializados com 'dumps' (sem
+    pickle); a expiração fica a cargo do próprio Redis (SET ... PX).
+    As chaves levam as gerações de escrita (invalidation.generations): com este
+    backend elas também ficam no Redis (ver 'generation_store'), iguais em todos
+    os workers.
+    """
+
+    SEPARATOR = "\x1f"
+
+    def __init__(self, client: Any, prefix: str = "integrai"):
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, key: Key) -> str:
+        return self.SEPARATOR.join([self.prefix, *(repr(part) for part in key)])
+
+    def get(self, key: Key) -> Optional[Any]:
+        raw = self.client.get(self._key(key))
+        return None if raw is None else loads(raw)
+
+    def set(self, key: Key, value: Any, ttl: float) -> None:
+        self.client.set(self._key(key), dumps(value), px=max(1, int(ttl * 1000)))
+
+    def generation_store(self) -> "RedisGenerations":
+        return RedisGenerations(self.client, f"{self.prefix}{self.SEPARATOR}generation")
+
+    def delete(self, key: Key) -> None:
+        self.client.delete(self._key(key))
+
+    def delete_prefix(self, prefix: Key) -> None:
+        # Escapa os curingas do MATCH; o separador no fim evita casar (1,) com (11,)
+        pattern = self._key(prefix) + self.SEPARATOR
+        pattern = "".join(f"\\{c}" if c in "*?[]\\" else c for c in pattern) + "*"
+        chaves = list(self.client.scan_iter(match=pattern, count=500))
+        if chaves:
+            self.client.delete(*chaves)
+
+    def clear(self) -> None:
+        self.delete_prefix(())
+
+
+class RedisGenerations:
+    """Gerações de escrita no Redis: INCR na escrita, MGET na montagem das chaves."""
+
+    def __init__(self, client: Any, prefix: str):
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, id_empresa: int, table_name: str) -> str:
+        return f"{self.prefix}:{id_empresa}:{table_name}"
+
+    def incr(self, id_empresa: int, table_name: str) -> None:
+        self.client.incr(self._key(id_empresa, table_name))
+
+    def get_many(self, id_empresa: int, table_names: Iterable[str]) -> Tuple[int, ...]:
+        chaves = [self._key(id_empresa, name) for name in table_names]
+        if not chaves:
+            return ()
+        return tuple(int(v) if v is not None else 0 for v in self.client.mget(chaves))
+
+
+class InMemoryRedis:
+    """
+    Substituto local do cliente Redis (subconjunto usado pelo RedisCache:
+    get/mget/set com px/incr/delete/scan_iter). Útil em desenvolvimento e em testes.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Optional[float], bytes]] = {}
+        self._lock = threading.Lock()
+
+    def _alive(self, key: str) -> bool:
+        item = self._data.get(key)
+        if item is None:
+            return False
+        expira_em = item[0]
+        if expira_em is not None and expira_em < time.monotonic():
+            del self._data[key]
+            return False
+        return True
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            return self._data[key][1] if self._alive(key) else None
+
+    def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        with self._lock:
+            return [self._data[key][1] if self._alive(key) else None for key in keys]
+
+    def set(self, key: str, value: bytes, px: Optional[int] = None) -> bool:
+        with self._lock:
+            self._data[key] = (time.monotonic() + px / 1000 if px else None, value)
+        return True
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            expira_em, value = self._data[key] if self._alive(key) else (None, b"0")
+            value = int(value) + 1
+            self._data[key] = (expira_em, str(value).encode())
+            return value
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    def scan_iter(self, match: str = "*", count: Optional[int] = None):
+        with self._lock:
+            chaves = [k for k in list(self._data) if self._alive(k)]
+        # fnmatch usa [!] e não entende '\' como escape: traduz os curingas escapados
+        pattern = "".join(f"[{c}]" if escapado else c for escapado, c in _unescape(match))
+        return iter([k for k in chaves if fnmatch.fnmatchcase(k, pattern)])
+
+
+def _unescape(pattern: str):
+    escapado = False
+    for c in pattern:
+        if escapado:
+            yield True, c
+            escapado = False
+        elif c == "\\":
+            escapado = True
+        else:
+            yield False, c
+
+
+# --- Cache por namespace (estatísticas + single-flight) ---
+
+class Cache:
+    """
+    Cache de um namespace sobre um backend. Conta hits/misses (cache_requests_total
+    no /metrics e 'stats()') e oferece 'get_or_compute' com single-flight: misses
+    simultâneos na mesma chave, neste worker, calculam o valor uma única vez.
+    """
+
+    def __init__(self, namespace: str, backend: CacheBackend, ttl: float = 300.0):
+        self.namespace = namespace
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._inflight: Dict[Key, threading.Lock] = {}
+        self._inflight_lock = threading.Lock()
+
+    def _key(self, key: Key) -> Key:
+        return (self.namespace, *key)
+
+    def _count(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        CACHE_REQUESTS.inc((self.namespace, "hit" if hit else "miss"))
+
+    def get(self, key: Key) -> Optional[Any]:
+        value = self.backend.get(self._key(key))
+        self._count(value is not None)
+        return value
+
+    def set(self, key: Key, value: Any, ttl: Optional[float] = None) -> None:
+        self.backend.set(self._key(key), value, self.ttl if ttl is None else ttl)
+
+    def delete(self, key: Key) -> None:
+        self.backend.delete(self._key(key))
+
+    def delete_prefix(self, prefix: Key) -> None:
+        self.backend.delete_prefix(self._key(prefix))
+
+    def clear(self) -> None:
+        self.backend.delete_prefix((self.namespace,))
+
+    def get_or_compute(
+        self,
+        key: Key,
+        compute: Callable[[], Any],
+        should_cache: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        """Lê do cache; no miss, só uma thread por chave executa 'compute' e as outras aguardam."""
+        value = self.backend.get(self._key(key))
+        if value is not None:
+            self._count(True)
+            return value
+
+        with self._inflight_lock:
+            lock = self._inflight.setdefault(key, threading.Lock())
+        with lock:
+            # Quem esperou encontra o valor já calculado por quem chegou primeiro
+            value = self.backend.get(self._key(key))
+            self._count(value is not None)
+            if value is None:
+                try:
+                    value = compute()
+                    if value is not None and should_cache(value):
+                        self.set(key, value)
+                finally:
+                    with self._inflight_lock:
+                        self._inflight.pop(key, None)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            # Uso do backend (compartilhado entre os namespaces)
+            **{f"backend_{k}": v for k, v in self.backend.usage().items()},
+        }
+
+
+_caches: Dict[str, Cache] = {}
+_shared_backend: Optional[CacheBackend] = None
+
+
+def _backend() -> CacheBackend:
+    """Backend compartilhado conforme CACHE_BACKEND ('local' ou 'redis')."""
+    global _shared_backend
+    if _shared_backend is None:
+        if settings.CACHE_BACKEND == "redis":
+            try:
+                import redis  # dependência opcional
+            except ImportError as e:
+                raise RuntimeError("CACHE_BACKEND=redis requer o pacote 'redis'") from e
+            _shared_backend = RedisCache(redis.Redis.from_url(settings.CACHE_REDIS_URL))
+            # Chaves com gerações locais não valem para outro worker: compartilha também as gerações
+            invalidation.use_generation_store(_shared_backend.generation_store())
+        else:
+            _shared_backend = LocalCache(
+                maxsize=settings.CACHE_LOCAL_MAXSIZE, max_bytes=settings.CACHE_LOCAL_MAX_BYTES
+            )
+    return _shared_backend
+
+
+def get_cache(namespace: str, ttl: float = 300.0) -> Cache:
+    """Cache do namespace sobre o backend configurado (criado uma vez por worker)."""
+    if namespace not in _caches:
+        _caches[namespace] = Cache(namespace, _backend(), ttl=ttl)
+    return _caches[namespace]
+
+
+def all_stats() -> list:
+    return [cache.stats() for cache in _caches.values()]
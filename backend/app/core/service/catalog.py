@@ -0,0 +1,227 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.api.v1.http_cache import make_etag
+from app.core.config import settings
+from app.core.db import models
+from app.core.service import invalidation
+from app.crud import crud_generic
+
+# Catálogo de produtos por tenant em memória (GET /catalogo): só os campos usados na
+# digitação/visualização de pedidos, em objetos com __slots__ guardados em uma lista,
+# com índices por id, SKU e GTIN (dict -> posição na lista).
+# A primeira carga lê o tenant inteiro; depois, só o que mudou desde o último
+# 'atualizado_em' visto (índice (id_empresa, atualizado_em, id)) e os tombstones
+# de 'exclusoes'. A atualização só roda quando a geração de escrita de 'produtos'
+# mudou (notify_write local ou de outro worker via invalidation_bus) ou após
+# CATALOG_REFRESH_SECONDS.
+
+CATALOG_FIELDS = (
+    "id", "sku", "gtin", "descricao", "unidade", "preco", "peso",
+    "altura", "largura", "comprimento", "id_embalagem", "situacao",
+)
+
+TABLE_NAME = models.Produto.__tablename__
+
+
+class CatalogItem:
+    __slots__ = CATALOG_FIELDS
+
+    def __init__(self, row: Any):
+        for field in CATALOG_FIELDS:
+            value = getattr(row, field)
+            if isinstance(value, Decimal):
+                value = float(value)
+            elif hasattr(value, "value"):  # Enum
+                value = value.value
+            setattr(self, field, value)
+
+    def as_row(self) -> List[Any]:
+        return [getattr(self, field) for field in CATALOG_FIELDS]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in CATALOG_FIELDS}
+
+
+class CatalogSnapshot:
+    """Catálogo de um tenant. Acesso sob 'lock' (um refresh por vez por tenant)."""
+
+    def __init__(self, id_empresa: int):
+        self.id_empresa = id_empresa
+        self.lock = threading.Lock()
+        self.items: List[CatalogItem] = []
+        self.by_id: Dict[int, int] = {}
+        self.by_sku: Dict[str, int] = {}
+        self.by_gtin: Dict[str, int] = {}
+        self.version = 0
+        self.loaded = False
+        # Horizonte (crud_generic.changes_horizon) da última carga: alterações e
+        # exclusões são relidas a partir dele
+        self.changes_watermark: Optional[datetime] = None
+        self.deletes_watermark: Optional[datetime] = None
+        self.generation: Optional[Tuple[int, ...]] = None
+        self.checked_at = 0.0
+        self._encoded: Optional[Tuple[int, bytes, str]] = None
+
+    # --- Estrutura (lista + índices) ---
+
+    def _index(self, pos: int, item: CatalogItem) -> None:
+        self.by_id[item.id] = pos
+        if item.sku:
+            self.by_sku[item.sku] = pos
+        if item.gtin:
+            self.by_gtin[item.gtin] = pos
+
+    def upsert(self, item: CatalogItem) -> None:
+        pos = self.by_id.get(item.id)
+        if pos is None:
+            self.items.append(item)
+            self._index(len(self.items) - 1, item)
+            return
+        old = self.items[pos]
+        if old.sku != item.sku and self.by_sku.get(old.sku) == pos:
+            del self.by_sku[old.sku]
+        if old.gtin != item.gtin and self.by_gtin.get(old.gtin) == pos:
+            del self.by_gtin[old.gtin]
+        self.items[pos] = item
+        self._index(pos, item)
+
+    def remove(self, id: int) -> bool:
+        """Remoção O(1): o último item ocupa a posição do removido."""
+        pos = self.by_id.pop(id, None)
+        if pos is None:
+            return False
+        item = self.items[pos]
+        if item.sku and self.by_sku.get(item.sku) == pos:
+            del self.by_sku[item.sku]
+        if item.gtin and self.by_gtin.get(item.gtin) == pos:
+            del self.by_gtin[item.gtin]
+
+        last = self.items.pop()
+        if last is not item:
+            self.items[pos] = last
+            self._index(pos, last)
+        return True
+
+    def find_code(self, codigo: str) -> Optional[CatalogItem]:
+        pos = self.by_sku.get(codigo)
+        if pos is None:
+            pos = self.by_gtin.get(codigo)
+        return self.items[pos] if pos is not None else None
+
+    # --- Carga ---
+
+    def refresh(self, db: Session) -> None:
+        produto = models.Produto
+        columns = [getattr(produto, field) for field in CATALOG_FIELDS] + [produto.atualizado_em]
+        changed = False
+        # Horizonte lido ANTES das consultas: transações ainda abertas só gravam carimbos
+        # a partir dele, então a próxima carga relê desde aqui (upsert idempotente)
+        horizon = crud_generic.changes_horizon(db)
+
+        stmt = select(*columns).where(produto.id_empresa == self.id_empresa)
+        if self.changes_watermark is not None:
+            stmt = stmt.where(produto.atualizado_em >= self.changes_watermark)
+        for row in db.execute(stmt):
+            self.upsert(CatalogItem(row))
+            changed = True
+
+        # Exclusões (tombstones do CRUD genérico); na primeira carga só interessam as futuras
+        if self.loaded:
+            exclusao = models.Exclusao
+            stmt = select(exclusao.id_registro).where(
+                exclusao.id_empresa == self.id_empresa,
+                exclusao.tabela == TABLE_NAME,
+                exclusao.excluido_em >= self.deletes_watermark,
+            )
+            for (id_registro,) in db.execute(stmt):
+                changed = self.remove(id_registro) or changed
+
+        self.changes_watermark = horizon
+        self.deletes_watermark = horizon
+        if changed or not self.loaded:
+            self.version += 1
+        self.loaded = True
+        db.rollback()  # encerra a transação de leitura
+
+    def encoded(self) -> Tuple[int, bytes, str]:
+        """JSON compacto (campos + linhas) e ETag da versão atual, calculados uma vez por versão."""
+        if self._encoded is None or self._encoded[0] != self.version:
+            body = json.dumps(
+                {
+                    "campos": CATALOG_FIELDS,
+                    "itens": [item.as_row() for item in self.items],
+                },
+                ensure_ascii=False,
+                separators=(",", ":"),
+                default=str,
+            ).encode("utf-8")
+            # ETag pelo conteúdo: as versões de workers diferentes não são comparáveis
+            self._encoded = (self.version, body, make_etag(body))
+        return self._encoded
+
+
+class CatalogRegistry:
+    """Snapshots por tenant, com limite (LRU) de tenants em memória."""
+
+    def __init__(self, max_tenants: int):
+        self.max_tenants = max_tenants
+        self._snapshots: "OrderedDict[int, CatalogSnapshot]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, id_empresa: int) -> CatalogSnapshot:
+        with self._lock:
+            snapshot = self._snapshots.get(id_empresa)
+            if snapshot is None:
+                snapshot = self._snapshots[id_empresa] = CatalogSnapshot(id_empresa)
+            self._snapshots.move_to_end(id_empresa)
+            while len(self._snapshots) > self.max_tenants:
+                self._snapshots.popitem(last=False)
+            return snapshot
+
+    def _refreshed(self, db: Session, snapshot: CatalogSnapshot) -> CatalogSnapshot:
+        """Atualiza o snapshot se houve escrita. Chamar com snapshot.lock adquirido."""
+        generation = invalidation.generations(snapshot.id_empresa, (TABLE_NAME,))
+        expired = time.monotonic() - snapshot.checked_at > settings.CATALOG_REFRESH_SECONDS
+        if not snapshot.loaded or generation != snapshot.generation or expired:
+            # Geração lida ANTES da consulta: uma escrita durante o refresh força outro
+            snapshot.refresh(db)
+            snapshot.generation = generation
+            snapshot.checked_at = time.monotonic()
+        return snapshot
+
+    def encoded(self, db: Session, id_empresa: int) -> Tuple[bytes, str]:
+        """Corpo JSON e ETag do catálogo atual do tenant."""
+        snapshot = self._get(id_empresa)
+        with snapshot.lock:
+            _, body, etag = self._refreshed(db, snapshot).encoded()
+        return body, etag
+
+    def find_code(self, db: Session, id_empresa: int, codigo: str) -> Optional[Dict[str, Any]]:
+        """Produto pelo SKU ou, se não houver, pelo GTIN."""
+        snapshot = self._get(id_empresa)
+        with snapshot.lock:
+            item = self._refreshed(db, snapshot).find_code(codigo)
+            return item.as_dict() if item is not None else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._snapshots.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "tenants": len(self._snapshots),
+                "itens": sum(len(s.items) for s in self._snapshots.values()),
+            }
+
+
+catalogs = CatalogRegistry(max_tenants=settings.CATALOG_MAX_TENANTS)
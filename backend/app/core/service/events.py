@@ -0,0 +1,80 @@
+import asyncio
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from app.core.service import invalidation
+
+# Fan-out das escritas para as conexões SSE (GET /events) deste worker.
+# Alimentado pelo notify_write local e, via invalidation_bus (LISTEN/NOTIFY),
+# pelas escritas dos outros workers. Cada conexão tem uma fila asyncio limitada;
+# se ela encher (cliente lento), o cliente recebe 'resync' e recarrega tudo.
+
+QUEUE_SIZE = 100
+
+
+class Subscription:
+    __slots__ = ("id_empresa", "tables", "queue", "loop", "overflow")
+
+    def __init__(self, id_empresa: int, tables: Dict[str, str], loop: asyncio.AbstractEventLoop):
+        self.id_empresa = id_empresa
+        self.tables = tables  # __tablename__ -> nome do modelo pedido pelo cliente
+        self.queue: "asyncio.Queue[dict]" = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.loop = loop
+        self.overflow = False
+
+    def push(self, event: dict) -> None:
+        """Pode ser chamado de qualquer thread (endpoints síncronos, listener do barramento)."""
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event: dict) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflow = True
+
+
+class EventBroker:
+    def __init__(self):
+        self._subscriptions: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, id_empresa: int, tables: Dict[str, str]) -> Subscription:
+        """Deve ser chamado dentro do event loop (endpoint async)."""
+        subscription = Subscription(id_empresa, tables, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions[id_empresa].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.id_empresa)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.id_empresa]
+
+    def publish(self, id_empresa: int, table_name: str, ids: Optional[List[int]] = None) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(id_empresa, ()))
+        for subscription in subscriptions:
+            model = subscription.tables.get(table_name)
+            if model is not None:
+                subscription.push({"model": model, "ids": ids})
+
+    def resync_all(self) -> None:
+        """Eventos podem ter se perdido (ex: reconexão do LISTEN): todos os clientes recarregam."""
+        with self._lock:
+            subscriptions = [s for subs in self._subscriptions.values() for s in subs]
+        for subscription in subscriptions:
+            subscription.loop.call_soon_threadsafe(setattr, subscription, "overflow", True)
+            subscription.push({"model": None, "ids": None})
+
+    def count(self) -> int:
+        with self._lock:
+            return sum(len(subs) for subs in self._subscriptions.values())
+
+
+broker = EventBroker()
+invalidation.subscribe(broker.publish)
+invalidation.on_reset(broker.resync_all)
@@ -0,0 +1,77 @@
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Assinantes notificados a cada escrita em um modelo: (id_empresa, table_name, ids) -> None.
+# 'ids' são os registros afetados, quando conhecidos (None = o modelo inteiro).
+Listener = Callable[[int, str, Optional[List[int]]], None]
+_listeners: List[Listener] = []
+# Assinantes avisados quando eventos podem ter se perdido (ver invalidate_all).
+_reset_listeners: List[Callable[[], None]] = []
+
+# Geração de escrita por (id_empresa, table_name): incrementada a cada notify_write.
+# Caches que incluem a geração na chave ficam obsoletos em O(1), sem varrer entradas.
+_generations: Dict[Tuple[int, str], int] = {}
+# Época global: incrementada quando eventos podem ter se perdido (ex: o listener
+# do barramento reconectou), tornando obsoletas as entradas de todos os tenants.
+_epoch = 0
+_lock = threading.Lock()
+# Com um cache compartilhado entre workers (CACHE_BACKEND=redis), as gerações
+# precisam ser as mesmas em todos eles: ficam no próprio Redis (ver use_generation_store).
+_store: Optional[Any] = None
+
+
+def use_generation_store(store: Any) -> None:
+    """Passa a ler/incrementar as gerações no armazenamento compartilhado ('incr'/'get_many')."""
+    global _store
+    _store = store
+
+
+def subscribe(listener: Listener) -> Listener:
+    """Registra um assinante (pode ser usado como decorator)."""
+    _listeners.append(listener)
+    return listener
+
+
+def on_reset(listener: Callable[[], None]) -> Callable[[], None]:
+    _reset_listeners.append(listener)
+    return listener
+
+
+def generation(id_empresa: int, table_name: str) -> int:
+    return generations(id_empresa, (table_name,))[1]
+
+
+def generations(id_empresa: int, table_names: Iterable[str]) -> Tuple[int, ...]:
+    """Gerações atuais de várias tabelas (ex: o modelo e as tabelas que ele aninha)."""
+    if _store is not None:
+        return (_epoch,) + _store.get_many(id_empresa, tuple(table_names))
+    return (_epoch,) + tuple(_generations.get((id_empresa, name), 0) for name in table_names)
+
+
+def invalidate_all() -> None:
+    global _epoch
+    with _lock:
+        _epoch += 1
+    for listener in _reset_listeners:
+        listener()
+
+
+def notify_write(
+    id_empresa: int, table_name: str, ids: Optional[List[int]] = None, remote: bool = False
+) -> None:
+    """
+    Deve ser chamado após o COMMIT de qualquer escrita (create/update/delete/import)
+    em um modelo. 'table_name' é o __tablename__ do modelo (nome canônico).
+    Invalida só este worker; os demais são avisados pelo invalidation_bus.publish
+    (NOTIFY na mesma transação da escrita) e chegam aqui com 'remote'.
+    """
+    if _store is not None:
+        # Geração compartilhada: só quem escreveu incrementa
+        if not remote:
+            _store.incr(id_empresa, table_name)
+    else:
+        key = (id_empresa, table_name)
+        with _lock:
+            _generations[key] = _generations.get(key, 0) + 1
+    for listener in _listeners:
+        listener(id_empresa, table_name, ids)
@@ -0,0 +1,142 @@
+import json
+import logging
+import os
+import select
+import threading
+import uuid
+from typing import Iterable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.service import invalidation
+
+logger = logging.getLogger(__name__)
+
+# Identifica este worker: cada worker também recebe os próprios NOTIFY e os ignora
+# (a invalidação local já é feita pelo notify_write após o COMMIT).
+WORKER_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+# O payload do NOTIFY é limitado a 8000 bytes: listas grandes de ids viram "modelo inteiro".
+MAX_IDS_POR_EVENTO = 200
+
+
+def publish(db: Session, *, id_empresa: int, table_name: str, ids: Optional[Iterable[int]] = None) -> None:
+    """
+    Enfileira o evento (tenant, modelo, ids) com pg_notify na transação corrente.
+    O Postgres só entrega o NOTIFY no COMMIT (e descarta no ROLLBACK), então os
+    outros workers nunca invalidam por uma escrita que não aconteceu.
+    Chamar ANTES do db.commit(). Em outros bancos (ex: sqlite) não faz nada.
+    """
+    if not settings.INVALIDATION_BUS_ENABLED or db.get_bind().dialect.name != "postgresql":
+        return
+
+    ids = list(ids) if ids is not None else None
+    if ids is not None and len(ids) > MAX_IDS_POR_EVENTO:
+        ids = None
+    payload = json.dumps({"w": WORKER_ID, "e": id_empresa, "t": table_name, "i": ids})
+    db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": settings.INVALIDATION_CHANNEL, "payload": payload},
+    )
+
+
+def handle_payload(payload: str) -> None:
+    """Aplica um evento recebido de outro worker nos caches locais."""
+    try:
+        event = json.loads(payload)
+    except ValueError:
+        logger.warning("Evento de invalidação inválido: %r", payload)
+        return
+    if event.get("w") == WORKER_ID:
+        return
+    invalidation.notify_write(event["e"], event["t"], event.get("i"), remote=True)
+
+
+class InvalidationListener:
+    """
+    Thread em segundo plano que faz LISTEN no canal e aplica os eventos.
+    Usa uma conexão própria (fora do pool) em autocommit. Se a conexão cair,
+    reconecta e invalida todos os caches locais, pois eventos podem ter se perdido.
+    """
+
+    def __init__(self, engine: Engine, channel: str, poll_interval: float = 5.0):
+        self.engine = engine
+        self.channel = channel
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="invalidation-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _connect(self):
+        raw = self.engine.raw_connection()
+        raw.detach()  # conexão dedicada: não volta para o pool
+        conn = raw.driver_connection
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        return raw
+
+    def _run(self) -> None:
+        reconectando = False
+        while not self._stop.is_set():
+            try:
+                raw = self._connect()
+            except Exception:
+                logger.exception("Falha ao conectar o listener de invalidação")
+                self._stop.wait(self.poll_interval)
+                continue
+
+            if reconectando:
+                invalidation.invalidate_all()
+            reconectando = True
+
+            conn = raw.driver_connection
+            try:
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], self.poll_interval) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        handle_payload(conn.notifies.pop(0).payload)
+            except Exception:
+                logger.exception("Listener de invalidação desconectado; reconectando")
+                self._stop.wait(1.0)
+            finally:
+                try:
+                    raw.close()
+                except Exception:
+                    pass
+
+
+_listener: Optional[InvalidationListener] = None
+
+
+def start_listener(engine: Engine) -> None:
+    """Inicia o listener deste worker (chamado no startup da aplicação; só Postgres)."""
+    global _listener
+    if not settings.INVALIDATION_BUS_ENABLED or engine.dialect.name != "postgresql" or _listener:
+        return
+    _listener = InvalidationListener(engine, settings.INVALIDATION_CHANNEL)
+    _listener.start()
+
+
+def stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
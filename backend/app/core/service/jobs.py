@@ -0,0 +1,211 @@
+import csv
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.api.v1 import filters
+from app.api.v1.model_dispatch import get_registry_entry
+from app.core.config import settings
+from app.core.db import models
+from app.crud import crud_estoque, crud_generic, crud_job
+from app.core.service import invalidation_bus
+
+logger = logging.getLogger(__name__)
+
+# Handlers dos jobs em segundo plano, executados pelo worker (python -m app.worker).
+# Cada handler recebe (db, job, ctx), reporta progresso com ctx.progress() e
+# devolve um JobResult (arquivo opcional, gravado em JOBS_RESULT_DIR).
+
+EXPORT_BATCH_SIZE = 1000
+
+
+class JobCancelled(Exception):
+    """Levantada por ctx.progress() quando o usuário pediu o cancelamento."""
+
+
+@dataclass
+class JobResult:
+    arquivo: Optional[str] = None
+    nome: Optional[str] = None
+    tipo: Optional[str] = None
+    mensagem: Optional[str] = None
+
+
+class JobLost(Exception):
+    """O job voltou para a fila (ficou sem heartbeat) e não pertence mais a esta execução."""
+
+
+@dataclass
+class JobContext:
+    """
+    Progresso e heartbeat de uma execução (worker, tentativas) do job.
+    'db' é uma sessão PRÓPRIA (mesmo engine, outra conexão): o commit do progresso
+    não encerra a transação do handler, que pode estar lendo por um cursor no
+    servidor (yield_per). Uma thread renova o heartbeat a cada JOBS_HEARTBEAT_SECONDS,
+    mesmo quando o handler passa muito tempo sem reportar progresso.
+    """
+    db: Session
+    job_id: int
+    worker: str
+    tentativas: int
+    # Só grava no banco quando o percentual muda (evita um UPDATE por linha)
+    _ultimo: int = field(default=-1, repr=False)
+    _cancelar: bool = field(default=False, repr=False)
+    _perdido: bool = field(default=False, repr=False)
+    # A sessão é compartilhada com a thread do heartbeat
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    _stop: threading.Event = field(default_factory=threading.Event, repr=False)
+    _thread: Optional[threading.Thread] = field(default=None, repr=False)
+
+    def _owner(self) -> Dict[str, Any]:
+        return {"id": self.job_id, "worker": self.worker, "tentativas": self.tentativas}
+
+    def _check(self) -> None:
+        if self._perdido:
+            raise JobLost()
+        if self._cancelar:
+            raise JobCancelled()
+
+    def _apply(self, cancelar: Optional[bool]) -> None:
+        if cancelar is None:
+            self._perdido = True
+        elif cancelar:
+            self._cancelar = True
+
+    def progress(self, progresso: int, mensagem: Optional[str] = None) -> None:
+        self._check()
+        if progresso == self._ultimo and mensagem is None:
+            return
+        self._ultimo = progresso
+        with self._lock:
+            self._apply(crud_job.update_progress(self.db, progresso=progresso, mensagem=mensagem, **self._owner()))
+        self._check()
+
+    def _heartbeat_loop(self) -> None:
+        while not self._stop.wait(settings.JOBS_HEARTBEAT_SECONDS):
+            try:
+                with self._lock:
+                    self._apply(crud_job.heartbeat(self.db, **self._owner()))
+            except Exception:
+                logger.warning("Falha no heartbeat do job %s", self.job_id, exc_info=True)
+                with self._lock:
+                    self.db.rollback()
+            if self._perdido:
+                return
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._heartbeat_loop, name=f"job-heartbeat-{self.job_id}", daemon=True
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.db.close()
+
+    def result_path(self, extensao: str) -> str:
+        os.makedirs(settings.JOBS_RESULT_DIR, exist_ok=True)
+        return os.path.join(settings.JOBS_RESULT_DIR, f"job_{self.job_id}.{extensao}")
+
+
+def exportar_csv(db: Session, job: models.Job, ctx: JobContext) -> JobResult:
+    """Mesmo CSV de GET /generic/{model}/export, gravado em disco em lotes."""
+    params = job.parametros or {}
+    model_name = params.get("model_name")
+    registry = get_registry_entry(model_name) if model_name else None
+    if not registry:
+        raise ValueError(f"Model not found: {model_name}")
+
+    model = registry["model"]
+    query = crud_generic.filtered_query(
+        db, model=model, id_empresa=job.id_empresa,
+        search_term=params.get("search_term"), situacao=params.get("situacao"),
+        filters=filters.compile_filters(model, params.get("filtros") or {})
+    )
+    total = query.order_by(None).count() or 1
+    headers = crud_generic.export_headers(model)
+
+    path = ctx.result_path("csv")
+    # Temporário por execução: uma execução que perdeu o job não escreve no mesmo arquivo
+    tmp_path = f"{path}.{ctx.tentativas}.tmp"
+    try:
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(headers)
+            # yield_per: lê em lotes sem carregar a tabela inteira na memória
+            for n, item in enumerate(query.order_by(model.id).yield_per(EXPORT_BATCH_SIZE), start=1):
+                writer.writerow([getattr(item, h, "") for h in headers])
+                if n % EXPORT_BATCH_SIZE == 0:
+                    ctx.progress(min(99, n * 100 // total))
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return JobResult(
+        arquivo=path,
+        nome=f"{model_name}_export_{job.id_empresa}.csv",
+        tipo="text/csv",
+    )
+
+
+def reconstruir_saldos(db: Session, job: models.Job, ctx: JobContext) -> JobResult:
+    """Recalcula saldo_estoque do tenant (ver app/utils/saldo_estoque.py)."""
+    ctx.progress(10, "Reconstruindo saldos")
+    crud_estoque.reconstruir_saldos(db, id_empresa=job.id_empresa)
+    # Os caches das APIs guardam saldos: avisa os workers (NOTIFY vai no COMMIT)
+    invalidation_bus.publish(db, id_empresa=job.id_empresa, table_name=models.SaldoEstoque.__tablename__)
+    db.commit()
+    return JobResult(mensagem="Saldos reconstruídos")
+
+
+HANDLERS: Dict[str, Callable[[Session, models.Job, JobContext], JobResult]] = {
+    "exportar_csv": exportar_csv,
+    "reconstruir_saldos": reconstruir_saldos,
+}
+
+
+def run_job(db: Session, job: models.Job) -> None:
+    """Executa um job já reservado (claim_next) e grava o desfecho."""
+    owner = {"id": job.id, "worker": job.worker, "tentativas": job.tentativas}
+    handler = HANDLERS.get(job.tipo)
+    if handler is None:
+        crud_job.fail(db, mensagem=f"Tipo de job desconhecido: {job.tipo}", **owner)
+        return
+
+    ctx = JobContext(
+        db=Session(bind=db.get_bind(), expire_on_commit=False),
+        job_id=job.id, worker=job.worker, tentativas=job.tentativas,
+    )
+    ctx.start()
+    try:
+        try:
+            result = handler(db, job, ctx)
+        except JobLost:
+            db.rollback()
+            logger.warning("Job %s voltou para a fila durante a execução; resultado descartado", job.id)
+            return
+        except JobCancelled:
+            db.rollback()
+            crud_job.mark_cancelled(db, **owner)
+            logger.info("Job %s cancelado", job.id)
+            return
+        except Exception as e:
+            db.rollback()
+            logger.exception("Job %s (%s) falhou", job.id, job.tipo)
+            crud_job.fail(db, mensagem=str(e) or e.__class__.__name__, **owner)
+            return
+
+        if not crud_job.finish(
+            db, resultado_arquivo=result.arquivo, resultado_nome=result.nome,
+            resultado_tipo=result.tipo, mensagem=result.mensagem, **owner,
+        ):
+            logger.warning("Job %s voltou para a fila durante a execução; resultado descartado", job.id)
+    finally:
+        ctx.close()
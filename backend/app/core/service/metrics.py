@@ -0,0 +1,251 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+# Métricas em memória, por processo (cada worker do uvicorn expõe as suas).
+# Formato de exportação: texto do Prometheus (GET /metrics).
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+SQL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+REQUEST_LABELS = ("method", "route", "model_name")
+
+LabelValues = Tuple[str, ...]
+
+
+class RequestStats:
+    """
+    Acumuladores da requisição atual (preenchidos pelos eventos do SQLAlchemy).
+    Também guarda o escopo ASGI e o tenant, usados para identificar a origem das queries.
+    """
+    __slots__ = ("sql_count", "sql_time", "pool_wait", "scope", "id_empresa")
+
+    def __init__(self, scope=None):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.pool_wait = 0.0
+        self.scope = scope
+        self.id_empresa = None
+
+
+# O contexto é copiado para a threadpool dos endpoints síncronos,
+# então o mesmo objeto é visto pelo middleware e pelas queries.
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pares = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def route_labels(scope: dict) -> tuple:
+    """
+    Rótulos (método, rota, model_name) da requisição.
+    Usa o TEMPLATE da rota (ex: /api/v1/generic/{model_name}) para manter
+    a cardinalidade baixa; as rotas genéricas são separadas por model_name,
+    mas só para modelos registrados (qualquer outro nome vira "other").
+    """
+    # Import local: o registro importa os CRUDs, que dependem do banco (que importa este módulo)
+    from app.api.v1.model_dispatch import get_registry_entry
+
+    route = scope.get("route")
+    path = getattr(route, "path", None) or "unmatched"
+    model_name = scope.get("path_params", {}).get("model_name", "") if route else ""
+    if model_name and get_registry_entry(model_name) is None:
+        model_name = "other"
+    return (scope["method"], path, model_name)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: LabelValues, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> str:
+        linhas = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                linhas.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return "\n".join(linhas)
+
+
+class Gauge:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: LabelValues, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, labels: LabelValues, amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+    def render(self) -> str:
+        linhas = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                linhas.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return "\n".join(linhas)
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [contagem por bucket..., soma, total]
+        self._values: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: LabelValues, value: float) -> None:
+        indice = bisect_left(self.buckets, value)
+        with self._lock:
+            serie = self._values.get(labels)
+            if serie is None:
+                serie = self._values[labels] = [0] * len(self.buckets) + [0.0, 0]
+            if indice < len(self.buckets):
+                serie[indice] += 1
+            serie[-2] += value
+            serie[-1] += 1
+
+    def render(self) -> str:
+        linhas = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, serie in sorted(self._values.items()):
+                acumulado = 0
+                for limite, contagem in zip(self.buckets, serie):
+                    acumulado += contagem
+                    le = _format_labels(self.labelnames, labels, f'le="{limite}"')
+                    linhas.append(f"{self.name}_bucket{le} {acumulado}")
+                le = _format_labels(self.labelnames, labels, 'le="+Inf"')
+                linhas.append(f"{self.name}_bucket{le} {serie[-1]}")
+                base = _format_labels(self.labelnames, labels)
+                linhas.append(f"{self.name}_sum{base} {serie[-2]}")
+                linhas.append(f"{self.name}_count{base} {serie[-1]}")
+        return "\n".join(linhas)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = REQUEST_LABELS) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = REQUEST_LABELS) -> Gauge:
+        metric = Gauge(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self, name: str, documentation: str, buckets: Sequence[float], labelnames: Sequence[str] = REQUEST_LABELS
+    ) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+registry = MetricsRegistry()
+
+REQUESTS_TOTAL = registry.counter(
+    "http_requests_total", "Requisições HTTP por rota e status.", REQUEST_LABELS + ("status",)
+)
+REQUEST_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "Latência das requisições HTTP.", LATENCY_BUCKETS
+)
+RESPONSE_SIZE = registry.histogram(
+    "http_response_size_bytes", "Tamanho do corpo das respostas HTTP.", SIZE_BUCKETS
+)
+SQL_STATEMENTS = registry.histogram(
+    "http_request_sql_statements", "Quantidade de comandos SQL por requisição.", SQL_COUNT_BUCKETS
+)
+SQL_DURATION = registry.histogram(
+    "http_request_sql_duration_seconds", "Tempo gasto em SQL por requisição.", LATENCY_BUCKETS
+)
+POOL_WAIT = registry.histogram(
+    "http_request_pool_wait_seconds", "Tempo esperando conexão do pool por requisição.", LATENCY_BUCKETS
+)
+CACHE_REQUESTS = registry.counter(
+    "cache_requests_total", "Consultas aos caches de resposta (hit/miss).", ("cache", "result")
+)
+ADMISSION_IN_FLIGHT = registry.gauge(
+    "admission_in_flight_requests", "Requisições em execução por classe de endpoint.", ("endpoint_class",)
+)
+ADMISSION_WAITING = registry.gauge(
+    "admission_waiting_requests", "Requisições na fila de admissão por classe de endpoint.", ("endpoint_class",)
+)
+ADMISSION_WAIT = registry.histogram(
+    "admission_wait_seconds", "Espera na fila de admissão.", LATENCY_BUCKETS, ("endpoint_class",)
+)
+ADMISSION_REJECTED = registry.counter(
+    "admission_rejected_total", "Requisições recusadas (429) pelo controle de admissão.",
+    ("endpoint_class", "limit")
+)
+
+
+# --- Integração com o SQLAlchemy ---
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool que contabiliza o tempo para obter uma conexão (espera + conexão nova)."""
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            stats = request_stats.get()
+            if stats is not None:
+                stats.pool_wait += time.perf_counter() - inicio
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Registra os eventos de cursor que alimentam a contagem e o tempo de SQL da requisição."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        inicio = conn.info["query_start_time"].pop()
+        stats = request_stats.get()
+        if stats is not None:
+            stats.sql_count += 1
+            stats.sql_time += time.perf_counter() - inicio
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        # Comando com erro não dispara 'after_cursor_execute': descarta o início pendente
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start_time"):
+            conn.info["query_start_time"].pop()
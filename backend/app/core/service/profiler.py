@@ -0,0 +1,139 @@
+import random
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.service.metrics import request_stats, route_labels
+
+# Tamanho máximo dos textos guardados por entrada (SQL, parâmetros)
+MAX_TEXT_LENGTH = 10_000
+
+# EXPLAIN ANALYZE executa a query de novo: só leituras puras são explicadas.
+# Fora: CTEs que alteram dados, SELECT ... INTO, travas de linha e funções com
+# efeito colateral (sequências, NOTIFY, advisory locks, set_config...).
+EXPLAINABLE_PREFIXES = ("SELECT", "WITH")
+SIDE_EFFECT_PATTERN = re.compile(
+    r"\b(INSERT|UPDATE|DELETE|MERGE|INTO|FOR\s+(NO\s+KEY\s+)?UPDATE|FOR\s+(KEY\s+)?SHARE"
+    r"|NEXTVAL|SETVAL|PG_NOTIFY|PG_(TRY_)?ADVISORY\w*|SET_CONFIG|LO_\w+|DBLINK\w*"
+    r"|PG_CANCEL_BACKEND|PG_TERMINATE_BACKEND)\b",
+    re.IGNORECASE,
+)
+
+
+class SlowQueryLog:
+    """Buffer circular (em memória, por worker) das últimas queries lentas."""
+
+    def __init__(self, maxlen: int):
+        self._entries = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries.append(entry)
+
+    def list(self, id_empresa: int) -> List[Dict[str, Any]]:
+        """Entradas da empresa, da mais recente para a mais antiga."""
+        with self._lock:
+            return [entry for entry in reversed(self._entries) if entry.get("id_empresa") == id_empresa]
+
+    def clear(self, id_empresa: int) -> None:
+        """Remove só as entradas da empresa (o buffer é compartilhado pelo worker)."""
+        with self._lock:
+            mantidas = [entry for entry in self._entries if entry.get("id_empresa") != id_empresa]
+            self._entries.clear()
+            self._entries.extend(mantidas)
+
+
+slow_query_log = SlowQueryLog(settings.SLOW_QUERY_BUFFER_SIZE)
+
+
+def _truncate(value: Any) -> str:
+    text = str(value)
+    return text if len(text) <= MAX_TEXT_LENGTH else text[:MAX_TEXT_LENGTH] + "..."
+
+
+def is_explainable(statement: str) -> bool:
+    """Leitura sem efeitos colaterais, que pode ser re-executada pelo EXPLAIN ANALYZE."""
+    return (
+        statement.lstrip().upper().startswith(EXPLAINABLE_PREFIXES)
+        and SIDE_EFFECT_PATTERN.search(statement) is None
+    )
+
+
+def _explain(cursor, statement: str, parameters) -> str:
+    """
+    Roda EXPLAIN (ANALYZE, BUFFERS) no mesmo cursor/transação da query lenta.
+    Usa um SAVEPOINT para que uma falha no EXPLAIN não aborte a transação da requisição;
+    qualquer erro (inclusive no próprio SAVEPOINT) vira texto no log, nunca sobe.
+    """
+    explain_cursor = None
+    try:
+        explain_cursor = cursor.connection.cursor()
+        explain_cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            explain_cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+            plano = "\n".join(row[0] for row in explain_cursor.fetchall())
+            explain_cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            return plano
+        except Exception:
+            explain_cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            raise
+    except Exception as e:
+        return f"EXPLAIN falhou: {e}"
+    finally:
+        if explain_cursor is not None:
+            explain_cursor.close()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Registra os eventos que alimentam o log de queries lentas.
+    Só é chamado quando SLOW_QUERY_LOG_ENABLED=true (sem custo quando desligado).
+    """
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS / 1000
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duracao = time.perf_counter() - conn.info["slow_query_start_time"].pop()
+        if duracao < threshold:
+            return
+
+        stats = request_stats.get()
+        method, route, model_name = route_labels(stats.scope) if stats and stats.scope else ("", "", "")
+
+        plano = None
+        explicavel = (
+            not executemany
+            and conn.dialect.name == "postgresql"
+            and is_explainable(statement)
+        )
+        if explicavel and random.random() < settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE:
+            plano = _explain(cursor, statement, parameters)
+
+        slow_query_log.add({
+            "registrado_em": datetime.now(timezone.utc),
+            "duracao_ms": round(duracao * 1000, 2),
+            "sql": _truncate(statement),
+            "parametros": _truncate(parameters),
+            "plano": plano,
+            "model_name": model_name or None,
+            "id_empresa": stats.id_empresa if stats else None,
+            "endpoint": f"{method} {route}".strip() or None,
+        })
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("slow_query_start_time"):
+            conn.info["slow_query_start_time"].pop()
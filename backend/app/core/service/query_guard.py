@@ -0,0 +1,96 @@
+import logging
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Controle das queries de uma requisição HTTP (ver app/core/middleware/query_guard.py):
+# - statement_timeout por classe de endpoint, aplicado com SET LOCAL em cada transação
+#   das sessões do get_db (não vale para o worker de jobs, que usa SessionLocal direto);
+# - cancelamento da query em execução quando o cliente desconecta: a conexão DBAPI em
+#   uso é registrada no início de cada transação e recebe cancel() (pg_cancel_backend).
+# Uma conexão cancelada é descartada ao voltar para o pool, para que um cancelamento
+# que chegue atrasado ao servidor não atinja a query de outra requisição.
+
+QUERY_CANCELED_PGCODE = "57014"  # query_canceled: statement_timeout ou cancel()
+
+_cancelled_connections = set()
+_cancelled_lock = threading.Lock()
+
+
+class QueryGuard:
+    """Conexões em uso pelas sessões de UMA requisição e o statement_timeout dela."""
+
+    def __init__(self, statement_timeout_ms: Optional[int] = None):
+        self.statement_timeout_ms = statement_timeout_ms
+        self.cancelled = False
+        self._connections: Dict[int, Any] = {}
+        self._lock = threading.Lock()
+
+    def track(self, session_id: int, dbapi_connection: Any) -> None:
+        with self._lock:
+            self._connections[session_id] = dbapi_connection
+
+    def untrack(self, session_id: int) -> None:
+        with self._lock:
+            self._connections.pop(session_id, None)
+
+    def cancel(self) -> int:
+        """Cancela as queries em execução (bloqueia: chamar fora do event loop). Retorna quantas."""
+        with self._lock:
+            self.cancelled = True
+            cancelled = 0
+            for dbapi_connection in self._connections.values():
+                cancel = getattr(dbapi_connection, "cancel", None)  # psycopg2
+                if cancel is None:
+                    continue
+                with _cancelled_lock:
+                    _cancelled_connections.add(id(dbapi_connection))
+                try:
+                    cancel()
+                    cancelled += 1
+                except Exception:
+                    logger.warning("Falha ao cancelar a query da requisição", exc_info=True)
+            return cancelled
+
+
+current_guard: ContextVar[Optional[QueryGuard]] = ContextVar("query_guard", default=None)
+
+
+def install(session_factory: Any, engine: Engine) -> None:
+    """Registra os eventos de sessão (timeout + registro da conexão) e de pool (descarte)."""
+
+    @event.listens_for(session_factory, "after_begin")
+    def _after_begin(session, transaction, connection):
+        guard: Optional[QueryGuard] = session.info.get("query_guard")
+        if guard is None:
+            return
+        if guard.statement_timeout_ms and connection.dialect.name == "postgresql":
+            # SET LOCAL: vale só até o fim da transação, a conexão volta limpa ao pool
+            connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(guard.statement_timeout_ms)}")
+        guard.track(id(session), connection.connection.dbapi_connection)
+
+    @event.listens_for(session_factory, "after_transaction_end")
+    def _after_transaction_end(session, transaction):
+        guard: Optional[QueryGuard] = session.info.get("query_guard")
+        if guard is not None and transaction.parent is None:
+            guard.untrack(id(session))
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        if dbapi_connection is None:
+            return
+        with _cancelled_lock:
+            if id(dbapi_connection) not in _cancelled_connections:
+                return
+            _cancelled_connections.discard(id(dbapi_connection))
+        connection_record.invalidate()
+
+
+def is_query_canceled(exc: BaseException) -> bool:
+    """Erro do banco causado por statement_timeout ou cancelamento."""
+    return getattr(getattr(exc, "orig", None), "pgcode", None) == QUERY_CANCELED_PGCODE
@@ -30,3 +30,13 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
+
+# Ticket do stream SSE (GET /events): JWT curto com este 'scope', aceito só por ele.
+# Vai na query string (o EventSource não envia cabeçalhos) e por isso acaba nos logs
+# de acesso; o token de login, que vale 24 horas, nunca vai na URL.
+EVENTS_TICKET_SCOPE = "events"
+
+def create_events_ticket(data: dict, expires_at: datetime) -> str:
+    """Cria o ticket do stream SSE (mesmos dados do token de login, com scope e validade curta)."""
+    to_encode = {**data, "scope": EVENTS_TICKET_SCOPE, "exp": expires_at}
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
@@ -0,0 +1,144 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, text, and_
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.core.db import models
+
+# Ordenações suportadas para o consumo dos lotes (FIFO)
+# - "lote": pelo código do lote (lotes mais antigos primeiro) e depois pela entrada
+# - "local": pela localização física (depósito > rua > nível), para otimizar a separação
+ORDENACOES_LOTES = {
+    "lote": lambda: (
+        models.Estoque.lote.asc().nulls_last(),
+        models.Estoque.id.asc(),
+    ),
+    "local": lambda: (
+        models.Estoque.deposito.asc().nulls_last(),
+        models.Estoque.rua.asc().nulls_last(),
+        models.Estoque.nivel.asc().nulls_last(),
+        models.Estoque.id.asc(),
+    ),
+}
+
+
+def get_lotes_disponiveis(
+    db: Session,
+    *,
+    id_empresa: int,
+    ids_produto: Iterable[int],
+    estrategia: str = "lote",
+    bloquear: bool = False,
+) -> Dict[int, List[models.Estoque]]:
+    """
+    Carrega, em UMA query, todos os lotes disponíveis dos produtos informados,
+    agrupados por id_produto e já na ordem de consumo da estratégia.
+
+    Com 'bloquear=True' os lotes são travados com FOR UPDATE SKIP LOCKED:
+    lotes que outra transação está programando são simplesmente ignorados,
+    evitando que dois programadores retirem o mesmo saldo.
+    """
+    ids_produto = sorted({i for i in ids_produto if i is not None})
+    lotes_por_produto: Dict[int, List[models.Estoque]] = {i: [] for i in ids_produto}
+    if not ids_produto:
+        return lotes_por_produto
+
+    query = db.query(models.Estoque).filter(
+        models.Estoque.id_empresa == id_empresa,
+        models.Estoque.id_produto.in_(ids_produto),
+        models.Estoque.situacao == models.EstoqueSituacaoEnum.disponivel,
+        models.Estoque.quantidade > 0,
+    ).order_by(models.Estoque.id_produto, *ORDENACOES_LOTES[estrategia]())
+
+    if bloquear:
+        query = query.with_for_update(skip_locked=True)
+
+    for lote in query.all():
+        lotes_por_produto[lote.id_produto].append(lote)
+
+    return lotes_por_produto
+
+
+def baixar_lote(db: Session, *, lote: models.Estoque, quantidade: int) -> models.Estoque:
+    """
+    Decrementa a quantidade de um lote já travado (FOR UPDATE).
+    Não faz commit: quem chama controla a transação.
+    """
+    if quantidade > lote.quantidade:
+        raise ValueError(
+            f"Lote {lote.id} possui apenas {lote.quantidade} unidade(s), solicitado {quantidade}."
+        )
+    lote.quantidade = lote.quantidade - quantidade
+    db.add(lote)
+    return lote
+
+
+# --- Saldo materializado (saldo_estoque) ---
+
+def get_saldos(
+    db: Session,
+    *,
+    id_empresa: int,
+    ids_produto: Iterable[int],
+    situacao: Optional[models.EstoqueSituacaoEnum] = None,
+) -> List[models.SaldoEstoque]:
+    """Busca os saldos de vários produtos de uma vez (lookup pela chave primária)."""
+    ids_produto = sorted(set(ids_produto))
+    if not ids_produto:
+        return []
+    query = db.query(models.SaldoEstoque).filter(
+        models.SaldoEstoque.id_empresa == id_empresa,
+        models.SaldoEstoque.id_produto.in_(ids_produto),
+    )
+    if situacao is not None:
+        query = query.filter(models.SaldoEstoque.situacao == situacao)
+    return query.order_by(models.SaldoEstoque.id_produto, models.SaldoEstoque.situacao).all()
+
+
+def verificar_saldos(db: Session, *, id_empresa: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Compara 'saldo_estoque' com a soma real dos lotes.
+    Retorna as divergências (lista vazia quando está consistente).
+    """
+    reais = db.query(
+        models.Estoque.id_empresa,
+        models.Estoque.id_produto,
+        models.Estoque.situacao,
+        func.sum(models.Estoque.quantidade).label("quantidade"),
+    ).group_by(
+        models.Estoque.id_empresa, models.Estoque.id_produto, models.Estoque.situacao
+    )
+    if id_empresa is not None:
+        reais = reais.filter(models.Estoque.id_empresa == id_empresa)
+    reais = reais.subquery()
+
+    saldo = models.SaldoEstoque
+    condicao_join = and_(
+        saldo.id_empresa == reais.c.id_empresa,
+        saldo.id_produto == reais.c.id_produto,
+        saldo.situacao == reais.c.situacao,
+    )
+    esperado = func.coalesce(reais.c.quantidade, 0)
+    materializado = func.coalesce(saldo.quantidade, 0)
+
+    query = db.query(
+        func.coalesce(saldo.id_empresa, reais.c.id_empresa).label("id_empresa"),
+        func.coalesce(saldo.id_produto, reais.c.id_produto).label("id_produto"),
+        func.coalesce(saldo.situacao, reais.c.situacao).label("situacao"),
+        materializado.label("saldo"),
+        esperado.label("esperado"),
+    ).select_from(saldo).join(reais, condicao_join, full=True).filter(materializado != esperado)
+    if id_empresa is not None:
+        query = query.filter(func.coalesce(saldo.id_empresa, reais.c.id_empresa) == id_empresa)
+
+    return [dict(row._mapping) for row in query.all()]
+
+
+def reconstruir_saldos(db: Session, *, id_empresa: Optional[int] = None) -> None:
+    """
+    Recalcula 'saldo_estoque' a partir dos lotes, em uma transação.
+    A tabela 'estoque' fica em SHARE MODE durante o recálculo para que
+    nenhuma escrita concorrente se perca entre o DELETE e o INSERT.
+    """
+    db.execute(text("LOCK TABLE estoque IN SHARE MODE"))
+    db.execute(text(models.SALDO_ESTOQUE_REBUILD_SQL), {"id_empresa": id_empresa})
+    db.commit()
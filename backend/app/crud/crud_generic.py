@@ -1,10 +1,27 @@
+import re
 from sqlalchemy.orm import Session
-from typing import List, Optional, Type, Any
+from sqlalchemy import insert, update as sql_update, delete as sql_delete, select, text, tuple_, or_, cast, func, String
+from sqlalchemy.orm import Query, aliased
+from datetime import datetime, timedelta
+from typing import List, Optional, Type, Any, Dict, Tuple, Sequence
 from pydantic import BaseModel
+from app.core.config import settings
 from app.core.db.database import Base
+from app.core.db import models
+from app.core.service import invalidation_bus
 
 ModelType = Type[Base] # Tipo para o modelo SQLAlchemy
 
+# Cada escrita é UM comando (INSERT/UPDATE/DELETE ... RETURNING) + COMMIT:
+# o RETURNING devolve a linha completa (inclusive defaults do servidor),
+# dispensando o GET prévio e o refresh posterior.
+# Antes do COMMIT, invalidation_bus.publish enfileira o NOTIFY para os outros workers.
+
+def column_values(model: ModelType, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Mantém apenas as chaves que são colunas da tabela (ignora campos extras do schema)."""
+    columns = model.__table__.columns
+    return {k: v for k, v in data.items() if k in columns and k not in ("id", "id_empresa")}
+
 def get(db: Session, *, model: ModelType, id: int, id_empresa: int) -> Optional[Base]:
     """Busca um item por ID, garantindo que pertença ao id_empresa."""
     return db.query(model).filter(
@@ -12,6 +29,41 @@ def get(db: Session, *, model: ModelType, id: int, id_empresa: int) -> Optional[
         model.id_empresa == id_empresa
     ).first()
 
+Version = Tuple[Any, ...]
+
+def get_version(
+    db: Session, *, model: ModelType, id: int, id_empresa: int, paths: Sequence[Tuple[str, ...]]
+) -> Optional[Version]:
+    """
+    Versão do registro sem carregá-lo: 'atualizado_em' dele e dos registros aninhados
+    na resposta ('paths', ver model_dispatch._version_paths), em um único SELECT por PK.
+    None se o registro não existe no tenant.
+    """
+    columns = [model.atualizado_em]
+    joins = []
+    aliases: Dict[Tuple[str, ...], Any] = {(): model}
+    for path in paths:  # pais sempre antes dos filhos
+        relationship = getattr(aliases[path[:-1]], path[-1])
+        target = aliases[path] = aliased(relationship.property.mapper.class_)
+        joins.append((target, relationship.of_type(target)))
+        columns.append(target.atualizado_em)
+
+    stmt = select(*columns).select_from(model)
+    for target, onclause in joins:
+        stmt = stmt.outerjoin(target, onclause)
+    row = db.execute(stmt.where(model.id == id, model.id_empresa == id_empresa)).first()
+    return tuple(row) if row is not None else None
+
+def instance_version(item: Base, paths: Sequence[Tuple[str, ...]]) -> Version:
+    """Mesma versão de get_version, lida de um registro já carregado (e seus aninhados)."""
+    version = [item.atualizado_em]
+    for path in paths:
+        current = item
+        for key in path:
+            current = getattr(current, key) if current is not None else None
+        version.append(current.atualizado_em if current is not None else None)
+    return tuple(version)
+
 def get_multi(
     db: Session, *, model: ModelType, id_empresa: int, skip: int = 0, limit: int = 100
 ) -> List[Base]:
@@ -20,39 +72,227 @@ def get_multi(
         model.id_empresa == id_empresa
     ).offset(skip).limit(limit).all()
 
+def create_from_values(db: Session, *, model: ModelType, values: Dict[str, Any], id_empresa: int) -> Base:
+    """INSERT ... RETURNING * com o id_empresa injetado."""
+    stmt = insert(model).values(**values, id_empresa=id_empresa).returning(model)
+    db_obj = db.execute(stmt).scalar_one()
+    invalidation_bus.publish(db, id_empresa=id_empresa, table_name=model.__tablename__, ids=[db_obj.id])
+    db.commit()
+    return db_obj
+
 def create(db: Session, *, model: ModelType, obj_in: BaseModel, id_empresa: int) -> Base:
     """
     Cria um novo item, injetando o id_empresa.
     'obj_in' já deve ser um schema Pydantic validado.
     """
-    obj_in_data = obj_in.model_dump()
-    db_obj = model(**obj_in_data, id_empresa=id_empresa)
-    db.add(db_obj)
+    return create_from_values(
+        db, model=model, values=column_values(model, obj_in.model_dump()), id_empresa=id_empresa
+    )
+
+def update_from_values(
+    db: Session, *, model: ModelType, id: int, id_empresa: int, values: Dict[str, Any]
+) -> Optional[Base]:
+    """
+    UPDATE ... WHERE id = :id AND id_empresa = :tenant RETURNING *.
+    Retorna None quando nenhuma linha foi afetada (item inexistente ou de outro tenant).
+    """
+    if not values:
+        return get(db, model=model, id=id, id_empresa=id_empresa)
+
+    stmt = (
+        sql_update(model)
+        .where(model.id == id, model.id_empresa == id_empresa)
+        .values(**values)
+        .returning(model)
+        # Sem populate_existing, um objeto já carregado na sessão (ex: o get do
+        # endpoint) seria devolvido com os valores antigos
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    db_obj = db.execute(stmt).scalar_one_or_none()
+    if db_obj is None:
+        db.rollback()
+        return None
+    invalidation_bus.publish(db, id_empresa=id_empresa, table_name=model.__tablename__, ids=[id])
     db.commit()
-    db.refresh(db_obj)
     return db_obj
 
 def update(
-    db: Session, *, db_obj: Base, obj_in: BaseModel
-) -> Base:
+    db: Session, *, model: ModelType, id: int, id_empresa: int, obj_in: BaseModel
+) -> Optional[Base]:
     """
-    Atualiza um item. O db_obj já deve ter sido validado pelo id_empresa.
-    'obj_in' já deve ser um schema Pydantic validado.
+    Atualiza um item do id_empresa em um único comando.
+    'obj_in' já deve ser um schema Pydantic validado (apenas os campos enviados são gravados).
+    """
+    return update_from_values(
+        db,
+        model=model,
+        id=id,
+        id_empresa=id_empresa,
+        values=column_values(model, obj_in.model_dump(exclude_unset=True)),
+    )
+
+def patch_values(
+    db: Session, *, model: ModelType, ids: List[int], id_empresa: int, values: Dict[str, Any]
+) -> List[Dict[str, Any]]:
     """
-    update_data = obj_in.model_dump(exclude_unset=True)
-    
-    for field, value in update_data.items():
-        setattr(db_obj, field, value)
-            
-    db.add(db_obj)
+    UPDATE ... WHERE id IN (:ids) AND id_empresa = :tenant RETURNING id, <colunas alteradas>.
+    Não carrega o objeto ORM: retorna apenas o id e as colunas gravadas de cada linha afetada.
+    """
+    table = model.__table__
+    stmt = (
+        sql_update(table)
+        .where(table.c.id.in_(ids), table.c.id_empresa == id_empresa)
+        .values(**values)
+        .returning(table.c.id, *(table.c[k] for k in values))
+    )
+    rows = [dict(row._mapping) for row in db.execute(stmt)]
+    if rows:
+        invalidation_bus.publish(
+            db, id_empresa=id_empresa, table_name=model.__tablename__, ids=[row["id"] for row in rows]
+        )
     db.commit()
-    db.refresh(db_obj)
-    return db_obj
+    return rows
 
 def delete(db: Session, *, model: ModelType, id: int, id_empresa: int) -> Optional[Base]:
-    """Deleta um item, garantindo que pertença ao id_empresa."""
-    obj = get(db, model=model, id=id, id_empresa=id_empresa)
-    if obj:
-        db.delete(obj)
-        db.commit()
+    """Deleta um item do id_empresa (DELETE ... RETURNING *). Retorna None se não existir."""
+    stmt = (
+        sql_delete(model)
+        .where(model.id == id, model.id_empresa == id_empresa)
+        .returning(model)
+        # Sem populate_existing, um objeto já carregado na sessão (ex: o get do
+        # endpoint) seria devolvido com os valores antigos
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    obj = db.execute(stmt).scalar_one_or_none()
+    if obj is None:
+        db.rollback()
+        return None
+    # Tombstone para o delta-sync, na mesma transação da exclusão
+    if "id_empresa" in model.__table__.columns:
+        db.execute(insert(models.Exclusao).values(
+            id_empresa=id_empresa, tabela=model.__tablename__, id_registro=id
+        ))
+    invalidation_bus.publish(db, id_empresa=id_empresa, table_name=model.__tablename__, ids=[id])
+    db.commit()
     return obj
+
+# --- Consulta filtrada (listagem, contagem, exportação e job 'exportar_csv') ---
+
+NON_SEARCHABLE_FIELDS = ["id", "id_empresa", "criado_em", "atualizado_em", "senha", "hashed_password"]
+EXPORT_SKIPPED_FIELDS = ["id_empresa", "hashed_password"]
+
+# Busca só com dígitos e pontuação ('123.456', '(41) 9999'): vai primeiro aos índices
+# de dígitos (models.DIGIT_SEARCH_FIELDS) por prefixo, ignorando a máscara gravada ou
+# digitada. Só se nenhum documento/telefone casar, cai no ILIKE em todas as colunas
+# (ex: inscrição estadual, número do endereço). As duas não vão juntas em um OR: uma
+# condição sem índice já impede o BitmapOr e leva à varredura do tenant inteiro.
+DIGITS_SEARCH = re.compile(r"^[\d\s.\-/()]+$")
+DIGITS_SEARCH_MIN_LENGTH = 3
+
+def digit_search_conditions(model: ModelType, term: Optional[str]) -> Optional[List[Any]]:
+    """Condições de prefixo nos campos de documento/telefone, ou None se 'term' não for só dígitos."""
+    fields = models.DIGIT_SEARCH_FIELDS.get(model.__tablename__)
+    if not fields or not term or not DIGITS_SEARCH.match(term):
+        return None
+    digits = re.sub(r"\D", "", term)
+    if len(digits) < DIGITS_SEARCH_MIN_LENGTH:
+        return None
+    return [models.digits_only(getattr(model, field)).like(f"{digits}%") for field in fields]
+
+def filtered_query(
+    db: Session, *, model: ModelType, id_empresa: int,
+    search_term: Optional[str] = None, situacao: Optional[str] = None,
+    id_produto: Optional[int] = None, filters: Sequence[Any] = ()
+) -> Query:
+    """
+    Query sem paginação com o filtro de tenant, os atalhos (situacao, id_produto),
+    os predicados estruturados já compilados (app/api/v1/filters.py) e a busca livre.
+    Com busca só de dígitos, roda uma sondagem no índice de dígitos antes de montar a query.
+    """
+    query = db.query(model).filter(model.id_empresa == id_empresa, *filters)
+
+    if situacao and hasattr(model, "situacao"):
+        query = query.filter(model.situacao == situacao)
+
+    # Filtro por ID do Produto (Útil para verificar estoque)
+    if id_produto is not None and hasattr(model, "id_produto"):
+        query = query.filter(model.id_produto == id_produto)
+
+    if search_term:
+        digit_conditions = digit_search_conditions(model, search_term)
+        if digit_conditions:
+            digit_query = query.filter(or_(*digit_conditions))
+            # Sondagem pelo índice (LIMIT 1): com algum documento/telefone, fica só nele
+            if digit_query.with_entities(model.id).limit(1).first() is not None:
+                return digit_query
+
+        search_pattern = f"%{search_term}%"
+        filter_conditions = [
+            func.unaccent(cast(getattr(model, col.name), String)).ilike(func.unaccent(search_pattern))
+            for col in model.__table__.columns
+            if col.name not in NON_SEARCHABLE_FIELDS
+        ]
+        if filter_conditions:
+            query = query.filter(or_(*filter_conditions))
+
+    return query
+
+def export_headers(model: ModelType) -> List[str]:
+    """Colunas do CSV (sem os campos internos)."""
+    return [col.name for col in model.__table__.columns if col.name not in EXPORT_SKIPPED_FIELDS]
+
+# --- Delta-sync (GET /generic/{model}/changes) ---
+# Watermark = (carimbo, id) do último item entregue; a comparação por tupla com
+# ORDER BY (carimbo, id) usa os índices (id_empresa, atualizado_em, id) e
+# (id_empresa, tabela, excluido_em, id).
+
+# atualizado_em/excluido_em recebem clock_timestamp() (models.clock_timestamp), o relógio
+# no momento da escrita; mas uma transação que já escreveu pode confirmar depois linhas
+# com carimbo anterior ao que já foi entregue. O horizonte fica antes do início da
+# transação aberta mais antiga que JÁ ESCREVEU (backend_xid: o Postgres só atribui um
+# xid na primeira escrita), e nunca depois de now() - CHANGES_SAFETY_LAG_SECONDS.
+# Leituras longas (exportações, relatórios) de qualquer tenant não seguram o horizonte:
+# quando escreverem, os carimbos serão do momento da escrita. O atraso cobre o instante
+# entre o cálculo do carimbo e a atribuição do xid.
+CHANGES_HORIZON_SQL = text("""
+SELECT LEAST(
+    now() - make_interval(secs => :lag),
+    (SELECT min(xact_start) FROM pg_stat_activity
+     WHERE datname = current_database()
+       AND pid <> pg_backend_pid()
+       AND backend_xid IS NOT NULL
+       AND state <> 'idle in transaction (aborted)')
+)
+""")
+
+def changes_horizon(db: Session) -> datetime:
+    """Carimbo até o qual nenhuma transação em andamento pode mais gravar linhas."""
+    if db.get_bind().dialect.name != "postgresql":
+        return db.scalar(select(func.now())) - timedelta(seconds=settings.CHANGES_SAFETY_LAG_SECONDS)
+    return db.scalar(CHANGES_HORIZON_SQL, {"lag": settings.CHANGES_SAFETY_LAG_SECONDS})
+
+def get_changes(
+    db: Session, *, model: ModelType, id_empresa: int,
+    since: Optional[Tuple[datetime, int]], until: datetime, limit: int
+) -> List[Base]:
+    """Itens criados/alterados após 'since' e até 'until', em ordem (atualizado_em, id)."""
+    query = db.query(model).filter(model.id_empresa == id_empresa, model.atualizado_em <= until)
+    if since is not None:
+        query = query.filter(tuple_(model.atualizado_em, model.id) > tuple_(*since))
+    return query.order_by(model.atualizado_em, model.id).limit(limit).all()
+
+def get_tombstones(
+    db: Session, *, model: ModelType, id_empresa: int,
+    since: Optional[Tuple[datetime, int]], until: datetime, limit: int
+) -> List[Tuple[int, datetime, int]]:
+    """Exclusões após 'since' e até 'until': (id do tombstone, excluido_em, id do registro)."""
+    exclusao = models.Exclusao
+    stmt = select(exclusao.id, exclusao.excluido_em, exclusao.id_registro).where(
+        exclusao.id_empresa == id_empresa,
+        exclusao.tabela == model.__tablename__,
+        exclusao.excluido_em <= until,
+    )
+    if since is not None:
+        stmt = stmt.where(tuple_(exclusao.excluido_em, exclusao.id) > tuple_(*since))
+    stmt = stmt.order_by(exclusao.excluido_em, exclusao.id).limit(limit)
+    return [tuple(row) for row in db.execute(stmt)]
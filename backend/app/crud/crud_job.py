@@ -0,0 +1,204 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import update as sql_update
+from sqlalchemy.orm import Session
+
+from app.core.db import models
+
+# Fila de jobs na própria tabela 'jobs' (sem broker externo).
+# Vários workers disputam a fila com SELECT ... FOR UPDATE SKIP LOCKED: cada um
+# pega o próximo job pendente que ninguém travou, sem esperar nem duplicar.
+# O worker renova atualizado_em (heartbeat) a cada JOBS_HEARTBEAT_SECONDS enquanto o
+# job roda; jobs 'executando' sem heartbeat há JOBS_STALE_SECONDS voltam para a fila
+# (worker morreu) até JOBS_MAX_TENTATIVAS. Toda escrita de quem executa é condicionada
+# a (worker, tentativas) da reserva: uma execução que perdeu o job não o sobrescreve.
+
+JobSituacao = models.JobSituacaoEnum
+
+
+def enqueue(
+    db: Session, *, tipo: str, parametros: Dict[str, Any], id_empresa: int, id_usuario: Optional[int] = None
+) -> models.Job:
+    job = models.Job(
+        tipo=tipo,
+        parametros=parametros,
+        situacao=JobSituacao.pendente,
+        progresso=0,
+        cancelar=False,
+        tentativas=0,
+        id_empresa=id_empresa,
+        id_usuario=id_usuario,
+    )
+    db.add(job)
+    db.commit()
+    return job
+
+
+def get_job(db: Session, *, id: int, id_empresa: int) -> Optional[models.Job]:
+    """Busca um job, garantindo que pertença ao id_empresa."""
+    return db.query(models.Job).filter(
+        models.Job.id == id,
+        models.Job.id_empresa == id_empresa
+    ).first()
+
+
+def list_jobs(db: Session, *, id_empresa: int, limit: int = 50) -> List[models.Job]:
+    """Jobs mais recentes do tenant (índice (id_empresa, id))."""
+    return db.query(models.Job).filter(
+        models.Job.id_empresa == id_empresa
+    ).order_by(models.Job.id.desc()).limit(limit).all()
+
+
+def requeue_stale(db: Session, *, stale_seconds: int, max_tentativas: int) -> int:
+    """
+    Devolve à fila os jobs 'executando' sem heartbeat (o worker morreu no meio).
+    Os que já esgotaram as tentativas viram 'erro'. Retorna quantos foram afetados.
+    """
+    limite = datetime.now(timezone.utc) - timedelta(seconds=stale_seconds)
+    travados = (
+        models.Job.situacao == JobSituacao.executando,
+        models.Job.atualizado_em < limite,
+    )
+    esgotados = db.execute(
+        sql_update(models.Job)
+        .where(*travados, models.Job.tentativas >= max_tentativas)
+        .values(situacao=JobSituacao.erro, mensagem="Worker interrompido", finalizado_em=datetime.now(timezone.utc))
+    ).rowcount
+    devolvidos = db.execute(
+        sql_update(models.Job)
+        .where(*travados)
+        .values(situacao=JobSituacao.pendente, worker=None)
+    ).rowcount
+    db.commit()
+    return esgotados + devolvidos
+
+
+def claim_next(db: Session, *, worker: str) -> Optional[models.Job]:
+    """
+    Trava e marca como 'executando' o próximo job pendente (FIFO).
+    FOR UPDATE SKIP LOCKED: workers concorrentes pulam as linhas já travadas.
+    """
+    job = (
+        db.query(models.Job)
+        .filter(models.Job.situacao == JobSituacao.pendente)
+        .order_by(models.Job.id)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if job is None:
+        db.rollback()
+        return None
+
+    if job.cancelar:
+        job.situacao = JobSituacao.cancelado
+        job.finalizado_em = datetime.now(timezone.utc)
+        db.commit()
+        return None
+
+    job.situacao = JobSituacao.executando
+    job.worker = worker
+    job.tentativas += 1
+    job.iniciado_em = datetime.now(timezone.utc)
+    job.atualizado_em = datetime.now(timezone.utc)
+    db.commit()
+    return job
+
+
+def _owned(id: int, worker: str, tentativas: int) -> tuple:
+    """WHERE do job ainda reservado por esta execução (não devolvido nem reservado de novo)."""
+    return (
+        models.Job.id == id,
+        models.Job.worker == worker,
+        models.Job.tentativas == tentativas,
+        models.Job.situacao == JobSituacao.executando,
+    )
+
+
+def heartbeat(db: Session, *, id: int, worker: str, tentativas: int) -> Optional[bool]:
+    """
+    Renova o heartbeat em um UPDATE ... RETURNING.
+    Retorna se o cancelamento foi pedido, ou None se o job não é mais desta execução.
+    """
+    cancelar = db.execute(
+        sql_update(models.Job)
+        .where(*_owned(id, worker, tentativas))
+        .values(atualizado_em=datetime.now(timezone.utc))
+        .returning(models.Job.cancelar)
+    ).scalar_one_or_none()
+    db.commit()
+    return cancelar
+
+
+def update_progress(
+    db: Session, *, id: int, worker: str, tentativas: int, progresso: int, mensagem: Optional[str] = None
+) -> Optional[bool]:
+    """
+    Grava o progresso (0-100) e o heartbeat em um UPDATE ... RETURNING.
+    Retorna se o cancelamento foi pedido, ou None se o job não é mais desta execução.
+    """
+    values: Dict[str, Any] = {"progresso": max(0, min(100, progresso)), "atualizado_em": datetime.now(timezone.utc)}
+    if mensagem is not None:
+        values["mensagem"] = mensagem
+    cancelar = db.execute(
+        sql_update(models.Job)
+        .where(*_owned(id, worker, tentativas))
+        .values(**values)
+        .returning(models.Job.cancelar)
+    ).scalar_one_or_none()
+    db.commit()
+    return cancelar
+
+
+def _finalize(db: Session, *, id: int, worker: str, tentativas: int, **values: Any) -> bool:
+    finalizados = db.execute(
+        sql_update(models.Job)
+        .where(*_owned(id, worker, tentativas))
+        .values(finalizado_em=datetime.now(timezone.utc), atualizado_em=datetime.now(timezone.utc), **values)
+    ).rowcount
+    db.commit()
+    return finalizados > 0
+
+
+def finish(
+    db: Session, *, id: int, worker: str, tentativas: int, resultado_arquivo: Optional[str] = None,
+    resultado_nome: Optional[str] = None, resultado_tipo: Optional[str] = None,
+    mensagem: Optional[str] = None
+) -> bool:
+    """Marca como concluído. False se o job não é mais desta execução (nada é gravado)."""
+    return _finalize(
+        db, id=id, worker=worker, tentativas=tentativas,
+        situacao=JobSituacao.concluido, progresso=100, mensagem=mensagem,
+        resultado_arquivo=resultado_arquivo, resultado_nome=resultado_nome, resultado_tipo=resultado_tipo,
+    )
+
+
+def fail(db: Session, *, id: int, worker: str, tentativas: int, mensagem: str) -> bool:
+    return _finalize(
+        db, id=id, worker=worker, tentativas=tentativas, situacao=JobSituacao.erro, mensagem=mensagem[:1000]
+    )
+
+
+def mark_cancelled(db: Session, *, id: int, worker: str, tentativas: int) -> bool:
+    return _finalize(
+        db, id=id, worker=worker, tentativas=tentativas,
+        situacao=JobSituacao.cancelado, mensagem="Cancelado pelo usuário",
+    )
+
+
+def request_cancel(db: Session, *, id: int, id_empresa: int) -> Optional[models.Job]:
+    """
+    Pede o cancelamento. Jobs pendentes são cancelados na hora; os em execução
+    param no próximo progresso reportado pelo handler.
+    """
+    job = get_job(db, id=id, id_empresa=id_empresa)
+    if job is None:
+        return None
+    if job.situacao == JobSituacao.pendente:
+        job.situacao = JobSituacao.cancelado
+        job.finalizado_em = datetime.now(timezone.utc)
+        job.cancelar = True
+    elif job.situacao == JobSituacao.executando:
+        job.cancelar = True
+    db.commit()
+    return job
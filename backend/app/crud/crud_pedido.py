@@ -0,0 +1,211 @@
+from sqlalchemy.orm import Session
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional
+
+from app.core.db import models
+from app.core.db.schemas import ProgramacaoRequest
+from app.crud import crud_estoque
+
+
+class LoteIndisponivelError(ValueError):
+    """Lote inexistente, sem saldo ou travado por outra programação."""
+
+
+class PedidoNaoProgramavelError(ValueError):
+    """Pedido fora da situação de programação."""
+
+
+SITUACOES_PROGRAMAVEIS = {models.PedidoSituacaoEnum.programacao}
+
+
+def _to_int(value: Any) -> int:
+    try:
+        return int(Decimal(str(value)))
+    except (InvalidOperation, TypeError, ValueError):
+        return 0
+
+
+def _resumo_lote(lote: models.Estoque) -> Dict[str, Any]:
+    return {
+        "id": lote.id,
+        "lote": lote.lote,
+        "deposito": lote.deposito,
+        "rua": lote.rua,
+        "nivel": lote.nivel,
+        "quantidade": lote.quantidade,
+    }
+
+
+def get_pedido(db: Session, *, id: int, id_empresa: int, bloquear: bool = False) -> Optional[models.Pedido]:
+    """Busca o pedido do tenant. Com 'bloquear', trava a linha até o fim da transação."""
+    query = db.query(models.Pedido).filter(
+        models.Pedido.id == id,
+        models.Pedido.id_empresa == id_empresa,
+    )
+    if bloquear:
+        query = query.with_for_update(of=models.Pedido)
+    return query.first()
+
+
+def programar(
+    db: Session, *, pedido: models.Pedido, obj_in: ProgramacaoRequest, id_empresa: int
+) -> Dict[str, Any]:
+    """
+    Calcula (e, se 'obj_in.aplicar', grava) a programação do pedido:
+    quanto de cada linha sai do estoque (e de quais lotes) e quanto vai para produção.
+
+    Tudo roda na mesma transação: os lotes são carregados em uma única query
+    (travados com SKIP LOCKED ao aplicar), as quantidades são baixadas e o
+    pedido é atualizado. O commit fica a cargo de quem chama.
+    """
+    if pedido.situacao not in SITUACOES_PROGRAMAVEIS:
+        raise PedidoNaoProgramavelError(
+            f"Pedido na situação '{pedido.situacao.value}' não pode ser programado."
+        )
+
+    itens: List[Dict[str, Any]] = [dict(item) for item in (pedido.itens or [])]
+
+    if obj_in.aplicar and any(item.get("retiradas") for item in itens):
+        raise LoteIndisponivelError("Este pedido já possui retiradas de estoque programadas.")
+
+    ids_produto = {item.get("id_produto") for item in itens}
+    lotes_por_produto = crud_estoque.get_lotes_disponiveis(
+        db,
+        id_empresa=id_empresa,
+        ids_produto=ids_produto,
+        estrategia=obj_in.estrategia,
+        bloquear=obj_in.aplicar,
+    )
+
+    # Descrições dos produtos também em uma única query (evita um GET por linha no frontend)
+    produtos = {
+        p.id: p for p in db.query(models.Produto).filter(
+            models.Produto.id_empresa == id_empresa,
+            models.Produto.id.in_(list(lotes_por_produto)),
+        ).all()
+    } if lotes_por_produto else {}
+
+    # Saldo restante de cada lote durante a alocação (compartilhado entre linhas do mesmo produto)
+    saldo_lote: Dict[int, int] = {
+        lote.id: lote.quantidade for lotes in lotes_por_produto.values() for lote in lotes
+    }
+    lotes_por_id = {lote.id: lote for lotes in lotes_por_produto.values() for lote in lotes}
+
+    # Quanto o usuário quer produzir por linha: limita a retirada automática
+    produzir_por_linha: Dict[int, int] = {}
+    for item_in in obj_in.itens or []:
+        if item_in.indice >= len(itens):
+            raise ValueError(f"Linha {item_in.indice} não existe no pedido.")
+        produzir_por_linha[item_in.indice] = item_in.numero_a_produzir
+
+    # Retiradas escolhidas manualmente pelo usuário, agrupadas por LINHA do pedido
+    # (duas linhas podem ter o mesmo produto). Lista vazia = sugestão automática.
+    manuais: Optional[Dict[int, List[Dict[str, int]]]] = None
+    if obj_in.retiradas_detalhadas:
+        manuais = {}
+        for retirada in obj_in.retiradas_detalhadas:
+            lote = lotes_por_id.get(retirada.id_estoque_origem)
+            if lote is None:
+                raise LoteIndisponivelError(
+                    f"Lote {retirada.id_estoque_origem} indisponível (sem saldo ou em uso por outra programação)."
+                )
+            if retirada.id_produto is not None and retirada.id_produto != lote.id_produto:
+                raise ValueError(f"Lote {lote.id} não pertence ao produto {retirada.id_produto}.")
+            indice = retirada.indice
+            if indice is None:
+                linhas = [i for i, item in enumerate(itens) if item.get("id_produto") == lote.id_produto]
+                if len(linhas) != 1:
+                    raise ValueError(f"Informe a linha (indice) da retirada do lote {lote.id}.")
+                indice = linhas[0]
+            if indice >= len(itens) or itens[indice].get("id_produto") != lote.id_produto:
+                raise ValueError(f"Lote {lote.id} não pertence ao produto da linha {indice}.")
+            manuais.setdefault(indice, []).append({"id_estoque": lote.id, "quantidade": retirada.quantidade})
+
+    resultado_itens = []
+    for indice, item in enumerate(itens):
+        id_produto = item.get("id_produto")
+        quantidade = _to_int(item.get("quantidade"))
+        lotes = lotes_por_produto.get(id_produto, [])
+        retiradas: List[Dict[str, Any]] = []
+
+        if manuais is None:
+            # Sugestão automática: consome os lotes na ordem FIFO da estratégia,
+            # sem retirar o que o usuário escolheu produzir
+            produzir = min(quantidade, produzir_por_linha.get(indice, 0))
+            falta = quantidade - produzir
+            for lote in lotes:
+                if falta <= 0:
+                    break
+                usar = min(falta, saldo_lote[lote.id])
+                if usar <= 0:
+                    continue
+                saldo_lote[lote.id] -= usar
+                falta -= usar
+                retiradas.append({"id_estoque": lote.id, "quantidade": usar})
+            falta += produzir
+        else:
+            falta = quantidade
+            for pendente in manuais.get(indice, []):
+                usar = pendente["quantidade"]
+                if usar > falta:
+                    raise ValueError(
+                        f"As retiradas da linha {indice} excedem a quantidade do item ({quantidade})."
+                    )
+                if usar > saldo_lote[pendente["id_estoque"]]:
+                    raise LoteIndisponivelError(
+                        f"Lote {pendente['id_estoque']} não possui saldo suficiente."
+                    )
+                saldo_lote[pendente["id_estoque"]] -= usar
+                falta -= usar
+                retiradas.append({"id_estoque": pendente["id_estoque"], "quantidade": usar})
+
+        numero_a_retirar = quantidade - falta
+        produto = produtos.get(id_produto)
+        resultado_itens.append({
+            "indice": indice,
+            "id_produto": id_produto,
+            "descricao": f"{produto.sku} - {produto.descricao}" if produto else item.get("descricao"),
+            "quantidade": quantidade,
+            "numero_a_retirar": numero_a_retirar,
+            "numero_a_produzir": quantidade - numero_a_retirar,
+            "retiradas": [
+                {
+                    "id_estoque_origem": r["id_estoque"],
+                    "id_produto": id_produto,
+                    "quantidade": r["quantidade"],
+                    "lote": lotes_por_id[r["id_estoque"]].lote,
+                    "deposito": lotes_por_id[r["id_estoque"]].deposito,
+                }
+                for r in retiradas
+            ],
+            "lotes_disponiveis": [_resumo_lote(lote) for lote in lotes],
+        })
+
+    if obj_in.aplicar:
+        for resultado in resultado_itens:
+            for retirada in resultado["retiradas"]:
+                crud_estoque.baixar_lote(
+                    db,
+                    lote=lotes_por_id[retirada["id_estoque_origem"]],
+                    quantidade=retirada["quantidade"],
+                )
+            item = itens[resultado["indice"]]
+            item["numero_a_retirar"] = resultado["numero_a_retirar"]
+            item["numero_a_produzir"] = resultado["numero_a_produzir"]
+            item["retiradas"] = resultado["retiradas"]
+
+        # Atribui uma NOVA lista para o SQLAlchemy detectar a alteração da coluna JSON
+        pedido.itens = itens
+        pedido.situacao = models.PedidoSituacaoEnum.producao
+        if obj_in.data_finalizacao is not None:
+            pedido.data_finalizacao = obj_in.data_finalizacao
+        if obj_in.ordem_finalizacao is not None:
+            pedido.ordem_finalizacao = obj_in.ordem_finalizacao
+        db.add(pedido)
+
+    return {
+        "id_pedido": pedido.id,
+        "aplicado": obj_in.aplicar,
+        "situacao": pedido.situacao,
+        "itens": resultado_itens,
+    }
@@ -1,9 +1,10 @@
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 from app.core.db import models
 from app.core.db.schemas import  UsuarioCreate,  UsuarioUpdate
 from app.core.service.security import get_password_hash, verify_password
+from app.crud import crud_generic
 
 # Nota: Todas as funções recebem 'db: Session' como primeiro argumento.
 
@@ -16,21 +17,14 @@ def get_user(db: Session, user_id: int) -> Optional[models. Usuario]:
     return db.query(models. Usuario).filter(models. Usuario.id == user_id).first()
 
 def create_user(db: Session, *, obj_in:  UsuarioCreate, id_empresa: int) -> models. Usuario:
-    """Cria um novo usuário no banco de dados."""
-    senha = get_password_hash(obj_in.senha)
-    
-    # Cria o dict de dados, excluindo a senha plana
-    db_obj_data = obj_in.model_dump(exclude={"senha"})
-    
-    db_user = models. Usuario(
-        **db_obj_data,
-        senha=senha,
-        id_empresa=id_empresa
+    """Cria um novo usuário no banco de dados (INSERT ... RETURNING *)."""
+    # Cria o dict de dados, trocando a senha plana pelo hash
+    db_obj_data = crud_generic.column_values(models.Usuario, obj_in.model_dump(exclude={"senha"}))
+    db_obj_data["senha"] = get_password_hash(obj_in.senha)
+
+    return crud_generic.create_from_values(
+        db, model=models.Usuario, values=db_obj_data, id_empresa=id_empresa
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
 
 def authenticate_user(db: Session, email: str, senha: str) -> Optional[models. Usuario]:
     """
@@ -43,24 +37,61 @@ def authenticate_user(db: Session, email: str, senha: str) -> Optional[models. U
         return None
     return user
 
-def update_user(db: Session, *, db_obj: models. Usuario, obj_in:  UsuarioUpdate) -> models. Usuario:
-    """Atualiza um usuário."""
+def update_user(
+    db: Session, *, id: int, id_empresa: int, obj_in:  UsuarioUpdate
+) -> Optional[models. Usuario]:
+    """Atualiza um usuário do id_empresa em um único comando (UPDATE ... RETURNING *)."""
     update_data = obj_in.model_dump(exclude_unset=True)
 
-    # Se uma nova senha foi fornecida, hasheia ela
-    if "senha" in update_data and update_data["senha"]:
-        senha = get_password_hash(update_data["senha"])
-        db_obj.senha = senha
-        del update_data["senha"] # Remove para não tentar setar duas vezes
+    # Se uma nova senha foi fornecida, hasheia ela; senha vazia não altera a atual
+    senha = update_data.pop("senha", None)
+    update_data = crud_generic.column_values(models.Usuario, update_data)
+    if senha:
+        update_data["senha"] = get_password_hash(senha)
+
+    return crud_generic.update_from_values(
+        db, model=models.Usuario, id=id, id_empresa=id_empresa, values=update_data
+    )
+
+def patch_user(
+    db: Session, *, ids: List[int], id_empresa: int, values: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """
+    PATCH de usuários: hasheia a senha e nunca a devolve na resposta.
+    Senha vazia não altera a atual; se era o único campo, ValueError (nada a atualizar).
+    """
+    values = dict(values)
+    senha = values.pop("senha", None)
+    if senha:
+        values["senha"] = get_password_hash(senha)
+    if not values:
+        raise ValueError("Nenhum campo válido para atualizar")
+
+    rows = crud_generic.patch_values(db, model=models.Usuario, ids=ids, id_empresa=id_empresa, values=values)
+    for row in rows:
+        row.pop("senha", None)
+    return rows
+
+# --- Interface do CRUD genérico (usada pelo registro de modelos para "usuarios") ---
+
+def get(db: Session, *, model=models.Usuario, id: int, id_empresa: int) -> Optional[models. Usuario]:
+    return crud_generic.get(db, model=models.Usuario, id=id, id_empresa=id_empresa)
+
+def create(db: Session, *, model=models.Usuario, obj_in:  UsuarioCreate, id_empresa: int) -> models. Usuario:
+    return create_user(db, obj_in=obj_in, id_empresa=id_empresa)
+
+def update(
+    db: Session, *, model=models.Usuario, id: int, id_empresa: int, obj_in:  UsuarioUpdate
+) -> Optional[models. Usuario]:
+    return update_user(db, id=id, id_empresa=id_empresa, obj_in=obj_in)
 
-    # Atualiza os outros campos
-    for field, value in update_data.items():
-        setattr(db_obj, field, value)
+def patch_values(
+    db: Session, *, model=models.Usuario, ids: List[int], id_empresa: int, values: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    return patch_user(db, ids=ids, id_empresa=id_empresa, values=values)
 
-    db.add(db_obj)
-    db.commit()
-    db.refresh(db_obj)
-    return db_obj
+def get_changes(db: Session, *, model=models.Usuario, **kwargs) -> List[models. Usuario]:
+    return crud_generic.get_changes(db, model=models.Usuario, **kwargs)
 
-# Adicione outras funções de 'user' aqui se precisar
-# (ex: delete_user, get_users_by_business, etc.)
+def delete(db: Session, *, model=models.Usuario, id: int, id_empresa: int) -> Optional[models. Usuario]:
+    return crud_generic.delete(db, model=models.Usuario, id=id, id_empresa=id_empresa)
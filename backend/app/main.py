@@ -1,7 +1,16 @@
 import os
-from fastapi import FastAPI, Response, status
+from fastapi import Depends, FastAPI, Request, Response, status
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy.exc import OperationalError
+from app.api.dependencies import require_ops_access
 from app.api.v1.api import api_router as v1_router
+from app.core.config import settings
 from app.core.db.database import Base, engine
+from app.core.middleware.admission import AdmissionMiddleware
+from app.core.middleware.compression import CompressionMiddleware
+from app.core.middleware.metrics import MetricsMiddleware
+from app.core.middleware.query_guard import QueryGuardMiddleware
+from app.core.service import metrics, invalidation_bus, query_guard
 from fastapi.middleware.cors import CORSMiddleware
 
 app = FastAPI(title="ERP IntegraAI API")
@@ -10,6 +19,14 @@ app = FastAPI(title="ERP IntegraAI API")
 origins_str = os.getenv("BACKEND_CORS_ORIGINS", "http://localhost:5173,http://127.0.0.1:5173")
 origins = [origin.strip() for origin in origins_str.split(",") if origin]
 
+# statement_timeout por classe de endpoint e cancelamento da query se o cliente desconectar.
+# Dentro da admissão: a vaga só é liberada depois que a query foi cancelada.
+app.add_middleware(QueryGuardMiddleware)
+
+# Limites de requisições simultâneas por tenant/classe de endpoint (429 + Retry-After).
+# Dentro do CORS, para que as respostas 429 também levem os cabeçalhos de CORS.
+app.add_middleware(AdmissionMiddleware)
+
 # Configuracão do CORS
 app.add_middleware(
     CORSMiddleware,
@@ -20,19 +37,48 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compressão (gzip/br/zstd) das respostas JSON/CSV. Dentro do MetricsMiddleware,
+# que assim mede o tamanho efetivamente enviado.
+app.add_middleware(CompressionMiddleware)
+
+# Instrumentação (latência, SQL, pool, tamanho da resposta) por rota.
+# Registrado por último para ser o mais externo e medir a requisição inteira.
+app.add_middleware(MetricsMiddleware)
+
 # Inclui o roteador da v1
 app.include_router(v1_router, prefix="/api/v1")
 
+@app.exception_handler(OperationalError)
+def query_canceled_handler(request: Request, exc: OperationalError):
+    """statement_timeout estourado (ou query cancelada) vira 503; os demais erros seguem como 500."""
+    if not query_guard.is_query_canceled(exc):
+        raise exc
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "A consulta excedeu o tempo limite. Refine os filtros ou use a exportação em segundo plano."},
+    )
+
 @app.on_event("startup")
 def on_startup():
     """Cria as tabelas do banco de dados na inicialização."""
     Base.metadata.create_all(bind=engine)
+    # LISTEN das escritas feitas pelos outros workers (invalida os caches locais)
+    invalidation_bus.start_listener(engine)
+
+@app.on_event("shutdown")
+def on_shutdown():
+    invalidation_bus.stop_listener()
 
 
 @app.get("/")
 def read_root():
     return {"message": "Bem-vindo à API do ERP IntegraAI"}
 
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_ops_access)])
+def read_metrics():
+    """Métricas deste worker no formato texto do Prometheus (ver METRICS_TOKEN)."""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/favicon.ico", include_in_schema=False)
 def favicon():
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,123 @@
+import argparse
+import re
+import statistics
+import sys
+import time
+
+from sqlalchemy import or_, text, func, cast, String
+
+from app.core.db import models
+from app.core.db.database import SessionLocal
+from app.crud import crud_generic
+
+# Compara a busca de cadastros por CPF/CNPJ: ILIKE com unaccent em todas as colunas
+# (busca livre antiga) x índice de dígitos (crud_generic.digit_search_conditions) x a
+# busca livre atual (crud_generic.filtered_query: índice de dígitos, ILIKE só sem
+# resultado). Falha se o plano da busca livre não usar um índice ix_cadastros_*_digitos.
+# Gera os cadastros em uma empresa temporária DENTRO de uma transação que é desfeita
+# no final: nada fica gravado. Uso (a partir da pasta backend, banco Postgres):
+#   python -m app.utils.benchmark_documentos                 -> 1.000.000 cadastros
+#   python -m app.utils.benchmark_documentos --linhas 200000 --repeticoes 50
+
+SEED_SQL = """
+INSERT INTO cadastros (id_empresa, cpf_cnpj, nome_razao, cep, telefone, tipo_pessoa,
+                       tipo_cadastro, indicador_ie, situacao, criado_em, atualizado_em)
+SELECT :id_empresa,
+       regexp_replace(lpad(n::text, 14, '0'), '(\\d{2})(\\d{3})(\\d{3})(\\d{4})(\\d{2})', '\\1.\\2.\\3/\\4-\\5'),
+       'Cliente ' || n,
+       '80000-000',
+       '(41) 9' || lpad((n % 100000000)::text, 8, '0'),
+       'juridica', 'cliente', '9', true, now(), now()
+FROM generate_series(1, :linhas) AS n
+"""
+
+
+def medir(db, query_factory, repeticoes: int) -> dict:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        query_factory().limit(10).all()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return {
+        "p50": statistics.median(tempos),
+        "p95": tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da busca de cadastros por CPF/CNPJ.")
+    parser.add_argument("--linhas", type=int, default=1_000_000, help="Cadastros gerados (padrão: 1.000.000)")
+    parser.add_argument("--repeticoes", type=int, default=20, help="Execuções por consulta")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if db.get_bind().dialect.name != "postgresql":
+            print("O benchmark exige PostgreSQL.", file=sys.stderr)
+            sys.exit(1)
+
+        empresa_id = db.execute(text(
+            "INSERT INTO empresas (cnpj, razao, cep, crt, emissao, situacao) "
+            "VALUES ('99.999.999/9999-99', 'Benchmark', '80000-000', 'simples_nacional', 'desenvolvimento', true) "
+            "RETURNING id"
+        )).scalar_one()
+
+        print(f"Gerando {args.linhas} cadastros...")
+        db.execute(text(SEED_SQL), {"id_empresa": empresa_id, "linhas": args.linhas})
+        db.execute(text("ANALYZE cadastros"))
+
+        model = models.Cadastro
+        termo = "00000000123456"  # CNPJ sem máscara
+        termo_formatado = "00.000.000/1234-56"
+
+        def busca_livre():
+            padrao = f"%{termo_formatado}%"
+            condicoes = [
+                func.unaccent(cast(getattr(model, col.name), String)).ilike(func.unaccent(padrao))
+                for col in model.__table__.columns
+                if col.name not in crud_generic.NON_SEARCHABLE_FIELDS
+            ]
+            return db.query(model).filter(model.id_empresa == empresa_id, or_(*condicoes))
+
+        def busca_digitos(t):
+            return lambda: db.query(model).filter(
+                model.id_empresa == empresa_id, or_(*crud_generic.digit_search_conditions(model, t))
+            )
+
+        cenarios = [
+            ("ILIKE (formatado, antigo)", busca_livre),
+            ("dígitos exato", busca_digitos(termo)),
+            ("dígitos prefixo (8)", busca_digitos(termo[:8])),
+            ("dígitos formatado", busca_digitos(termo_formatado)),
+            ("busca livre (filtered_query)", lambda: crud_generic.filtered_query(
+                db, model=model, id_empresa=empresa_id, search_term=termo_formatado
+            )),
+        ]
+        print(f"\n{'consulta':<32}{'p50 (ms)':>12}{'p95 (ms)':>12}")
+        for nome, factory in cenarios:
+            r = medir(db, factory, args.repeticoes)
+            print(f"{nome:<32}{r['p50']:>12.2f}{r['p95']:>12.2f}")
+
+        # Plano da busca livre como o endpoint a executa (listagem/contagem/exportação)
+        busca = crud_generic.filtered_query(
+            db, model=model, id_empresa=empresa_id, search_term=termo_formatado
+        ).limit(10)
+        compilada = busca.statement.compile(dialect=db.get_bind().dialect)
+        plano = [row[0] for row in db.connection().exec_driver_sql(f"EXPLAIN {compilada}", compilada.params)]
+        print("\nPlano (busca livre, CNPJ formatado):")
+        print("\n".join(plano))
+        if not any(re.search(r"ix_cadastros_\w+_digitos", linha) for linha in plano):
+            print("\nA busca livre por dígitos não usou o índice ix_cadastros_*_digitos.", file=sys.stderr)
+            sys.exit(1)
+
+    except KeyboardInterrupt:
+        print("\nOperação cancelada pelo usuário.")
+        sys.exit(130)
+    finally:
+        # Nada do benchmark fica no banco
+        db.rollback()
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import argparse
+import json
+import statistics
+import time
+
+from app.api.v1.model_dispatch import get_registry_entry
+
+# Compara a validação do corpo de POST /generic/pedidos com 200 linhas:
+# caminho antigo (FastAPI faz json.loads em um dict e o endpoint valida de novo com
+# CreateSchema(**dict)) x validador do registro (model_validate_json direto dos bytes).
+# Não usa o banco. Uso (a partir da pasta backend):
+#   python -m app.utils.benchmark_validacao
+#   python -m app.utils.benchmark_validacao --linhas 500 --repeticoes 2000
+
+
+def gerar_pedido(linhas: int) -> bytes:
+    itens = [
+        {
+            "id_produto": i,
+            "descricao": f"SKU-{i:05d} - Produto de teste {i}",
+            "quantidade": (i % 17) + 1,
+            "valor_unitario": f"{(i % 100) + 9.9:.2f}",
+            "desconto": "0.00",
+            "subtotal": f"{((i % 17) + 1) * ((i % 100) + 9.9):.2f}",
+            "ncm": "73181500",
+            "cfop": "5102",
+        }
+        for i in range(1, linhas + 1)
+    ]
+    pedido = {
+        "data_emissao": "2026-10-19",
+        "modalidade_frete": "0",
+        "valor_frete": "35.00",
+        "total": "12345.67",
+        "itens": itens,
+        "observacao": "Pedido gerado pelo benchmark",
+        "icms_aliquota": "18.00",
+    }
+    return json.dumps(pedido).encode("utf-8")
+
+
+def medir(funcao, body: bytes, repeticoes: int) -> dict:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(body)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return {
+        "p50": statistics.median(tempos),
+        "p95": tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da validação do corpo de um pedido.")
+    parser.add_argument("--linhas", type=int, default=200, help="Linhas do pedido (padrão: 200)")
+    parser.add_argument("--repeticoes", type=int, default=500, help="Execuções por cenário")
+    args = parser.parse_args()
+
+    registry = get_registry_entry("pedidos")
+    schema = registry["create_schema"]
+    body = gerar_pedido(args.linhas)
+
+    cenarios = [
+        ("json.loads + Schema(**dict)", lambda b: schema(**json.loads(b))),
+        ("model_validate_json", registry["validate_create_json"]),
+    ]
+    print(f"Corpo: {len(body) / 1024:.1f} KiB, {args.linhas} linhas")
+    print(f"\n{'validação':<30}{'p50 (ms)':>12}{'p95 (ms)':>12}")
+    for nome, funcao in cenarios:
+        funcao(body)  # aquecimento
+        r = medir(funcao, body, args.repeticoes)
+        print(f"{nome:<30}{r['p50']:>12.3f}{r['p95']:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import argparse
+import sys
+
+from app.core.db.database import SessionLocal
+from app.crud import crud_estoque
+
+# Uso (a partir da pasta backend):
+#   python -m app.utils.saldo_estoque                 -> apenas verifica a consistência
+#   python -m app.utils.saldo_estoque --reconstruir   -> recalcula saldo_estoque a partir dos lotes
+#   python -m app.utils.saldo_estoque --empresa 3     -> restringe a uma empresa
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica/reconstrói a tabela saldo_estoque.")
+    parser.add_argument("--empresa", type=int, default=None, help="ID da empresa (padrão: todas)")
+    parser.add_argument("--reconstruir", action="store_true", help="Recalcula os saldos a partir dos lotes")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        divergencias = crud_estoque.verificar_saldos(db, id_empresa=args.empresa)
+
+        if not divergencias:
+            print("[OK] saldo_estoque está consistente com os lotes.")
+            return
+
+        print(f"[ATENÇÃO] {len(divergencias)} divergência(s) encontrada(s):")
+        for d in divergencias:
+            print(
+                f"  empresa={d['id_empresa']} produto={d['id_produto']} situacao={d['situacao']}"
+                f" saldo={d['saldo']} esperado={d['esperado']}"
+            )
+
+        if not args.reconstruir:
+            print("\nExecute novamente com --reconstruir para corrigir.")
+            sys.exit(1)
+
+        print("\nReconstruindo saldos...")
+        crud_estoque.reconstruir_saldos(db, id_empresa=args.empresa)
+        print("[SUCESSO!] saldo_estoque reconstruído.")
+
+    except KeyboardInterrupt:
+        print("\nOperação cancelada pelo usuário.")
+        sys.exit(130)
+    except Exception as e:
+        print(f"\nOcorreu um erro inesperado: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
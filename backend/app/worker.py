@@ -0,0 +1,92 @@
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+
+from app.core.config import settings
+from app.core.db.database import SessionLocal
+from app.crud import crud_job
+from app.core.service import jobs
+
+# Worker dos jobs em segundo plano (exportações, reconstrução de saldos...).
+# Uso (a partir da pasta backend, ao lado do uvicorn app.main:app):
+#   python -m app.worker                  -> 1 thread consumindo a fila
+#   python -m app.worker --concurrency 4  -> 4 threads (cada uma com sua sessão)
+# Pode rodar em várias máquinas: a fila usa FOR UPDATE SKIP LOCKED.
+
+logger = logging.getLogger("app.worker")
+
+WORKER_NAME = f"{socket.gethostname()}-{os.getpid()}"
+
+
+def run_once(worker: str = WORKER_NAME) -> bool:
+    """Reserva e executa UM job. Retorna False se a fila estava vazia."""
+    db = SessionLocal()
+    try:
+        job = crud_job.claim_next(db, worker=worker)
+        if job is None:
+            return False
+        logger.info("Executando job %s (%s)", job.id, job.tipo)
+        jobs.run_job(db, job)
+        return True
+    finally:
+        db.close()
+
+
+def loop(stop: threading.Event, worker: str) -> None:
+    while not stop.is_set():
+        try:
+            if not run_once(worker):
+                stop.wait(settings.JOBS_POLL_SECONDS)
+        except Exception:
+            logger.exception("Erro no loop do worker")
+            stop.wait(settings.JOBS_POLL_SECONDS)
+
+
+def requeue_loop(stop: threading.Event) -> None:
+    """Devolve à fila jobs de workers que morreram (sem heartbeat)."""
+    while not stop.wait(settings.JOBS_STALE_SECONDS / 2):
+        db = SessionLocal()
+        try:
+            afetados = crud_job.requeue_stale(
+                db, stale_seconds=settings.JOBS_STALE_SECONDS, max_tentativas=settings.JOBS_MAX_TENTATIVAS
+            )
+            if afetados:
+                logger.warning("%s job(s) travado(s) devolvido(s) à fila", afetados)
+        except Exception:
+            logger.exception("Falha ao verificar jobs travados")
+        finally:
+            db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consome a fila de jobs em segundo plano.")
+    parser.add_argument("--concurrency", type=int, default=1, help="Número de threads (padrão: 1)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    stop = threading.Event()
+    # SIGTERM/Ctrl+C: termina o job em andamento e sai
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    threads = [threading.Thread(target=requeue_loop, args=(stop,), daemon=True)]
+    for i in range(max(1, args.concurrency)):
+        threads.append(threading.Thread(target=loop, args=(stop, f"{WORKER_NAME}-{i}"), name=f"job-worker-{i}"))
+
+    logger.info("Worker %s iniciado com %s thread(s)", WORKER_NAME, args.concurrency)
+    for t in threads:
+        t.start()
+    while not stop.is_set():
+        time.sleep(0.5)
+    for t in threads[1:]:
+        t.join()
+    logger.info("Worker %s finalizado", WORKER_NAME)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Adiciona saldo_estoque
+
+Revision ID: 7d3e1a9c4b20
+Revises: 5809b558ec78
+Create Date: 2026-10-19 09:12:31.482113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3e1a9c4b20'
+down_revision: Union[str, Sequence[str], None] = '5809b558ec78'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Cópias congeladas de SALDO_ESTOQUE_TRIGGER_SQL / SALDO_ESTOQUE_REBUILD_SQL (models.py)
+# como estavam nesta revisão: mudanças posteriores entram em migrações novas.
+SALDO_ESTOQUE_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION fn_saldo_estoque() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND NEW.id_empresa = OLD.id_empresa
+       AND NEW.id_produto = OLD.id_produto
+       AND NEW.situacao = OLD.situacao
+       AND NEW.quantidade = OLD.quantidade THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO saldo_estoque (id_empresa, id_produto, situacao, quantidade, atualizado_em)
+        VALUES (OLD.id_empresa, OLD.id_produto, OLD.situacao, -OLD.quantidade, now())
+        ON CONFLICT (id_empresa, id_produto, situacao)
+        DO UPDATE SET quantidade = saldo_estoque.quantidade + EXCLUDED.quantidade, atualizado_em = now();
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO saldo_estoque (id_empresa, id_produto, situacao, quantidade, atualizado_em)
+        VALUES (NEW.id_empresa, NEW.id_produto, NEW.situacao, NEW.quantidade, now())
+        ON CONFLICT (id_empresa, id_produto, situacao)
+        DO UPDATE SET quantidade = saldo_estoque.quantidade + EXCLUDED.quantidade, atualizado_em = now();
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_saldo_estoque ON estoque;
+CREATE TRIGGER trg_saldo_estoque
+    AFTER INSERT OR DELETE OR UPDATE OF id_empresa, id_produto, situacao, quantidade ON estoque
+    FOR EACH ROW EXECUTE FUNCTION fn_saldo_estoque();
+"""
+
+SALDO_ESTOQUE_REBUILD_SQL = """
+DELETE FROM saldo_estoque
+WHERE CAST(:id_empresa AS INTEGER) IS NULL OR id_empresa = :id_empresa;
+
+INSERT INTO saldo_estoque (id_empresa, id_produto, situacao, quantidade, atualizado_em)
+SELECT id_empresa, id_produto, situacao, SUM(quantidade), now()
+FROM estoque
+WHERE CAST(:id_empresa AS INTEGER) IS NULL OR id_empresa = :id_empresa
+GROUP BY id_empresa, id_produto, situacao;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('saldo_estoque',
+    sa.Column('id_empresa', sa.Integer(), nullable=False),
+    sa.Column('id_produto', sa.Integer(), nullable=False),
+    sa.Column('situacao', sa.Enum('disponivel', 'reservado', 'indisponivel', name='estoquesituacaoenum', native_enum=False), nullable=False),
+    sa.Column('quantidade', sa.Integer(), nullable=False),
+    sa.Column('atualizado_em', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['id_empresa'], ['empresas.id'], ),
+    sa.ForeignKeyConstraint(['id_produto'], ['produtos.id'], ),
+    sa.PrimaryKeyConstraint('id_empresa', 'id_produto', 'situacao')
+    )
+    op.create_index('ix_saldo_estoque_empresa_situacao_quantidade', 'saldo_estoque', ['id_empresa', 'situacao', 'quantidade'], unique=False)
+
+    # 1. Trigger que mantém o saldo a cada escrita em 'estoque'
+    op.execute(SALDO_ESTOQUE_TRIGGER_SQL)
+
+    # 2. Carga inicial a partir dos lotes existentes
+    op.get_bind().execute(sa.text(SALDO_ESTOQUE_REBUILD_SQL), {"id_empresa": None})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS trg_saldo_estoque ON estoque")
+    op.execute("DROP FUNCTION IF EXISTS fn_saldo_estoque()")
+    op.drop_index('ix_saldo_estoque_empresa_situacao_quantidade', table_name='saldo_estoque')
+    op.drop_table('saldo_estoque')
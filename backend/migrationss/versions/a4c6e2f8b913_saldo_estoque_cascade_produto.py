@@ -0,0 +1,37 @@
+"""saldo_estoque.id_produto com ON DELETE CASCADE
+
+Revision ID: a4c6e2f8b913
+Revises: f3b1d8e5c274
+Create Date: 2026-10-19 17:41:08.205617
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c6e2f8b913'
+down_revision: Union[str, Sequence[str], None] = 'f3b1d8e5c274'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # As linhas zeradas do saldo impediam a exclusão do produto
+    op.drop_constraint('saldo_estoque_id_produto_fkey', 'saldo_estoque', type_='foreignkey')
+    op.create_foreign_key(
+        'saldo_estoque_id_produto_fkey', 'saldo_estoque', 'produtos',
+        ['id_produto'], ['id'], ondelete='CASCADE',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('saldo_estoque_id_produto_fkey', 'saldo_estoque', type_='foreignkey')
+    op.create_foreign_key(
+        'saldo_estoque_id_produto_fkey', 'saldo_estoque', 'produtos',
+        ['id_produto'], ['id'],
+    )
@@ -0,0 +1,49 @@
+"""Índices para valores distintos
+
+Revision ID: b41f0c6d2e85
+Revises: 7d3e1a9c4b20
+Create Date: 2026-10-19 11:40:05.913270
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b41f0c6d2e85'
+down_revision: Union[str, Sequence[str], None] = '7d3e1a9c4b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (tabela, coluna) usados pelos creatable_select / GET /generic/{model}/distinct/{campo}
+DISTINCT_INDEXES = [
+    ('produtos', 'grupo'),
+    ('produtos', 'subgrupo1'),
+    ('produtos', 'subgrupo2'),
+    ('produtos', 'subgrupo3'),
+    ('produtos', 'subgrupo4'),
+    ('produtos', 'subgrupo5'),
+    ('contas', 'plano_contas'),
+    ('contas', 'caixa_destino_origem'),
+    ('contas', 'pagamento'),
+    ('estoque', 'deposito'),
+    ('estoque', 'rua'),
+    ('estoque', 'nivel'),
+    ('estoque', 'cor'),
+    ('pedidos', 'origem_venda'),
+    ('pedidos', 'pagamento'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column in DISTINCT_INDEXES:
+        op.create_index(f'ix_{table}_empresa_{column}', table, ['id_empresa', column], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column in DISTINCT_INDEXES:
+        op.drop_index(f'ix_{table}_empresa_{column}', table_name=table)
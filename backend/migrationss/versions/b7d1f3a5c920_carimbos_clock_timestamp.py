@@ -0,0 +1,121 @@
+"""Carimbos de atualizado_em/excluido_em com clock_timestamp()
+
+Revision ID: b7d1f3a5c920
+Revises: a4c6e2f8b913
+Create Date: 2026-10-19 18:24:07.530119
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d1f3a5c920'
+down_revision: Union[str, Sequence[str], None] = 'a4c6e2f8b913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tabelas com 'atualizado_em' (ver crud_generic.changes_horizon)
+STAMPED_TABLES = [
+    'empresas',
+    'usuarios',
+    'cadastros',
+    'embalagens',
+    'produtos',
+    'contas',
+    'estoque',
+    'pedidos',
+    'regras_tributarias',
+    'saldo_estoque',
+    'jobs',
+]
+
+# SALDO_ESTOQUE_TRIGGER_SQL (models.py) nesta revisão: carimbo com clock_timestamp()
+SALDO_ESTOQUE_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION fn_saldo_estoque() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND NEW.id_empresa = OLD.id_empresa
+       AND NEW.id_produto = OLD.id_produto
+       AND NEW.situacao = OLD.situacao
+       AND NEW.quantidade = OLD.quantidade THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO saldo_estoque (id_empresa, id_produto, situacao, quantidade, atualizado_em)
+        VALUES (OLD.id_empresa, OLD.id_produto, OLD.situacao, -OLD.quantidade, clock_timestamp())
+        ON CONFLICT (id_empresa, id_produto, situacao)
+        DO UPDATE SET quantidade = saldo_estoque.quantidade + EXCLUDED.quantidade, atualizado_em = clock_timestamp();
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO saldo_estoque (id_empresa, id_produto, situacao, quantidade, atualizado_em)
+        VALUES (NEW.id_empresa, NEW.id_produto, NEW.situacao, NEW.quantidade, clock_timestamp())
+        ON CONFLICT (id_empresa, id_produto, situacao)
+        DO UPDATE SET quantidade = saldo_estoque.quantidade + EXCLUDED.quantidade, atualizado_em = clock_timestamp();
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_saldo_estoque ON estoque;
+CREATE TRIGGER trg_saldo_estoque
+    AFTER INSERT OR DELETE OR UPDATE OF id_empresa, id_produto, situacao, quantidade ON estoque
+    FOR EACH ROW EXECUTE FUNCTION fn_saldo_estoque();
+"""
+
+# Versão anterior (7d3e1a9c4b20), para o downgrade
+SALDO_ESTOQUE_TRIGGER_NOW_SQL = """
+CREATE OR REPLACE FUNCTION fn_saldo_estoque() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND NEW.id_empresa = OLD.id_empresa
+       AND NEW.id_produto = OLD.id_produto
+       AND NEW.situacao = OLD.situacao
+       AND NEW.quantidade = OLD.quantidade THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO saldo_estoque (id_empresa, id_produto, situacao, quantidade, atualizado_em)
+        VALUES (OLD.id_empresa, OLD.id_produto, OLD.situacao, -OLD.quantidade, now())
+        ON CONFLICT (id_empresa, id_produto, situacao)
+        DO UPDATE SET quantidade = saldo_estoque.quantidade + EXCLUDED.quantidade, atualizado_em = now();
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO saldo_estoque (id_empresa, id_produto, situacao, quantidade, atualizado_em)
+        VALUES (NEW.id_empresa, NEW.id_produto, NEW.situacao, NEW.quantidade, now())
+        ON CONFLICT (id_empresa, id_produto, situacao)
+        DO UPDATE SET quantidade = saldo_estoque.quantidade + EXCLUDED.quantidade, atualizado_em = now();
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_saldo_estoque ON estoque;
+CREATE TRIGGER trg_saldo_estoque
+    AFTER INSERT OR DELETE OR UPDATE OF id_empresa, id_produto, situacao, quantidade ON estoque
+    FOR EACH ROW EXECUTE FUNCTION fn_saldo_estoque();
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in STAMPED_TABLES:
+        op.alter_column(table, 'atualizado_em', server_default=sa.text('clock_timestamp()'))
+    op.alter_column('exclusoes', 'excluido_em', server_default=sa.text('clock_timestamp()'))
+    op.execute(SALDO_ESTOQUE_TRIGGER_SQL)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(SALDO_ESTOQUE_TRIGGER_NOW_SQL)
+    op.alter_column('exclusoes', 'excluido_em', server_default=sa.text('now()'))
+    for table in STAMPED_TABLES:
+        op.alter_column(table, 'atualizado_em', server_default=sa.text('now()'))
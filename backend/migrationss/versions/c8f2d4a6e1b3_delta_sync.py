@@ -0,0 +1,73 @@
+"""Delta-sync: atualizado_em preenchido, índices e tombstones
+
+Revision ID: c8f2d4a6e1b3
+Revises: b41f0c6d2e85
+Create Date: 2026-10-19 13:05:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8f2d4a6e1b3'
+down_revision: Union[str, Sequence[str], None] = 'b41f0c6d2e85'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tabelas com id_empresa consultadas por GET /generic/{model}/changes
+DELTA_SYNC_TABLES = [
+    'usuarios',
+    'cadastros',
+    'embalagens',
+    'produtos',
+    'contas',
+    'estoque',
+    'pedidos',
+    'regras_tributarias',
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in DELTA_SYNC_TABLES + ['empresas']:
+        # Linhas nunca alteradas tinham atualizado_em NULL: passam a usar a data de criação
+        op.execute(
+            f"UPDATE {table} SET atualizado_em = COALESCE(criado_em, now()) WHERE atualizado_em IS NULL"
+        )
+        op.alter_column(table, 'atualizado_em', server_default=sa.text('now()'))
+
+    for table in DELTA_SYNC_TABLES:
+        op.create_index(
+            f'ix_{table}_empresa_atualizado_em', table, ['id_empresa', 'atualizado_em', 'id'], unique=False
+        )
+
+    op.create_table('exclusoes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('id_empresa', sa.Integer(), nullable=False),
+    sa.Column('tabela', sa.String(length=64), nullable=False),
+    sa.Column('id_registro', sa.Integer(), nullable=False),
+    sa.Column('excluido_em', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['id_empresa'], ['empresas.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_exclusoes_id'), 'exclusoes', ['id'], unique=False)
+    op.create_index(
+        'ix_exclusoes_empresa_tabela_excluido_em', 'exclusoes',
+        ['id_empresa', 'tabela', 'excluido_em', 'id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_exclusoes_empresa_tabela_excluido_em', table_name='exclusoes')
+    op.drop_index(op.f('ix_exclusoes_id'), table_name='exclusoes')
+    op.drop_table('exclusoes')
+
+    for table in DELTA_SYNC_TABLES:
+        op.drop_index(f'ix_{table}_empresa_atualizado_em', table_name=table)
+
+    for table in DELTA_SYNC_TABLES + ['empresas']:
+        op.alter_column(table, 'atualizado_em', server_default=None)
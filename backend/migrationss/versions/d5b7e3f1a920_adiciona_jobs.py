@@ -0,0 +1,56 @@
+"""Adiciona tabela jobs
+
+Revision ID: d5b7e3f1a920
+Revises: c8f2d4a6e1b3
+Create Date: 2026-10-19 13:48:12.402716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5b7e3f1a920'
+down_revision: Union[str, Sequence[str], None] = 'c8f2d4a6e1b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tipo', sa.String(length=50), nullable=False),
+    sa.Column('parametros', sa.JSON(), nullable=False),
+    sa.Column('situacao', sa.Enum('pendente', 'executando', 'concluido', 'erro', 'cancelado', name='jobsituacaoenum', native_enum=False), nullable=False),
+    sa.Column('progresso', sa.Integer(), nullable=False),
+    sa.Column('mensagem', sa.String(), nullable=True),
+    sa.Column('cancelar', sa.Boolean(), nullable=False),
+    sa.Column('tentativas', sa.Integer(), nullable=False),
+    sa.Column('worker', sa.String(length=100), nullable=True),
+    sa.Column('resultado_arquivo', sa.String(), nullable=True),
+    sa.Column('resultado_nome', sa.String(), nullable=True),
+    sa.Column('resultado_tipo', sa.String(length=100), nullable=True),
+    sa.Column('criado_em', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('iniciado_em', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finalizado_em', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('atualizado_em', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('id_empresa', sa.Integer(), nullable=False),
+    sa.Column('id_usuario', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['id_empresa'], ['empresas.id'], ),
+    sa.ForeignKeyConstraint(['id_usuario'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_jobs_id'), 'jobs', ['id'], unique=False)
+    op.create_index('ix_jobs_situacao_id', 'jobs', ['situacao', 'id'], unique=False)
+    op.create_index('ix_jobs_empresa_id', 'jobs', ['id_empresa', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_jobs_empresa_id', table_name='jobs')
+    op.drop_index('ix_jobs_situacao_id', table_name='jobs')
+    op.drop_index(op.f('ix_jobs_id'), table_name='jobs')
+    op.drop_table('jobs')
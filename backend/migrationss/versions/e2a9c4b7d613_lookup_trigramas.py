@@ -0,0 +1,52 @@
+"""Lookup: f_unaccent e índices de trigramas nos campos de exibição
+
+Revision ID: e2a9c4b7d613
+Revises: d5b7e3f1a920
+Create Date: 2026-10-19 14:31:07.552190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a9c4b7d613'
+down_revision: Union[str, Sequence[str], None] = 'd5b7e3f1a920'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Campos de exibição buscados pelo GET /lookup/{model} (ver LOOKUP_TRGM_FIELDS em models.py)
+LOOKUP_TRGM_FIELDS = [
+    ('cadastros', 'nome_razao'),
+    ('usuarios', 'nome'),
+    ('embalagens', 'descricao'),
+    ('produtos', 'descricao'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    # unaccent() não é IMMUTABLE; o wrapper com dicionário fixo pode ser indexado
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text AS $$
+            SELECT public.unaccent('public.unaccent', $1)
+        $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        """
+    )
+    for table, field in LOOKUP_TRGM_FIELDS:
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_{table}_{field}_trgm ON {table} "
+            f"USING gin (f_unaccent(lower({field})) gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, field in LOOKUP_TRGM_FIELDS:
+        op.execute(f"DROP INDEX IF EXISTS ix_{table}_{field}_trgm")
+    op.execute("DROP FUNCTION IF EXISTS f_unaccent(text)")
@@ -0,0 +1,42 @@
+"""Índices de dígitos normalizados para CPF/CNPJ, CEP e telefones
+
+Revision ID: f3b1d8e5c274
+Revises: e2a9c4b7d613
+Create Date: 2026-10-19 15:02:44.918305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b1d8e5c274'
+down_revision: Union[str, Sequence[str], None] = 'e2a9c4b7d613'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Ver DIGIT_SEARCH_FIELDS em models.py
+DIGIT_SEARCH_FIELDS = {
+    'cadastros': ('cpf_cnpj', 'cep', 'telefone', 'celular'),
+    'empresas': ('cnpj', 'cep', 'telefone'),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, fields in DIGIT_SEARCH_FIELDS.items():
+        prefix = 'id_empresa, ' if table != 'empresas' else ''
+        for field in fields:
+            op.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_{field}_digitos ON {table} "
+                f"({prefix}(regexp_replace({field}, '\\D', '', 'g')) text_pattern_ops)"
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, fields in DIGIT_SEARCH_FIELDS.items():
+        for field in fields:
+            op.execute(f"DROP INDEX IF EXISTS ix_{table}_{field}_digitos")
@@ -0,0 +1,28 @@
+from app.core.config import settings
+from app.core.service.profiler import slow_query_log
+
+
+def test_slow_queries_are_scoped_to_the_user_empresa(client, empresa):
+    slow_query_log.clear(empresa.id)
+    slow_query_log.clear(empresa.id + 1)
+    slow_query_log.add({"id_empresa": empresa.id + 1, "sql": "SELECT 'outra empresa'"})
+    slow_query_log.add({"id_empresa": None, "sql": "SELECT 'sem tenant'"})
+    try:
+        assert client.get("/api/v1/admin/slow-queries").json() == []
+
+        # O DELETE do admin não apaga as entradas das outras empresas
+        assert client.delete("/api/v1/admin/slow-queries").status_code == 204
+        assert len(slow_query_log.list(empresa.id + 1)) == 1
+    finally:
+        slow_query_log.clear(empresa.id + 1)
+        slow_query_log.clear(None)
+
+
+def test_cache_stats_require_the_operations_token(client, monkeypatch):
+    # O admin logado não basta: sem token, só o próprio host (o TestClient não é)
+    assert client.get("/api/v1/admin/caches").status_code == 403
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "ops-secret")
+    assert client.get("/api/v1/admin/caches").status_code == 401
+    response = client.get("/api/v1/admin/caches", headers={"Authorization": "Bearer ops-secret"})
+    assert response.status_code == 200
@@ -0,0 +1,51 @@
+import asyncio
+
+from app.core.config import settings
+from app.core.middleware.admission import AdmissionController
+
+
+def test_queued_acquire_keeps_the_limiter_and_the_limit():
+    async def cenario():
+        controller = AdmissionController()
+        key = ("tenant", 1, "export")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + 5
+
+        primeiro = await controller.acquire(key, 1, deadline)
+        # Fila: só entra quando o primeiro liberar
+        espera = asyncio.ensure_future(controller.acquire(key, 1, deadline))
+        await asyncio.sleep(0)
+        assert not espera.done()
+
+        controller.release(key, primeiro)
+        segundo = await espera
+
+        # A vaga passou para quem estava na fila: o limitador continua registrado e cheio
+        assert segundo is primeiro
+        assert controller._limiters[key] is segundo
+        assert segundo.in_flight == 1 and segundo.waiting == 0
+        assert segundo.semaphore.locked()
+        # Uma terceira requisição não ultrapassa o limite
+        assert await controller.acquire(key, 1, loop.time() + 0.05) is None
+
+        controller.release(key, segundo)
+        assert key not in controller._limiters
+
+    asyncio.run(cenario())
+
+
+def test_full_queue_is_rejected(monkeypatch):
+    monkeypatch.setattr(settings, "ADMISSION_MAX_WAITING", 0)
+
+    async def cenario():
+        controller = AdmissionController()
+        key = ("global", "export")
+        deadline = asyncio.get_running_loop().time() + 5
+        ocupado = await controller.acquire(key, 1, deadline)
+
+        assert await controller.acquire(key, 1, deadline) is None
+
+        controller.release(key, ocupado)
+        assert key not in controller._limiters
+
+    asyncio.run(cenario())
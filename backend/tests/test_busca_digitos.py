@@ -0,0 +1,54 @@
+import re
+import unicodedata
+
+from sqlalchemy import event
+
+from app.core.db import models
+from app.crud import crud_generic
+
+
+def _sqlite_functions(engine):
+    """regexp_replace e unaccent do Postgres, no sqlite dos testes."""
+    def _unaccent(value):
+        if value is None:
+            return None
+        return "".join(c for c in unicodedata.normalize("NFKD", value) if not unicodedata.combining(c))
+
+    def _connect(dbapi_connection, _):
+        dbapi_connection.create_function("unaccent", 1, _unaccent)
+        dbapi_connection.create_function(
+            "regexp_replace", 4, lambda value, pattern, repl, flags: None if value is None else re.sub(pattern, repl, value)
+        )
+
+    event.listen(engine, "connect", _connect)
+    # A conexão do StaticPool já existe: registra nela também
+    raw = engine.raw_connection()
+    _connect(raw.driver_connection, None)
+    raw.close()
+
+
+def _cadastro(db, empresa, **campos):
+    cadastro = models.Cadastro(id_empresa=empresa.id, nome_razao="Cliente", cep="80000-000", **campos)
+    db.add(cadastro)
+    db.commit()
+    return cadastro
+
+
+def test_digit_search_uses_documents_first_and_falls_back_to_free_text(engine, db, empresa, statements):
+    _sqlite_functions(engine)
+    documento = _cadastro(db, empresa, cpf_cnpj="12.345.678/0001-90")
+    inscricao = _cadastro(db, empresa, cpf_cnpj="98.765.432/0001-10", inscricao_estadual="555.123.456")
+
+    # Casa um CNPJ: fica só no índice de dígitos (sem o ILIKE em todas as colunas)
+    statements.clear()
+    encontrados = crud_generic.filtered_query(
+        db, model=models.Cadastro, id_empresa=empresa.id, search_term="12.345"
+    ).all()
+    assert [c.id for c in encontrados] == [documento.id]
+    assert not any("unaccent" in sql for sql in statements)
+
+    # Nenhum documento/telefone começa com 555123: cai na busca livre
+    encontrados = crud_generic.filtered_query(
+        db, model=models.Cadastro, id_empresa=empresa.id, search_term="555.123"
+    ).all()
+    assert [c.id for c in encontrados] == [inscricao.id]
@@ -0,0 +1,50 @@
+import pickle
+
+import pytest
+
+from app.core.service import invalidation
+from app.core.service.cache import CacheBackend, InMemoryRedis, RedisCache
+
+
+def test_backend_interface_is_abstract():
+    class Incompleto(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incompleto()
+
+
+def test_redis_cache_round_trips_without_pickle():
+    client = InMemoryRedis()
+    cache = RedisCache(client)
+
+    cache.set(("response", 1, "a"), b'{"id": 1}', ttl=60)
+    cache.set(("empresa", 1, "me"), (b'{"id": 1}', 'W/"abc"'), ttl=60)
+
+    assert cache.get(("response", 1, "a")) == b'{"id": 1}'
+    assert cache.get(("empresa", 1, "me")) == (b'{"id": 1}', 'W/"abc"')
+
+
+def test_redis_cache_never_unpickles_network_data():
+    client = InMemoryRedis()
+    cache = RedisCache(client)
+    client.set(cache._key(("response", 1)), pickle.dumps({"x": 1}))
+
+    with pytest.raises(ValueError):
+        cache.get(("response", 1))
+
+
+def test_shared_generations_are_the_same_for_every_worker(monkeypatch):
+    store = RedisCache(InMemoryRedis()).generation_store()
+    monkeypatch.setattr(invalidation, "_store", store)
+    antes = invalidation.generations(7, ("produtos", "cadastros"))
+
+    # Escrita neste worker: incrementa no Redis
+    invalidation.notify_write(7, "produtos", [1])
+    depois = invalidation.generations(7, ("produtos", "cadastros"))
+    assert depois[1] == antes[1] + 1 and depois[2] == antes[2]
+
+    # O mesmo evento chegando de outro worker pelo barramento não incrementa de novo
+    invalidation.notify_write(7, "produtos", [1], remote=True)
+    assert invalidation.generations(7, ("produtos", "cadastros")) == depois
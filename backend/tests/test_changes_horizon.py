@@ -0,0 +1,37 @@
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import crud_generic
+
+
+def test_idle_read_transaction_does_not_hold_the_horizon(pg_engine, monkeypatch):
+    monkeypatch.setattr(settings, "CHANGES_SAFETY_LAG_SECONDS", 0)
+    leitura = pg_engine.connect()
+    escrita = pg_engine.connect()
+    try:
+        # Exportação longa: transação aberta que só leu (sem xid)
+        leitura.begin()
+        inicio_leitura = leitura.scalar(text("SELECT now()"))
+        # Escrita confirmada depois que a leitura começou (carimbo = clock_timestamp())
+        with Session(pg_engine) as db:
+            carimbo = db.scalar(text("SELECT clock_timestamp()"))
+            db.commit()
+        time.sleep(0.2)
+        with Session(pg_engine) as db:
+            horizonte = crud_generic.changes_horizon(db)
+        # Entra no próximo lote (o next_token avança além dela) com a leitura ainda aberta
+        assert horizonte >= carimbo > inicio_leitura
+
+        # Transação que já escreveu (txid_current() atribui o xid): segura o horizonte
+        escrita.begin()
+        inicio_escrita = escrita.scalar(text("SELECT now()"))
+        escrita.scalar(text("SELECT txid_current()"))
+        time.sleep(0.2)
+        with Session(pg_engine) as db:
+            assert crud_generic.changes_horizon(db) <= inicio_escrita
+    finally:
+        leitura.close()
+        escrita.close()
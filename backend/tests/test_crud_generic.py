@@ -0,0 +1,55 @@
+from app.core.db import models
+from app.crud import crud_generic
+
+
+def _produto(db, empresa, **values):
+    values = {"sku": "SKU-1", "descricao": "Parafuso", **values}
+    return crud_generic.create_from_values(db, model=models.Produto, values=values, id_empresa=empresa.id)
+
+
+def test_create_uses_single_insert_returning(db, empresa, statements):
+    produto = _produto(db, empresa)
+
+    assert produto.id is not None and produto.id_empresa == empresa.id
+    assert len(statements) == 1
+    assert statements[0].startswith("INSERT") and "RETURNING" in statements[0]
+
+
+def test_update_uses_single_statement_and_refreshes_loaded_instance(db, empresa, statements):
+    produto = _produto(db, empresa)
+    # Já carregado na sessão, como no endpoint que consulta antes de atualizar
+    carregado = crud_generic.get(db, model=models.Produto, id=produto.id, id_empresa=empresa.id)
+    statements.clear()
+
+    atualizado = crud_generic.update_from_values(
+        db, model=models.Produto, id=produto.id, id_empresa=empresa.id, values={"descricao": "Porca"}
+    )
+
+    assert len(statements) == 1
+    assert statements[0].startswith("UPDATE") and "RETURNING" in statements[0]
+    assert atualizado is carregado
+    assert atualizado.descricao == "Porca"
+
+
+def test_update_other_tenant_returns_none(db, empresa, statements):
+    produto = _produto(db, empresa)
+    statements.clear()
+
+    assert crud_generic.update_from_values(
+        db, model=models.Produto, id=produto.id, id_empresa=empresa.id + 1, values={"descricao": "Porca"}
+    ) is None
+    assert len(statements) == 1
+
+
+def test_delete_uses_delete_returning_plus_tombstone(db, empresa, statements):
+    produto = _produto(db, empresa)
+    statements.clear()
+
+    removido = crud_generic.delete(db, model=models.Produto, id=produto.id, id_empresa=empresa.id)
+
+    assert removido.id == produto.id
+    # DELETE ... RETURNING e o tombstone do delta-sync, na mesma transação
+    assert len(statements) == 2
+    assert statements[0].startswith("DELETE") and "RETURNING" in statements[0]
+    assert statements[1].startswith("INSERT INTO exclusoes")
+    assert crud_generic.get(db, model=models.Produto, id=produto.id, id_empresa=empresa.id) is None
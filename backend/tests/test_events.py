@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import sessionmaker
+
+from app.api.dependencies import authenticate_token
+from app.api.v1.endpoints import events
+from app.core.db import models
+from app.core.service import security
+
+
+@pytest.fixture
+def login_token(client, db):
+    usuario = db.query(models.Usuario).one()
+    return security.create_access_token(data={
+        "id_usuario": usuario.id, "id_empresa": usuario.id_empresa, "perfil": "admin",
+    })
+
+
+def test_ticket_only_opens_the_event_stream(client, db, login_token):
+    response = client.post("/api/v1/events/ticket", headers={"Authorization": f"Bearer {login_token}"})
+    assert response.status_code == 200
+    body = response.json()
+    assert 0 < body["expires_in"] <= 300
+
+    # O ticket não vale como login, nem o login como ticket
+    with pytest.raises(HTTPException):
+        authenticate_token(db, body["ticket"])
+    with pytest.raises(HTTPException):
+        authenticate_token(db, login_token, scope=security.EVENTS_TICKET_SCOPE)
+    assert authenticate_token(db, body["ticket"], scope=security.EVENTS_TICKET_SCOPE).id_empresa is not None
+
+
+def test_stream_ends_when_the_ticket_expires(client, engine, db, monkeypatch):
+    monkeypatch.setattr(events, "SessionLocal", sessionmaker(bind=engine, expire_on_commit=False))
+    usuario = db.query(models.Usuario).one()
+    ticket = security.create_events_ticket(
+        {"id_usuario": usuario.id, "id_empresa": usuario.id_empresa, "perfil": "admin"},
+        datetime.now(timezone.utc) + timedelta(seconds=1),
+    )
+    with client.stream("GET", "/api/v1/events", params={"models": "produtos", "ticket": ticket}) as response:
+        assert response.status_code == 200
+        linhas = list(response.iter_lines())
+    assert "event: expired" in linhas
@@ -0,0 +1,24 @@
+from datetime import datetime, timedelta, timezone
+
+from app.core.db import models
+
+
+def test_read_item_does_not_answer_304_from_a_stale_cache(client, db, empresa):
+    produto = client.post("/api/v1/generic/produtos", json={"sku": "SKU-1", "descricao": "Parafuso"}).json()
+    url = f"/api/v1/generic/produtos/{produto['id']}"
+    etag = client.get(url).headers["etag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    # Escrita "em outro worker": o banco muda, mas o cache deste worker não é invalidado
+    db.query(models.Produto).filter(models.Produto.id == produto["id"]).update({
+        "descricao": "Porca",
+        "atualizado_em": datetime.now(timezone.utc) + timedelta(minutes=1),
+    })
+    db.commit()
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["descricao"] == "Porca"
+    assert response.headers["etag"] != etag
+    # O cache foi corrigido: a próxima revalidação com o ETag novo é 304
+    assert client.get(url, headers={"If-None-Match": response.headers["etag"]}).status_code == 304
@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.service import invalidation_bus
+
+# Teste com dois workers de verdade (processos separados) sobre o Postgres
+# (TEST_DATABASE_URL, ver o fixture pg_engine em conftest.py)
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# Segundo worker: escuta o canal e avisa na saída quando a geração local muda
+WORKER_SCRIPT = """
+import sys, time
+from sqlalchemy import create_engine
+from app.core.service import invalidation, invalidation_bus
+
+url, channel = sys.argv[1], sys.argv[2]
+listener = invalidation_bus.InvalidationListener(create_engine(url), channel, poll_interval=0.1)
+listener.start()
+print("pronto", flush=True)
+limite = time.monotonic() + 20
+while time.monotonic() < limite:
+    if invalidation.generation(1, "produtos") > 0:
+        print("invalidado", flush=True)
+        break
+    time.sleep(0.05)
+listener.stop()
+"""
+
+
+def test_write_in_one_worker_invalidates_the_other(pg_engine, monkeypatch):
+    channel = f"test_invalidation_{uuid.uuid4().hex[:8]}"
+    monkeypatch.setattr(settings, "INVALIDATION_CHANNEL", channel)
+
+    worker = subprocess.Popen(
+        [sys.executable, "-c", WORKER_SCRIPT, TEST_DATABASE_URL, channel],
+        cwd=BACKEND_DIR, stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        assert worker.stdout.readline().strip() == "pronto"
+        # O LISTEN do outro worker sobe em segundo plano: publica até ele reagir
+        limite = time.monotonic() + 15
+        while worker.poll() is None and time.monotonic() < limite:
+            with Session(pg_engine) as db:
+                invalidation_bus.publish(db, id_empresa=1, table_name="produtos", ids=[1])
+                db.commit()
+            time.sleep(0.2)
+        saida, _ = worker.communicate(timeout=25)
+        assert "invalidado" in saida
+    finally:
+        if worker.poll() is None:
+            worker.kill()
+            worker.wait()
+
+
+def test_rolled_back_write_is_not_delivered(pg_engine, monkeypatch):
+    channel = f"test_invalidation_{uuid.uuid4().hex[:8]}"
+    monkeypatch.setattr(settings, "INVALIDATION_CHANNEL", channel)
+
+    with pg_engine.connect() as conn:
+        driver = conn.connection.driver_connection
+        driver.autocommit = True
+        with driver.cursor() as cursor:
+            cursor.execute(f'LISTEN "{channel}"')
+
+        with Session(pg_engine) as db:
+            invalidation_bus.publish(db, id_empresa=1, table_name="produtos", ids=[1])
+            db.rollback()
+        time.sleep(0.2)
+        driver.poll()
+        assert driver.notifies == []
@@ -0,0 +1,64 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import settings
+from app.core.db import models
+from app.core.service import jobs
+from app.crud import crud_job
+
+
+def _claim(db, empresa, tipo="exportar_csv", worker="w1"):
+    crud_job.enqueue(db, tipo=tipo, parametros={"model_name": "produtos"}, id_empresa=empresa.id)
+    return crud_job.claim_next(db, worker=worker)
+
+
+def test_export_job_finishes(db, empresa, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "JOBS_RESULT_DIR", str(tmp_path))
+    job = _claim(db, empresa)
+
+    jobs.run_job(db, job)
+
+    db.expire_all()
+    job = crud_job.get_job(db, id=job.id, id_empresa=empresa.id)
+    assert job.situacao == models.JobSituacaoEnum.concluido
+    assert job.progresso == 100
+
+
+def test_stale_execution_cannot_finish_requeued_job(db, empresa):
+    job = _claim(db, empresa)
+    antiga = {"id": job.id, "worker": job.worker, "tentativas": job.tentativas}
+
+    # Sem heartbeat: volta para a fila e outro worker reserva
+    db.query(models.Job).filter(models.Job.id == job.id).update(
+        {"atualizado_em": datetime.now(timezone.utc) - timedelta(hours=1)}
+    )
+    db.commit()
+    assert crud_job.requeue_stale(db, stale_seconds=60, max_tentativas=3) == 1
+    nova = crud_job.claim_next(db, worker="w2")
+
+    assert crud_job.update_progress(db, progresso=50, **antiga) is None
+    assert crud_job.finish(db, **antiga) is False
+
+    db.expire_all()
+    job = crud_job.get_job(db, id=job.id, id_empresa=empresa.id)
+    assert job.situacao == models.JobSituacaoEnum.executando
+    assert (job.worker, job.tentativas) == ("w2", nova.tentativas)
+
+
+def test_heartbeat_runs_while_handler_is_silent(db, empresa, monkeypatch):
+    monkeypatch.setattr(settings, "JOBS_HEARTBEAT_SECONDS", 0.05)
+    job = _claim(db, empresa, tipo="lento")
+    inicio = crud_job.get_job(db, id=job.id, id_empresa=empresa.id).atualizado_em
+    batimentos = []
+
+    def lento(db, job, ctx):
+        time.sleep(0.3)  # nenhum progresso reportado
+        db.expire_all()
+        batimentos.append(crud_job.get_job(db, id=job.id, id_empresa=job.id_empresa).atualizado_em)
+        return jobs.JobResult()
+
+    monkeypatch.setitem(jobs.HANDLERS, "lento", lento)
+    jobs.run_job(db, job)
+
+    # sqlite devolve datetime sem fuso
+    assert batimentos[0].replace(tzinfo=None) > inicio.replace(tzinfo=None)
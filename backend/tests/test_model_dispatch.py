@@ -0,0 +1,15 @@
+from app.api.v1.model_dispatch import get_registry_entry
+
+
+def test_dependent_tables_include_nested_schemas():
+    # Estoque aninha Produto, que aninha Embalagem e o Cadastro do fornecedor
+    tables = get_registry_entry("estoques")["dependent_tables"]
+
+    assert tables[0] == "estoque"
+    assert {"produtos", "embalagens", "cadastros"} <= set(tables)
+
+
+def test_version_paths_follow_nested_many_to_one():
+    assert get_registry_entry("estoques")["version_paths"] == (
+        ("produto",), ("produto", "embalagem"), ("produto", "fornecedor"),
+    )
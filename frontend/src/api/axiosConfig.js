@@ -26,6 +26,8 @@ api.interceptors.request.use(
   }
 );
 
+const MAX_RETRIES_429 = 2;
+
 // Interceptor de Resposta (Opcional, mas recomendado)
 // Isso é executado APÓS cada resposta
 api.interceptors.response.use(
@@ -33,7 +35,19 @@ api.interceptors.response.use(
     // Se a resposta for bem-sucedida, apenas a retorna
     return response;
   },
-  (error) => {
+  async (error) => {
+    // 429 do controle de admissão: a requisição não chegou a executar, então é
+    // seguro repetir após o Retry-After (no máximo MAX_RETRIES_429 vezes)
+    const config = error.config;
+    if (error.response && error.response.status === 429 && config) {
+      config.retries429 = (config.retries429 || 0) + 1;
+      if (config.retries429 <= MAX_RETRIES_429) {
+        const seconds = Number(error.response.headers['retry-after']) || 1;
+        await new Promise((resolve) => setTimeout(resolve, Math.min(seconds, 30) * 1000));
+        return api(config);
+      }
+    }
+
     // Se a resposta for um erro 401 (Não Autorizado)
     if (error.response && error.response.status === 401) {
       // Limpa o token e força o logout
@@ -0,0 +1,31 @@
+import api from './axiosConfig';
+
+// Catálogo de produtos do tenant (GET /catalogo) em um Map id -> produto.
+// O backend responde com ETag: o navegador revalida com If-None-Match e, sem
+// mudanças, recebe 304 e reaproveita o corpo do cache HTTP.
+
+let pending = null;
+
+const toMap = ({ campos, itens }) => {
+  const produtos = new Map();
+  itens.forEach((valores) => {
+    const produto = {};
+    campos.forEach((campo, i) => {
+      produto[campo] = valores[i];
+    });
+    produtos.set(produto.id, produto);
+  });
+  return produtos;
+};
+
+/** Retorna Promise<Map<id, produto>>. Chamadas simultâneas compartilham a mesma requisição. */
+export const getCatalogo = () => {
+  if (!pending) {
+    pending = api.get('/catalogo')
+      .then((response) => toMap(response.data))
+      .finally(() => {
+        pending = null;
+      });
+  }
+  return pending;
+};
@@ -0,0 +1,91 @@
+import api from './axiosConfig';
+
+// Stream SSE (/events) compartilhado: UMA conexão por aba, com a união dos
+// modelos de todos os componentes inscritos. Substitui o polling/refetch manual.
+// O EventSource não envia cabeçalhos: a URL leva um ticket curto, só para o stream
+// (POST /events/ticket), nunca o token de login. Quando o ticket vence o servidor
+// envia 'expired' e encerra; a próxima conexão abre com um ticket novo.
+
+const RETRY_MS = 5000;
+
+const listeners = new Map(); // callback -> Set de modelos
+let source = null;
+let currentModels = '';
+let opening = false;
+// Muda a cada troca de modelos: descarta aberturas que ficaram obsoletas durante o POST do ticket
+let generation = 0;
+
+const getToken = () => localStorage.getItem('access_token') || localStorage.getItem('authToken');
+
+const dispatch = (type, data) => {
+  listeners.forEach((models, callback) => {
+    if (type === 'resync' || models.has(data.model)) {
+      callback({ type, ...data });
+    }
+  });
+};
+
+const open = async (models, gen) => {
+  opening = true;
+  let ticket;
+  try {
+    ({ data: { ticket } } = await api.post('/events/ticket'));
+  } catch {
+    // Sem ticket (offline, servidor ocupado...): tenta de novo. Login vencido (401)
+    // já leva ao logout pelo interceptor do axios.
+    if (gen === generation) setTimeout(() => gen === generation && getToken() && open(models, gen), RETRY_MS);
+    return;
+  } finally {
+    if (gen === generation) opening = false;
+  }
+  if (gen !== generation) return;
+
+  const params = new URLSearchParams({ models, ticket });
+  const next = new EventSource(`${api.defaults.baseURL}/events?${params}`);
+  let renewing = false;
+  next.addEventListener('change', (e) => dispatch('change', JSON.parse(e.data)));
+  next.addEventListener('resync', () => dispatch('resync', {}));
+  // Ticket vencido: abre a conexão nova antes de fechar esta, sem intervalo sem eventos
+  next.addEventListener('expired', () => {
+    renewing = true;
+    if (gen === generation) open(models, gen);
+  });
+  // O EventSource reconecta sozinho com a mesma URL; com o ticket vencido recebe 401 e
+  // desiste (CLOSED): pede um ticket novo
+  next.onerror = () => {
+    if (next.readyState !== EventSource.CLOSED || renewing || source !== next) return;
+    setTimeout(() => gen === generation && source === next && open(models, gen), RETRY_MS);
+  };
+
+  const previous = source;
+  source = next;
+  if (previous) previous.close();
+};
+
+const reconnect = () => {
+  const models = [...new Set([...listeners.values()].flatMap((set) => [...set]))].sort().join(',');
+  if (models === currentModels && (source || opening)) return;
+
+  generation += 1;
+  opening = false;
+  if (source) source.close();
+  source = null;
+  currentModels = models;
+
+  if (!models || !getToken()) return;
+  open(models, generation);
+};
+
+/**
+ * Inscreve 'callback' nas mudanças dos modelos informados.
+ * callback recebe { type: 'change' | 'resync', model, ids }.
+ * Retorna a função para cancelar a inscrição (use no cleanup do useEffect).
+ */
+export const subscribeModelEvents = (models, callback) => {
+  listeners.set(callback, new Set(models));
+  reconnect();
+  return () => {
+    listeners.delete(callback);
+    reconnect();
+  };
+};
@@ -1,5 +1,6 @@
 import React, { useMemo, useState, useEffect } from 'react';
 import api from '../api/axiosConfig'; // Usar a instância configurada do axios
+import { getCatalogo } from '../api/catalogo';
 import { X } from 'lucide-react';
 import { FaFilePdf, FaBuilding } from 'react-icons/fa';
 import html2pdf from 'html2pdf.js';
@@ -222,9 +223,9 @@ export default function ModalVisualizarPedido({ pedido = pedidoVazio, onClose })
     useEffect(() => {
         const fetchEmpresa = async () => {
             try {
-                const res = await api.get('/generic/empresas');
-                if (res.data.items && res.data.items.length > 0) {
-                    const emp = res.data.items[0];
+                const res = await api.get('/empresa/me');
+                const emp = res.data;
+                if (emp) {
                     // Mapeia os campos do backend para o formato esperado pelo componente
                     setEmpresaSelecionada({
                         ...emp,
@@ -253,18 +254,10 @@ export default function ModalVisualizarPedido({ pedido = pedidoVazio, onClose })
                 // Identificar IDs únicos dos produtos nos itens para buscar no banco
                 const uniqueIds = [...new Set(itensOriginais.map(item => item.id_produto || item.produto_id).filter(id => id))];
 
-                // Buscar detalhes de cada produto individualmente via endpoint genérico
-                const productPromises = uniqueIds.map(async (id) => {
-                    try {
-                        const res = await api.get(`/generic/produtos/${id}`);
-                        return res.data;
-                    } catch (error) {
-                        console.error(`Erro ao buscar produto ${id}:`, error);
-                        return null;
-                    }
-                });
+                // Uma chamada ao catálogo (revalidada por ETag) em vez de um GET por produto
+                const catalogo = await getCatalogo();
+                const productsData = uniqueIds.map((id) => catalogo.get(id) || null);
 
-                const productsData = await Promise.all(productPromises);
                 setProdutosDisponiveis(productsData.filter(p => p !== null));
 
             } catch (error) {
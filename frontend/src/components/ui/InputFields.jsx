@@ -335,23 +335,20 @@ const AsyncProductSelect = ({ value, onChange }) => {
   const [selectedOption, setSelectedOption] = useState(null);
   
   const loadOptions = (inputValue, callback) => {
-    api.get(`/generic/produtos`, {
-      params: { search_term: inputValue, limit: 20, situacao: 'true' }
+    // /lookup devolve só { id, label } (label = "SKU - Descrição")
+    api.get(`/lookup/produtos`, {
+      params: { q: inputValue, limit: 20, situacao: 'true' }
     }).then(response => {
-      const options = response.data.items.map(item => ({
-        value: item.id,
-        label: `${item.sku} - ${item.descricao}`
-      }));
-      callback(options);
+      callback(response.data.map(item => ({ value: item.id, label: item.label })));
     }).catch(() => callback([]));
   };
 
   useEffect(() => {
     if (value && (!selectedOption || selectedOption.value !== value)) {
-      api.get(`/generic/produtos/${value}`)
+      api.get(`/lookup/produtos`, { params: { ids: value } })
         .then(response => {
-            const item = response.data;
-            setSelectedOption({ value: item.id, label: `${item.sku} - ${item.descricao}` });
+            const item = response.data[0];
+            setSelectedOption(item ? { value: item.id, label: item.label } : { value, label: `ID ${value}` });
         })
         .catch(() => setSelectedOption({ value, label: `ID ${value}` }));
     } else if (!value) {
@@ -424,15 +421,16 @@ export const AsyncSelectInput = ({ field, value, onChange, error }) => {
   const loadOptions = (inputValue, callback) => {
     if (!foreign_key_model || !foreign_key_label_field) return callback([]);
 
-    api.get(`/generic/${foreign_key_model}`, {
+    // Endpoint leve de autocomplete: só (id, label), sem contagem nem linha inteira
+    api.get(`/lookup/${foreign_key_model}`, {
       params: {
-        search_term: inputValue,
+        q: inputValue,
         limit: 20
       }
     }).then(response => {
-      const options = response.data.items.map(item => ({
+      const options = response.data.map(item => ({
         value: item.id,
-        label: item[foreign_key_label_field] || `ID ${item.id}`
+        label: item.label
       }));
       callback(options);
     }).catch(() => {
@@ -445,10 +443,10 @@ export const AsyncSelectInput = ({ field, value, onChange, error }) => {
     // Se temos um ID (value), mas ainda não temos o objeto de seleção correspondente
     if (value && (!selectedOption || selectedOption.value !== value)) {
       setIsLoading(true);
-      api.get(`/generic/${foreign_key_model}/${value}`)
+      api.get(`/lookup/${foreign_key_model}`, { params: { ids: value } })
         .then(response => {
-          const fetchedLabel = response.data[foreign_key_label_field] || `ID ${value}`;
-          setSelectedOption({ value: value, label: fetchedLabel });
+          const item = response.data[0];
+          setSelectedOption({ value: value, label: item ? item.label : `ID ${value} (Não encontrado)` });
         })
         .catch(() => {
           setSelectedOption({ value: value, label: `ID ${value} (Não encontrado)` });
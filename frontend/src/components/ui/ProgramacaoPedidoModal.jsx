@@ -31,8 +31,17 @@ const ProgramacaoPedidoModal = ({
         // Garante que a ordem de finalização tenha um valor padrão
         setOrdemFinalizacao(pedido.ordem_finalizacao || '1.0');
 
-        // Busca detalhes dos produtos e verifica estoque
-        const enrichedItens = await Promise.all(pedido.itens.map(async (item) => {
+        // Busca descrições e lotes disponíveis de TODOS os itens em uma única chamada
+        // (aplicar: false apenas sugere, sem baixar estoque)
+        let sugestao = [];
+        try {
+          const res = await api.post(`/pedidos/${pedido.id}/programacao`, { aplicar: false });
+          sugestao = res.data.itens;
+        } catch (err) {
+          console.error("Erro ao carregar detalhes", err);
+        }
+
+        const enrichedItens = pedido.itens.map((item, index) => {
           const qtdTotal = Number(item.quantidade) || 0;
           let aRetirar = item.numero_a_retirar !== undefined ? Number(item.numero_a_retirar) : 0;
           let aProduzir = item.numero_a_produzir !== undefined ? Number(item.numero_a_produzir) : 0;
@@ -42,44 +51,21 @@ const ProgramacaoPedidoModal = ({
             aProduzir = qtdTotal;
           }
 
-          let descricao = item.descricao || 'Carregando...';
-          let temEstoque = false;
-          let estoqueOpcoes = [];
-          let retiradasIniciais = {}; // Mapa: { id_estoque: quantidade }
-
-          if (item.id_produto) {
-            try {
-              // 1. Busca descrição do produto
-              const prodRes = await api.get(`/generic/produtos/${item.id_produto}`);
-              descricao = `${prodRes.data.sku} - ${prodRes.data.descricao}`;
-
-              // 2. Busca TODOS os lotes disponíveis deste produto
-              const stockRes = await api.get(`/generic/estoque`, { 
-                params: { id_produto: item.id_produto, situacao: 'disponivel', limit: 100 } 
-              });
-              
-              if (stockRes.data.total_count > 0) {
-                temEstoque = true;
-                estoqueOpcoes = stockRes.data.items;
-              }
-            } catch (err) {
-              console.error("Erro ao carregar detalhes", err);
-              descricao = "Erro ao carregar produto";
-            }
-          }
+          const detalhes = sugestao.find((s) => s.indice === index);
+          const estoqueOpcoes = detalhes ? detalhes.lotes_disponiveis : [];
 
           return {
             ...item,
-            descricao,
+            descricao: detalhes?.descricao || item.descricao || 'Erro ao carregar produto',
             quantidade: qtdTotal,
             numero_a_retirar: aRetirar,
             numero_a_produzir: aProduzir,
             // Novos campos para controle de lote
-            temEstoque, // Flag para validação
+            temEstoque: estoqueOpcoes.length > 0, // Flag para validação
             estoqueOpcoes, // Array com os lotes disponíveis
-            retiradasSelecionadas: retiradasIniciais, // Objeto para controlar quanto tira de cada lote
+            retiradasSelecionadas: {}, // Objeto para controlar quanto tira de cada lote
           };
-        }));
+        });
 
         setItensState(enrichedItens);
         setIsLoadingItems(false);
@@ -198,13 +184,14 @@ const ProgramacaoPedidoModal = ({
 
     // Prepara o array de retiradas detalhadas para o backend (reservas)
     const retiradasDetalhadas = [];
-    itensState.forEach(item => {
+    itensState.forEach((item, index) => {
       if (item.retiradasSelecionadas) {
         Object.entries(item.retiradasSelecionadas).forEach(([estoqueId, qtd]) => {
           if (qtd > 0) {
             // Encontra o objeto de estoque original para pegar detalhes se necessário
             const estoqueOrigem = item.estoqueOpcoes.find(e => String(e.id) === String(estoqueId));
             retiradasDetalhadas.push({
+              indice: index, // linha do pedido (o mesmo produto pode aparecer em mais de uma)
               id_produto: item.id_produto,
               quantidade: qtd,
               id_estoque_origem: Number(estoqueId),
@@ -3,6 +3,7 @@ import React, { useState, useEffect, useMemo } from 'react';
 // Manterei o Link e o useParams, pois "Novo" e a lógica do modelName ainda os utilizam.
 import { useParams, useNavigate, Link } from 'react-router-dom';
 import api from '../api/axiosConfig';
+import { subscribeModelEvents } from '../api/eventStream';
 import LoadingSpinner from '../components/ui/LoadingSpinner';
 import ProgramacaoPedidoModal from '../components/ui/ProgramacaoPedidoModal'; // 1. IMPORTAR O NOVO MODAL
 import ModalVisualizarPedido from '../components/ModalVisualizarPedido'; // Importar o modal de visualização
@@ -22,7 +23,9 @@ import {
   Send,
   Package,
   CheckCircle,
-  Eye // Ícone para visualizar
+  Eye, // Ícone para visualizar
+  ArrowUp,
+  ArrowDown
 } from 'lucide-react';
 
 function useDebounce(value, delay) {
@@ -139,6 +142,8 @@ const GenericList = () => {
   const [loadingMetadata, setLoadingMetadata] = useState(true);
   const [isFetchingData, setIsFetchingData] = useState(false);
   const [isExporting, setIsExporting] = useState(false);
+  const [exportProgress, setExportProgress] = useState(0);
+  const [orderBy, setOrderBy] = useState(''); // Ex: 'nome_razao' ou '-nome_razao'
   const [error, setError] = useState('');
 
   const [isModalOpen, setIsModalOpen] = useState(false);
@@ -163,6 +168,14 @@ const GenericList = () => {
   const [limit, setLimit] = useState(10);
   const [totalCount, setTotalCount] = useState(0);
 
+  // Incrementado quando o servidor avisa (SSE) que o modelo mudou; dispara o refetch
+  const [liveVersion, setLiveVersion] = useState(0);
+  const debouncedLiveVersion = useDebounce(liveVersion, 300);
+
+  useEffect(() => {
+    return subscribeModelEvents([modelName], () => setLiveVersion((v) => v + 1));
+  }, [modelName]);
+
 
   useEffect(() => {
     const fetchMetadata = async () => {
@@ -173,6 +186,7 @@ const GenericList = () => {
       setData([]); // Limpa dados antigos
       setPage(1); // Reseta a página
       setSearchTerm(""); // Reseta a busca
+      setOrderBy(""); // Reseta a ordenação (as colunas mudam com o modelo)
 
       try {
         const metaRes = await api.get(`/metadata/${modelName}`);
@@ -194,16 +208,17 @@ const GenericList = () => {
 
     const fetchData = async () => {
       setIsFetchingData(true);
-      setSelectedRowId(null);
 
       try {
         const skip = (page - 1) * limit;
         const params = { 
           skip, 
-          limit,
-          sort_by: 'updated_at',
-          sort_order: 'desc'
+          limit
         };
+        // Ordenação no servidor (só colunas indexadas; o backend desempata por id)
+        if (orderBy) {
+          params.order_by = orderBy;
+        }
         if (debouncedSearchTerm) {
           params.search_term = debouncedSearchTerm;
         }
@@ -216,6 +231,8 @@ const GenericList = () => {
 
         setData(dataRes.data.items);
         setTotalCount(dataRes.data.total_count);
+        // Mantém a seleção se a linha continua na página (ex: refetch disparado pelo SSE)
+        setSelectedRowId((prev) => (dataRes.data.items.some((item) => item.id === prev) ? prev : null));
 
       } catch (err) {
         console.error('Falha ao buscar dados:', err);
@@ -229,7 +246,7 @@ const GenericList = () => {
     };
 
     fetchData();
-  }, [metadata, page, limit, debouncedSearchTerm, statusFilter]);
+  }, [metadata, page, limit, debouncedSearchTerm, statusFilter, debouncedLiveVersion, orderBy]);
 
   const fieldMetaMap = useMemo(() => {
     if (!metadata) return new Map();
@@ -285,7 +302,7 @@ const GenericList = () => {
     setActionToConfirm(null);
   };
 
-  /** * 3. Confirma a ação, envia o PUT e atualiza a UI. * Usa os dados do estado 'actionToConfirm'. */
+  /** * 3. Confirma a ação, envia o PATCH e atualiza a UI. * Usa os dados do estado 'actionToConfirm'. */
   const handleConfirmStatusChange = async () => {
     if (!selectedRowId || !actionToConfirm) return;
 
@@ -293,10 +310,10 @@ const GenericList = () => {
     const { newStatus, errorLog, errorAlert } = actionToConfirm;
 
     try {
-      // Faz a chamada PUT, alterando APENAS a situação
-      await api.put(`/generic/${modelName}/${selectedRowId}`, {
+      // Faz a chamada PATCH, alterando APENAS a situação (sem corpo de resposta)
+      await api.patch(`/generic/${modelName}/${selectedRowId}`, {
         situacao: newStatus // Usa o novo status vindo da ação
-      });
+      }, { headers: { Prefer: 'return=minimal' } });
 
       // Remove o item da lista atual
       setData(data.filter((item) => item.id !== selectedRowId));
@@ -350,8 +367,18 @@ const GenericList = () => {
     if (!selectedRowId) return;
 
     try {
-      // O modal já preparou o payload, só precisamos enviar
-      await api.put(`/generic/pedidos/${selectedRowId}`, payload);
+      // O backend baixa o estoque dos lotes e atualiza o pedido na mesma transação
+      await api.post(`/pedidos/${selectedRowId}/programacao`, {
+        aplicar: true,
+        data_finalizacao: payload.data_finalizacao,
+        ordem_finalizacao: payload.ordem_finalizacao,
+        retiradas_detalhadas: payload.retiradas_detalhadas,
+        // Sem retiradas escolhidas, o backend sugere os lotes respeitando o "A Produzir" de cada linha
+        itens: payload.itens.map((item, index) => ({
+          indice: index,
+          numero_a_produzir: Number(item.numero_a_produzir) || 0,
+        })),
+      });
 
       // Sucesso! Remove o item da lista atual
       setData(data.filter((item) => item.id !== selectedRowId));
@@ -399,9 +426,9 @@ const GenericList = () => {
     if (!selectedRowId || !conferenciaConfig) return;
 
     try {
-      await api.put(`/generic/pedidos/${selectedRowId}`, {
+      await api.patch(`/generic/pedidos/${selectedRowId}`, {
         situacao: conferenciaConfig.newStatus
-      });
+      }, { headers: { Prefer: 'return=minimal' } });
       setData(data.filter((item) => item.id !== selectedRowId));
       setTotalCount(prev => prev - 1);
       setSelectedRowId(null);
@@ -449,18 +476,36 @@ const GenericList = () => {
     setPedidoParaVisualizar(null);
   };
 
+  // Clique no cabeçalho: crescente -> decrescente -> sem ordenação
+  const handleSort = (colName) => {
+    setOrderBy((prev) => (prev === colName ? `-${colName}` : prev === `-${colName}` ? '' : colName));
+    setPage(1);
+  };
+
   const handleExportCSV = async () => {
     setIsExporting(true);
+    setExportProgress(0);
     try {
-      const params = {};
+      const parametros = { model_name: modelName };
       // Usa o termo de busca atual para filtrar a exportação
       if (debouncedSearchTerm) {
-        params.search_term = debouncedSearchTerm;
+        parametros.search_term = debouncedSearchTerm;
+      }
+
+      // A exportação roda no worker (POST /jobs): a requisição volta na hora
+      // e o progresso é consultado até o arquivo ficar pronto.
+      const { data: created } = await api.post('/jobs', { tipo: 'exportar_csv', parametros });
+      let job = created;
+      while (job.situacao === 'pendente' || job.situacao === 'executando') {
+        await new Promise((resolve) => setTimeout(resolve, 1500));
+        ({ data: job } = await api.get(`/jobs/${job.id}`));
+        setExportProgress(job.progresso);
+      }
+      if (job.situacao !== 'concluido') {
+        throw new Error(job.mensagem || `Job ${job.situacao}`);
       }
 
-      // Chama o novo endpoint de exportação
-      const response = await api.get(`/generic/${modelName}/export`, {
-        params,
+      const response = await api.get(`/jobs/${job.id}/resultado`, {
         responseType: 'blob', // Importante: informa ao axios para tratar a resposta como um arquivo (blob)
       });
 
@@ -566,7 +611,7 @@ const GenericList = () => {
               ) : (
                 <FileDown size={16} className="mr-2" />
               )}
-              {isExporting ? 'Exportando...' : 'Exportar CSV'}
+              {isExporting ? `Exportando... ${exportProgress}%` : 'Exportar CSV'}
             </button>
 
             {/* Botão Visualizar Pedido */}
@@ -683,16 +728,22 @@ const GenericList = () => {
               <thead className="bg-gray-50">
                 <tr className="border-b border-gray-200">
                   {/* Colunas Dinâmicas */}
-                  {displayColumns.map((colName) => (
-                    <th
-                      key={colName}
-                      className="px-6 py-4 text-left text-sm font-semibold text-gray-600 uppercase tracking-wider"
-                    >
-                      {/* Tenta buscar o label do metadata. Se for 'id', usa 'ID'. */}
-                      {metadata.fields.find((f) => f.name === colName)?.label ||
-                        (colName === 'id' ? 'ID' : colName)}
-                    </th>
-                  ))}
+                  {displayColumns.map((colName) => {
+                    const sortable = colName === 'id' || fieldMetaMap.get(colName)?.sortable;
+                    return (
+                      <th
+                        key={colName}
+                        onClick={sortable ? () => handleSort(colName) : undefined}
+                        className={`px-6 py-4 text-left text-sm font-semibold text-gray-600 uppercase tracking-wider ${sortable ? 'cursor-pointer select-none hover:text-gray-900' : ''}`}
+                      >
+                        {/* Tenta buscar o label do metadata. Se for 'id', usa 'ID'. */}
+                        {metadata.fields.find((f) => f.name === colName)?.label ||
+                          (colName === 'id' ? 'ID' : colName)}
+                        {orderBy === colName && <ArrowUp size={14} className="inline ml-1" />}
+                        {orderBy === `-${colName}` && <ArrowDown size={14} className="inline ml-1" />}
+                      </th>
+                    );
+                  })}
 
                 </tr>
               </thead>